@@ -19,11 +19,20 @@
 # FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 # DEALINGS IN THE SOFTWARE.
 
+import os
+import sys
+from argparse import ArgumentParser
+
 from holoscan.conditions import CountCondition
 from holoscan.core import Application, Operator, OperatorSpec
 
 import cupy as cp
 
+# The profiler lives next to the flow tracker example
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "flow_tracker"))
+import profiler  # noqa: E402
+from profiler import profile_compute  # noqa: E402
+
 
 class SourceOp(Operator):
     def __init__(self, *args, **kwargs):
@@ -40,6 +49,7 @@ class SourceOp(Operator):
         op_output.emit(self.static_out, "static_out")
 
         
+@profile_compute
 class MatMulOp(Operator):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -79,6 +89,17 @@ class MatMulApp(Application):
         
 
 if __name__ == "__main__":
+    parser = ArgumentParser(description="CuPy matrix multiplication example")
+    parser.add_argument(
+        "--trace",
+        type=str,
+        default="",
+        help="If set, record every compute() call and write a Chrome trace JSON file to this path.",
+    )
+    args = parser.parse_args()
+    if args.trace:
+        profiler.enable(args.trace)
+
     app = MatMulApp()
     app.config("")
     app.run()
\ No newline at end of file
@@ -19,11 +19,20 @@
 # FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 # DEALINGS IN THE SOFTWARE.
 
+import os
+import sys
+from argparse import ArgumentParser
+
 from holoscan.conditions import CountCondition
 from holoscan.core import Application, Operator, OperatorSpec
 
 import cupy as cp
 
+# The profiler lives next to the flow tracker example
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "flow_tracker"))
+import profiler  # noqa: E402
+from profiler import profile_compute  # noqa: E402
+
 
 class SourceOp(Operator):
     def setup(self, spec: OperatorSpec):
@@ -33,6 +42,7 @@ class SourceOp(Operator):
         op_output.emit(cp.random.randn(32768), "out")
 
         
+@profile_compute
 class FFTOp(Operator):
     def setup(self, spec: OperatorSpec):
         spec.input("in")
@@ -64,6 +74,17 @@ class FFTApp(Application):
         
 
 if __name__ == "__main__":
+    parser = ArgumentParser(description="CuPy FFT example")
+    parser.add_argument(
+        "--trace",
+        type=str,
+        default="",
+        help="If set, record every compute() call and write a Chrome trace JSON file to this path.",
+    )
+    args = parser.parse_args()
+    if args.trace:
+        profiler.enable(args.trace)
+
     app = FFTApp()
     app.config("")
     app.run()
\ No newline at end of file
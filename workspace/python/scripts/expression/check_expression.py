@@ -0,0 +1,134 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+
+# Check that the three ways of evaluating an ExpressionOp expression agree:
+# NumPy eval(), numexpr and the CuPy ElementwiseKernel, each against a plain
+# NumPy reference. Backends that are not installed are skipped. Expressions
+# that cannot mean the same on every backend must be rejected.
+#
+#   python check_expression.py
+
+import numpy as np
+
+from expression import (
+    EXPRESSION_FUNCTIONS,
+    cp,
+    cpu_expression,
+    elementwise_kernel,
+    ne,
+    parse_expression,
+)
+
+# Expression and reference computing its last output
+CASES = [
+    ("y = a * b + c", lambda a, b, c: a * b + c),
+    ("y = a ** 2 - b / (c + 1)", lambda a, b, c: a**2 - b / (c + 1)),
+    ("y = -a + +b", lambda a, b: -a + b),
+    ("y = where(a > b, a, -b)", lambda a, b: np.where(a > b, a, -b)),
+    ("y = a if b < a < c else c", lambda a, b, c: np.where((b < a) & (a < c), a, c)),
+    ("y = a > 0.5 and not b > 0.5 or c > 0.9", lambda a, b, c: (a > 0.5) & ~(b > 0.5) | (c > 0.9)),
+    ("y = not a", lambda a: a == 0),
+    ("y = a and b", lambda a, b: (a != 0) & (b != 0)),
+    ("y = where(a, b, 2)", lambda a, b: np.where(a != 0, b, 2)),
+    ("t = sqrt(abs(a - b)); y = exp(-t) * c", lambda a, b, c: np.exp(-np.sqrt(abs(a - b))) * c),
+]
+
+REJECTED = [
+    "x = x * 2",
+    "y = a; y = y * 2",
+    "y = a // b",
+    "y = a % b",
+    "y = a.real",
+    "y = a[0]",
+    "y = max(a, b)",
+    "y = sqrt(a, b)",
+    "y = 'a'",
+    "y = (lambda: a)()",
+]
+
+
+def inputs(names, size=1000):
+    rng = np.random.default_rng(0)
+    tensors = {}
+    for name in names:
+        values = rng.random(size, dtype=np.float32)
+        # Exact zeros, for the truth value of numbers
+        values[::7] = 0
+        tensors[name] = values
+    return tensors
+
+
+def evaluate_eval(statements, tensors):
+    namespace = dict(tensors)
+    functions = {"__builtins__": {}, **EXPRESSION_FUNCTIONS}
+    for name, rhs in statements:
+        namespace[name] = np.asarray(eval(cpu_expression(rhs), functions, namespace), np.float32)
+    return namespace[statements[-1][0]]
+
+
+def evaluate_numexpr(statements, tensors):
+    namespace = dict(tensors)
+    for name, rhs in statements:
+        out = np.empty(len(next(iter(tensors.values()))), np.float32)
+        ne.evaluate(cpu_expression(rhs), local_dict=namespace, out=out, casting="unsafe")
+        namespace[name] = out
+    return namespace[statements[-1][0]]
+
+
+def evaluate_cupy(statements, input_names, tensors):
+    kernel = elementwise_kernel(statements, input_names)
+    arrays = [cp.asarray(tensors[name]) for name in input_names]
+    outputs = [cp.empty_like(arrays[0]) for _ in statements]
+    kernel(*arrays, *outputs)
+    return cp.asnumpy(outputs[-1])
+
+
+def check():
+    backends = {"eval": evaluate_eval}
+    if ne is not None:
+        backends["numexpr"] = evaluate_numexpr
+    if cp is not None:
+        backends["cupy"] = lambda statements, tensors: evaluate_cupy(
+            statements, input_names, tensors
+        )
+
+    for expression, reference in CASES:
+        statements, input_names = parse_expression(expression)
+        tensors = inputs(input_names)
+        expected = np.asarray(reference(**tensors), np.float32)
+        for backend, evaluate in backends.items():
+            result = evaluate(statements, tensors)
+            if not np.allclose(result, expected, rtol=1e-5, atol=1e-6):
+                raise AssertionError(f"{backend}: {expression!r} differs from the reference")
+        print(f"{expression:45} ok ({', '.join(backends)})")
+
+    for expression in REJECTED:
+        try:
+            parse_expression(expression)
+        except ValueError as error:
+            print(f"{expression:45} rejected: {error}")
+        else:
+            raise AssertionError(f"{expression!r} was not rejected")
+
+
+if __name__ == "__main__":
+    check()
@@ -0,0 +1,414 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import ast
+import os
+
+import numpy as np
+from holoscan.conditions import CountCondition
+from holoscan.core import Application, Operator, OperatorSpec
+
+try:
+    import cupy as cp
+except ImportError:
+    cp = None
+
+try:
+    import numexpr as ne
+except ImportError:
+    ne = None
+
+
+# Functions that may be used inside an expression. They exist both in CUDA
+# (for the CuPy ElementwiseKernel) and in numexpr/NumPy (for the CPU path),
+# except `where(condition, a, b)`, which becomes `condition ? a : b` in CUDA
+# (see cuda_expression()).
+EXPRESSION_FUNCTIONS = {
+    "abs": np.abs,
+    "exp": np.exp,
+    "log": np.log,
+    "sqrt": np.sqrt,
+    "sin": np.sin,
+    "cos": np.cos,
+    "tanh": np.tanh,
+    "where": np.where,
+}
+
+# The only syntax allowed in an expression: anything else (attributes,
+# subscripts, lambdas, ...) either has no CUDA equivalent or means something
+# else there, e.g. `//` starts a comment.
+_ALLOWED_NODES = (
+    ast.Expression,
+    ast.BinOp,
+    ast.UnaryOp,
+    ast.Compare,
+    ast.BoolOp,
+    ast.IfExp,
+    ast.Call,
+    ast.Name,
+    ast.Constant,
+    ast.Load,
+    ast.Add,
+    ast.Sub,
+    ast.Mult,
+    ast.Div,
+    ast.Pow,
+    ast.USub,
+    ast.UAdd,
+    ast.Not,
+    ast.And,
+    ast.Or,
+    ast.Eq,
+    ast.NotEq,
+    ast.Lt,
+    ast.LtE,
+    ast.Gt,
+    ast.GtE,
+)
+
+_OPERATORS = {
+    ast.Add: "+",
+    ast.Sub: "-",
+    ast.Mult: "*",
+    ast.Div: "/",
+    ast.Eq: "==",
+    ast.NotEq: "!=",
+    ast.Lt: "<",
+    ast.LtE: "<=",
+    ast.Gt: ">",
+    ast.GtE: ">=",
+}
+
+
+def _check_node(node):
+    if isinstance(node, (ast.FloorDiv, ast.Mod)):
+        # No common meaning on CPU and in CUDA for floats and negative ints
+        raise ValueError("'//' and '%' are not supported in expressions")
+    if not isinstance(node, _ALLOWED_NODES):
+        raise ValueError(f"unsupported syntax in expression: {type(node).__name__}")
+    if isinstance(node, ast.Constant) and type(node.value) not in (bool, int, float):
+        raise ValueError(f"unsupported constant in expression: {node.value!r}")
+    if isinstance(node, ast.Call):
+        if not isinstance(node.func, ast.Name) or node.func.id not in EXPRESSION_FUNCTIONS:
+            raise ValueError(f"unsupported function in expression: {ast.unparse(node.func)}")
+        arity = 3 if node.func.id == "where" else 1
+        if len(node.args) != arity or node.keywords:
+            raise ValueError(f"{node.func.id}() takes exactly {arity} argument(s)")
+
+
+def parse_expression(expression):
+    """Parse an expression such as "diff = original_value - current_value".
+
+    Several assignments can be separated by ";". Every assignment target
+    becomes an output tensor and every other name becomes an input tensor.
+    Right-hand sides may use `+ - * / **`, comparisons, `and`/`or`/`not`,
+    `a if condition else b` and the EXPRESSION_FUNCTIONS.
+
+    Parameters
+    ----------
+    expression : str
+
+    Returns
+    ----------
+    statements : list of (output name, right-hand side) tuples
+    inputs : list of input tensor names, in order of first use
+
+    """
+    statements, inputs = [], []
+    for statement in expression.split(";"):
+        if not statement.strip():
+            continue
+        target, _, rhs = statement.partition("=")
+        target, rhs = target.strip(), rhs.strip()
+        if not target.isidentifier() or not rhs:
+            raise ValueError(f"invalid statement in expression: {statement!r}")
+
+        for node in ast.walk(ast.parse(rhs, mode="eval")):
+            _check_node(node)
+            if isinstance(node, ast.Name) and node.id not in EXPRESSION_FUNCTIONS:
+                if node.id not in inputs and node.id not in dict(statements):
+                    inputs.append(node.id)
+        if target in inputs or target in EXPRESSION_FUNCTIONS:
+            raise ValueError(f"expression assigns to an input: {statement!r}")
+        if target in dict(statements):
+            raise ValueError(f"expression assigns twice to {target!r}")
+        statements.append((target, rhs))
+
+    if not statements:
+        raise ValueError("expression is empty")
+    return statements, inputs
+
+
+def _is_boolean(node):
+    return (
+        isinstance(node, (ast.Compare, ast.BoolOp))
+        or (isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not))
+        or (isinstance(node, ast.Constant) and isinstance(node.value, bool))
+    )
+
+
+def _truth(node, cuda):
+    """Source of `node` as a boolean, numbers being true when non-zero."""
+    source = _source(node, cuda)
+    return source if _is_boolean(node) else f"({source} != 0)"
+
+
+def _source(node, cuda):
+    """Fully parenthesized source of a checked expression node.
+
+    The CPU flavor is valid for both numexpr and NumPy, which have no
+    `and`/`or`/`not` or conditional expression on arrays.
+    """
+    if isinstance(node, ast.Expression):
+        return _source(node.body, cuda)
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Constant):
+        if isinstance(node.value, bool) and cuda:
+            return "true" if node.value else "false"
+        return repr(node.value)
+    if isinstance(node, ast.BinOp):
+        left, right = _source(node.left, cuda), _source(node.right, cuda)
+        if isinstance(node.op, ast.Pow):
+            return f"pow({left}, {right})" if cuda else f"({left} ** {right})"
+        return f"({left} {_OPERATORS[type(node.op)]} {right})"
+    if isinstance(node, ast.UnaryOp):
+        if isinstance(node.op, ast.Not):
+            if not _is_boolean(node.operand):
+                return f"({_source(node.operand, cuda)} == 0)"
+            return f"({'!' if cuda else '~'}{_source(node.operand, cuda)})"
+        operand = _source(node.operand, cuda)
+        return f"(-{operand})" if isinstance(node.op, ast.USub) else operand
+    if isinstance(node, ast.Compare):
+        # a < b < c is (a < b) and (b < c)
+        operands = [node.left, *node.comparators]
+        parts = [
+            f"({_source(left, cuda)} {_OPERATORS[type(op)]} {_source(right, cuda)})"
+            for left, op, right in zip(operands, node.ops, operands[1:])
+        ]
+        if len(parts) == 1:
+            return parts[0]
+        return "({})".format((" && " if cuda else " & ").join(parts))
+    if isinstance(node, ast.BoolOp):
+        if isinstance(node.op, ast.And):
+            joiner = " && " if cuda else " & "
+        else:
+            joiner = " || " if cuda else " | "
+        return "({})".format(joiner.join(_truth(value, cuda) for value in node.values))
+    if isinstance(node, ast.IfExp):
+        condition, a, b = node.test, node.body, node.orelse
+    elif node.func.id == "where":
+        condition, a, b = node.args
+    else:
+        return "{}({})".format(node.func.id, ", ".join(_source(arg, cuda) for arg in node.args))
+    condition, a, b = _truth(condition, cuda), _source(a, cuda), _source(b, cuda)
+    return f"({condition} ? {a} : {b})" if cuda else f"where({condition}, {a}, {b})"
+
+
+def cpu_expression(rhs):
+    """numexpr/NumPy source of a right-hand side."""
+    return _source(ast.parse(rhs, mode="eval"), cuda=False)
+
+
+def cuda_expression(rhs):
+    """CUDA source of a right-hand side."""
+    return _source(ast.parse(rhs, mode="eval"), cuda=True)
+
+
+def elementwise_kernel(statements, input_names, name="expression_kernel"):
+    """Build a single CuPy ElementwiseKernel computing every output at once."""
+    outputs = [target for target, _ in statements]
+    # Intermediate outputs may be used by later statements, so only names
+    # that are never assigned are kernel inputs.
+    in_params = ", ".join(f"T{i} {input_name}" for i, input_name in enumerate(input_names))
+    out_params = ", ".join(f"O{i} {output}" for i, output in enumerate(outputs))
+    operation = "; ".join(f"{target} = {cuda_expression(rhs)}" for target, rhs in statements)
+    return cp.ElementwiseKernel(in_params, out_params, operation, name)
+
+
+class ExpressionOp(Operator):
+    """Evaluate an elementwise expression over named input tensors.
+
+    This operator has:
+        inputs:  one port per entry in `in_ports`
+        outputs: "out"
+
+    Each input message is a dict (or TensorMap) of named tensors. All tensors
+    received on a tick are gathered by name and the expression, e.g.
+    "diff = original_value - current_value", is evaluated in a single fused
+    pass. On GPU the expression is compiled once into a CuPy ElementwiseKernel;
+    on CPU it is evaluated with numexpr (or NumPy if numexpr is unavailable).
+
+    The output tensors are written into buffers that are reused from tick to
+    tick, so a downstream operator must consume (or copy) them before the
+    next tick. Set `reuse_output=False` to get fresh buffers on every tick.
+    """
+
+    def __init__(
+        self,
+        fragment,
+        *args,
+        expression="",
+        in_ports=("in",),
+        backend="auto",
+        out_dtype=None,
+        reuse_output=True,
+        **kwargs,
+    ):
+        self.statements, self.input_names = parse_expression(expression)
+        self.in_ports = list(in_ports)
+        self.out_dtype = None if out_dtype is None else np.dtype(out_dtype)
+        self.reuse_output = reuse_output
+
+        if backend == "auto":
+            backend = "cupy" if cp is not None else "numpy"
+        if backend not in ("cupy", "numpy"):
+            raise ValueError("backend must be one of the following: auto, cupy, numpy.")
+        if backend == "cupy" and cp is None:
+            raise ImportError("backend 'cupy' requested but cupy is not installed")
+        self.backend = backend
+        self.xp = cp if backend == "cupy" else np
+
+        self.kernel = None
+        if backend == "cupy":
+            self.kernel = elementwise_kernel(self.statements, self.input_names)
+        self.sources = {name: cpu_expression(rhs) for name, rhs in self.statements}
+        self.code = {
+            name: compile(source, f"<{name}>", "eval") for name, source in self.sources.items()
+        }
+        # No builtins, so that eval() only sees the expression functions
+        self.functions = {"__builtins__": {}, **EXPRESSION_FUNCTIONS}
+        self.buffers = {}
+
+        # Need to call the base class constructor last
+        super().__init__(fragment, *args, **kwargs)
+
+    def setup(self, spec: OperatorSpec):
+        for port in self.in_ports:
+            spec.input(port)
+        spec.output("out")
+
+    def _buffer(self, name, shape, dtype):
+        buffer = self.buffers.get(name)
+        if buffer is None or buffer.shape != shape or buffer.dtype != dtype or not self.reuse_output:
+            buffer = self.xp.empty(shape, dtype=dtype)
+            self.buffers[name] = buffer
+        return buffer
+
+    def compute(self, op_input, op_output, context):
+        # Gather every named tensor received on this tick
+        tensors = {}
+        for port in self.in_ports:
+            message = op_input.receive(port)
+            for name in self.input_names:
+                if name not in tensors:
+                    tensor = message.get(name)
+                    if tensor is not None:
+                        tensors[name] = self.xp.asarray(tensor)
+
+        missing = [name for name in self.input_names if name not in tensors]
+        if missing:
+            raise KeyError(f"{self.name}: missing input tensors {missing}")
+
+        arrays = [tensors[name] for name in self.input_names]
+        shape = np.broadcast_shapes(*(a.shape for a in arrays))
+        dtype = self.out_dtype
+        if dtype is None:
+            dtype = np.result_type(*(a.dtype for a in arrays))
+
+        out_message = {}
+        if self.kernel is not None:
+            outputs = [self._buffer(name, shape, dtype) for name, _ in self.statements]
+            self.kernel(*arrays, *outputs)
+            for (name, _), buffer in zip(self.statements, outputs):
+                out_message[name] = buffer
+        else:
+            namespace = dict(tensors)
+            for name, _ in self.statements:
+                buffer = self._buffer(name, shape, dtype)
+                if ne is not None:
+                    ne.evaluate(
+                        self.sources[name], local_dict=namespace, out=buffer, casting="unsafe"
+                    )
+                else:
+                    np.copyto(
+                        buffer,
+                        eval(self.code[name], self.functions, namespace),
+                        casting="unsafe",
+                    )
+                namespace[name] = buffer
+                out_message[name] = buffer
+
+        op_output.emit(out_message, "out")
+
+
+# Operators used by the demo application below
+
+
+class ValueSourceOp(Operator):
+    """Emit a dict holding a single named random tensor on each tick."""
+
+    def __init__(self, fragment, *args, tensor_name="value", size=1 << 20, **kwargs):
+        self.tensor_name = tensor_name
+        self.size = size
+        self.xp = cp if cp is not None else np
+        super().__init__(fragment, *args, **kwargs)
+
+    def setup(self, spec: OperatorSpec):
+        spec.output("out")
+
+    def compute(self, op_input, op_output, context):
+        values = self.xp.random.random(self.size).astype(np.float32)
+        op_output.emit({self.tensor_name: values}, "out")
+
+
+class SinkOp(Operator):
+    def setup(self, spec: OperatorSpec):
+        spec.input("in")
+
+    def compute(self, op_input, op_output, context):
+        message = op_input.receive("in")
+        for name, tensor in message.items():
+            print(f"{name}: shape={tensor.shape}, mean={float(tensor.mean()):.4f}")
+
+
+class ExpressionApp(Application):
+    def compose(self):
+        # Same graph as answers/ex4.py, with MyOp replaced by an ExpressionOp
+        # configured from the "expression" block of expression.yaml
+        src1 = ValueSourceOp(
+            self, CountCondition(self, 5), tensor_name="original_value", name="src1"
+        )
+        src2 = ValueSourceOp(
+            self, CountCondition(self, 5), tensor_name="current_value", name="src2"
+        )
+        expr = ExpressionOp(self, name="expression", **self.kwargs("expression"))
+        sink = SinkOp(self, name="sink")
+
+        self.add_flow(src1, expr, {("out", "input_1")})
+        self.add_flow(src2, expr, {("out", "input_2")})
+        self.add_flow(expr, sink)
+
+
+if __name__ == "__main__":
+    app = ExpressionApp()
+    app.config(os.path.join(os.path.dirname(__file__), "expression.yaml"))
+    app.run()
@@ -0,0 +1,240 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+# Operators whose work is a coroutine, run on a shared asyncio event loop.
+#
+# A blocking compute() such as DelayOp's time.sleep() holds a scheduler
+# worker for the whole wait. `AsyncOp` instead receives a value on "in",
+# starts `process(value)` on the event loop thread returned by
+# `shared_loop()` and returns at once, so one operator can have up to
+# `max_in_flight` calls waiting on disks, sockets or services:
+#
+#   class LookupOp(AsyncOp):
+#       async def process(self, key):
+#           reader, writer = await asyncio.open_connection(host, port)
+#           ...
+#           return reply
+#
+#   lookup = LookupOp(self, max_in_flight=256, name="lookup")
+#   self.add_flow(src, lookup)
+#   self.add_flow(lookup.results, sink)
+#
+# Results are emitted on "out" of the companion `lookup.results` operator,
+# in input order (or in completion order with ordered=False), one per tick.
+# Holoscan only ticks an operator once all of its conditions are met, and
+# has no condition for "a message arrived or a call finished", so the two
+# halves are separate operators, each gated by an AsynchronousCondition:
+#   * AsyncOp waits (EVENT_WAITING) while `max_in_flight` calls are running
+#     or have results not emitted yet, on top of its message condition on
+#     "in", so that the results held back for ordering are bounded too;
+#   * its results operator is woken (EVENT_DONE) by the event loop when a
+#     result is ready, waits for events while calls are running, and is
+#     otherwise idle (WAIT), which lets the application finish once the
+#     upstream operators are done.
+# An exception raised by process() is raised again by the results operator.
+
+import asyncio
+import itertools
+import threading
+from collections import deque
+
+from holoscan.conditions import AsynchronousCondition, AsynchronousEventState
+from holoscan.core import Operator, OperatorSpec
+
+
+class EventLoopThread:
+    """asyncio event loop running forever in a daemon thread."""
+
+    def __init__(self, name="async_op_loop"):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coroutine):
+        """Schedule `coroutine` on the loop, returns a concurrent Future."""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+
+_shared_loop = None
+_shared_lock = threading.Lock()
+
+
+def shared_loop():
+    """The process-wide event loop thread, created on first use."""
+    global _shared_loop
+    with _shared_lock:
+        if _shared_loop is None:
+            _shared_loop = EventLoopThread()
+        return _shared_loop
+
+
+class AsyncOp(Operator):
+    """Base class of operators running the coroutine `process()` per message.
+
+    **==Named Inputs==**
+
+        in : any
+            Value passed to `process()`.
+
+    The results are emitted by `self.results` (see `AsyncResultsOp`).
+
+    Parameters
+    ----------
+    max_in_flight : int
+        Number of `process()` calls allowed to run or wait for their result
+        to be emitted at the same time.
+    ordered : bool
+        Emit the results in input order, else as soon as they are ready.
+    loop : EventLoopThread
+        Event loop to run on, by default `shared_loop()`.
+    """
+
+    def __init__(self, fragment, *args, max_in_flight=64, ordered=True, loop=None, **kwargs):
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be >= 1")
+        self.max_in_flight = max_in_flight
+        self.ordered = ordered
+        self.loop = loop
+        name = kwargs.get("name", "async_op")
+        self.capacity = AsynchronousCondition(fragment, name=f"{name}_capacity")
+        self.results = AsyncResultsOp(fragment, self, name=f"{name}_results")
+
+        self.lock = threading.Lock()
+        self.seq = itertools.count()
+        self.next_out = 0
+        self.in_flight = 0
+        # Calls running or with a result not emitted yet
+        self.pending = 0
+        # Results in completion order, or by sequence number when ordered
+        self.ready = {} if ordered else deque()
+        self.error = None
+        self.peak_in_flight = 0
+        self.completed = 0
+
+        # Need to call the base class constructor last
+        super().__init__(fragment, self.capacity, *args, **kwargs)
+
+    def setup(self, spec: OperatorSpec):
+        spec.input("in")
+
+    async def process(self, value):
+        raise NotImplementedError
+
+    def compute(self, op_input, op_output, context):
+        value = op_input.receive("in")
+        seq = next(self.seq)
+        with self.lock:
+            self.in_flight += 1
+            self.pending += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            if self.pending >= self.max_in_flight:
+                self.capacity.event_state = AsynchronousEventState.EVENT_WAITING
+            self.results._update()
+        future = (self.loop or shared_loop()).submit(self.process(value))
+        future.add_done_callback(lambda future: self._done(seq, future))
+
+    def _done(self, seq, future):
+        # Runs on the event loop thread
+        try:
+            result, error = future.result(), None
+        except BaseException as e:
+            result, error = None, e
+        with self.lock:
+            if error is not None and self.error is None:
+                self.error = error
+            if self.ordered:
+                self.ready[seq] = result
+            else:
+                self.ready.append(result)
+            self.completed += 1
+            self.in_flight -= 1
+            self.results._update()
+
+    def _pop(self):
+        """Next result to emit as (True, result), or (False, None)."""
+        if self.error is not None:
+            raise self.error
+        if not self.ordered:
+            if not self.ready:
+                return False, None
+            result = self.ready.popleft()
+        elif self.next_out in self.ready:
+            result = self.ready.pop(self.next_out)
+            self.next_out += 1
+        else:
+            return False, None
+        self.pending -= 1
+        if self.pending == self.max_in_flight - 1:
+            self.capacity.event_state = AsynchronousEventState.EVENT_DONE
+        return True, result
+
+    def _has_ready(self):
+        if self.error is not None:
+            return True
+        return self.next_out in self.ready if self.ordered else bool(self.ready)
+
+
+class AsyncResultsOp(Operator):
+    """Emit the results of an AsyncOp, created by it as `op.results`.
+
+    **==Named Outputs==**
+
+        out : any
+            Return value of `process()`, one per tick.
+    """
+
+    def __init__(self, fragment, source, *args, **kwargs):
+        self.source = source
+        name = kwargs.get("name", "results")
+        self.event = AsynchronousCondition(fragment, name=f"{name}_event")
+        self.event.event_state = AsynchronousEventState.WAIT
+
+        # Need to call the base class constructor last
+        super().__init__(fragment, self.event, *args, **kwargs)
+
+    def setup(self, spec: OperatorSpec):
+        spec.output("out")
+
+    def _update(self):
+        # Called with the source lock held
+        source = self.source
+        if source._has_ready():
+            state = AsynchronousEventState.EVENT_DONE
+        elif source.in_flight:
+            state = AsynchronousEventState.EVENT_WAITING
+        else:
+            state = AsynchronousEventState.WAIT
+        if self.event.event_state != state:
+            self.event.event_state = state
+
+    def compute(self, op_input, op_output, context):
+        source = self.source
+        with source.lock:
+            try:
+                ready, result = source._pop()
+            finally:
+                self._update()
+        if ready:
+            op_output.emit(result, "out")
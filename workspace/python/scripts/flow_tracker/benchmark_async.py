@@ -0,0 +1,159 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+# Thousands of concurrent simulated I/O waits: blocking versus async compute.
+#
+# A source emits `count` requests, each answered after `delay` seconds:
+#
+#   blocking: DelayOp-style compute() sleeping in time.sleep(), so an
+#             operator handles one request at a time
+#   async:    AsyncOp awaiting asyncio.sleep() on the shared event loop, with
+#             up to `max_in_flight` requests waiting at once
+#
+# Both run on the GreedyScheduler (a single scheduler thread). The blocking
+# pipeline is only run for `blocking_count` requests, since it takes `delay`
+# seconds per request.
+#
+#   python benchmark_async.py
+#   python benchmark_async.py -c 10000 -d 0.05 --max_in_flight 4096
+
+import asyncio
+import time
+from argparse import ArgumentParser
+
+from holoscan.conditions import CountCondition
+from holoscan.core import Application, Operator, OperatorSpec
+from holoscan.schedulers import GreedyScheduler
+
+from async_op import AsyncOp
+
+
+class RequestTxOp(Operator):
+    def __init__(self, fragment, *args, **kwargs):
+        self.index = 0
+        super().__init__(fragment, *args, **kwargs)
+
+    def setup(self, spec: OperatorSpec):
+        spec.output("out")
+
+    def compute(self, op_input, op_output, context):
+        op_output.emit(self.index, "out")
+        self.index += 1
+
+
+class BlockingWaitOp(Operator):
+    def __init__(self, fragment, *args, delay=0.01, **kwargs):
+        self.delay = delay
+        super().__init__(fragment, *args, **kwargs)
+
+    def setup(self, spec: OperatorSpec):
+        spec.input("in")
+        spec.output("out")
+
+    def compute(self, op_input, op_output, context):
+        value = op_input.receive("in")
+        time.sleep(self.delay)
+        op_output.emit(value, "out")
+
+
+class AsyncWaitOp(AsyncOp):
+    def __init__(self, fragment, *args, delay=0.01, **kwargs):
+        self.delay = delay
+        super().__init__(fragment, *args, **kwargs)
+
+    async def process(self, value):
+        await asyncio.sleep(self.delay)
+        return value
+
+
+class ReplyRxOp(Operator):
+    def __init__(self, fragment, *args, **kwargs):
+        self.received = 0
+        self.in_order = True
+        super().__init__(fragment, *args, **kwargs)
+
+    def setup(self, spec: OperatorSpec):
+        spec.input("in")
+
+    def compute(self, op_input, op_output, context):
+        value = op_input.receive("in")
+        self.in_order &= value == self.received
+        self.received += 1
+
+
+class WaitApp(Application):
+    def __init__(self, *args, use_async=True, count=1000, delay=0.01, max_in_flight=1024, **kw):
+        self.use_async = use_async
+        self.count = count
+        self.delay = delay
+        self.max_in_flight = max_in_flight
+        super().__init__(*args, **kw)
+
+    def compose(self):
+        tx = RequestTxOp(self, CountCondition(self, self.count), name="tx")
+        self.rx = ReplyRxOp(self, name="rx")
+        if self.use_async:
+            self.wait = AsyncWaitOp(
+                self, delay=self.delay, max_in_flight=self.max_in_flight, name="wait"
+            )
+            self.add_flow(tx, self.wait)
+            self.add_flow(self.wait.results, self.rx)
+        else:
+            wait = BlockingWaitOp(self, delay=self.delay, name="wait")
+            self.add_flow(tx, wait)
+            self.add_flow(wait, self.rx)
+
+
+def run(use_async, count, args):
+    app = WaitApp(
+        use_async=use_async, count=count, delay=args.delay, max_in_flight=args.max_in_flight
+    )
+    app.config("")
+    app.scheduler(GreedyScheduler(app, name="greedy_scheduler"))
+    start = time.perf_counter()
+    app.run()
+    elapsed = time.perf_counter() - start
+    if app.rx.received != count or not app.rx.in_order:
+        raise RuntimeError(
+            f"received {app.rx.received} of {count} replies, in order: {app.rx.in_order}"
+        )
+    peak = app.wait.peak_in_flight if use_async else 1
+    return elapsed, peak
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Benchmark async operators on simulated I/O waits")
+    parser.add_argument("-c", "--count", type=int, default=5000, help="Requests (async).")
+    parser.add_argument("-d", "--delay", type=float, default=0.02, help="Wait per request in s.")
+    parser.add_argument("--max_in_flight", type=int, default=2048, help="Concurrent waits.")
+    parser.add_argument(
+        "--blocking_count", type=int, default=50, help="Requests for the blocking pipeline."
+    )
+    args = parser.parse_args()
+
+    print(f"{args.delay * 1e3:.0f} ms per request, at most {args.max_in_flight} in flight")
+    print(f"{'mode':>9} {'requests':>9} {'wall s':>8} {'req/s':>9} {'peak in flight':>15}")
+    rates = {}
+    for name, count in (("blocking", args.blocking_count), ("async", args.count)):
+        elapsed, peak = run(name == "async", count, args)
+        rates[name] = count / elapsed
+        print(f"{name:>9} {count:>9} {elapsed:>8.2f} {rates[name]:>9.0f} {peak:>15}")
+    print(f"speedup: {rates['async'] / rates['blocking']:.0f}x")
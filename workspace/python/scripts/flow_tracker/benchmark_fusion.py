@@ -0,0 +1,128 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+# Messages per second through a linear chain, with and without fusion.
+#
+#   python benchmark_fusion.py                 # tx -> 4 stages -> rx
+#   python benchmark_fusion.py -k 8 -c 20000
+#   python benchmark_fusion.py --trace fused.json
+#
+# With --trace, the fused run is profiled with profiler.py: the stages
+# still show up under their own names.
+
+import time
+from argparse import ArgumentParser
+
+from holoscan.conditions import CountCondition
+from holoscan.core import Application, Operator, OperatorSpec
+from holoscan.schedulers import GreedyScheduler
+
+import profiler
+from fusion import fuse_chains
+from profiler import profile_compute
+
+
+@profile_compute
+class TxOp(Operator):
+    def __init__(self, fragment, *args, **kwargs):
+        self.index = 0
+        super().__init__(fragment, *args, **kwargs)
+
+    def setup(self, spec: OperatorSpec):
+        spec.output("out")
+
+    def compute(self, op_input, op_output, context):
+        op_output.emit(self.index, "out")
+        self.index += 1
+
+
+@profile_compute
+class StageOp(Operator):
+    def setup(self, spec: OperatorSpec):
+        spec.input("in")
+        spec.output("out")
+
+    def compute(self, op_input, op_output, context):
+        op_output.emit(op_input.receive("in") + 1, "out")
+
+
+@profile_compute
+class RxOp(Operator):
+    def __init__(self, fragment, *args, **kwargs):
+        self.received = 0
+        self.last = None
+        super().__init__(fragment, *args, **kwargs)
+
+    def setup(self, spec: OperatorSpec):
+        spec.input("in")
+
+    def compute(self, op_input, op_output, context):
+        self.last = op_input.receive("in")
+        self.received += 1
+
+
+class ChainApp(Application):
+    def __init__(self, *args, count=10000, stages=4, **kwargs):
+        self.count = count
+        self.stages = stages
+        super().__init__(*args, **kwargs)
+
+    def compose(self):
+        ops = [TxOp(self, CountCondition(self, self.count), name="tx")]
+        ops += [StageOp(self, name=f"stage{n}") for n in range(self.stages)]
+        self.rx = RxOp(self, name="rx")
+        ops.append(self.rx)
+        for upstream, downstream in zip(ops, ops[1:]):
+            self.add_flow(upstream, downstream)
+
+
+def run(app_class, count, stages):
+    app = app_class(count=count, stages=stages)
+    app.config("")
+    app.scheduler(GreedyScheduler(app, name="greedy_scheduler"))
+    start = time.perf_counter()
+    app.run()
+    elapsed = time.perf_counter() - start
+    if app.rx.received != count or app.rx.last != count - 1 + stages:
+        raise RuntimeError(f"received {app.rx.received} messages, last value {app.rx.last}")
+    return count / elapsed, getattr(app, "fused_ops", [])
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Benchmark compose-time fusion of operator chains")
+    parser.add_argument("-c", "--count", type=int, default=10000, help="Messages sent.")
+    parser.add_argument("-k", "--stages", type=int, default=4, help="Operators between tx and rx.")
+    parser.add_argument("--trace", default="", help="Write a Chrome trace of the fused run to this path.")
+    args = parser.parse_args()
+
+    plain, _ = run(ChainApp, args.count, args.stages)
+    if args.trace:
+        profiler.enable(args.trace)
+    fused, fused_ops = run(fuse_chains(ChainApp), args.count, args.stages)
+
+    print(f"tx -> {args.stages} stages -> rx, {args.count} messages, GreedyScheduler")
+    print(f"{'plain':>8}: {plain:>10.0f} msg/s")
+    print(f"{'fused':>8}: {fused:>10.0f} msg/s ({fused / plain:.2f}x)")
+    for op in fused_ops:
+        print(f"fused operator: {op.name}")
+    if args.trace:
+        for name, stats in sorted(profiler.summary().items()):
+            print(f"{name:>10}: {stats['calls']} calls, {stats['wall_ms'] * 1e3:.1f} us")
@@ -0,0 +1,179 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+# Batch throughput of one ParallelMapOp against one operator per branch.
+#
+# Both applications do the same work per tick: `num_items` independent
+# items, each taking `delay + delay_step * n` seconds (a sleep, like
+# DelayOp, so that it releases the GIL the way NumPy or I/O work would).
+#
+#   branches: ParallelPingApp of tracker_and_schedulers.py, one DelayOp per
+#             item, run by the MultiThreadScheduler with `threads` workers
+#   map:      tx -> DelayMapOp -> rx, run by the GreedyScheduler, the items
+#             mapped by the scheduler thread and a WorkStealingPool of
+#             `threads - 1` workers
+#
+#   python benchmark_parallel_map.py                  # 32 items, 8 threads
+#   python benchmark_parallel_map.py -n 256 -d 0.001 --delay_step 0.00001
+#   python benchmark_parallel_map.py --chunk_size 4
+
+import time
+from argparse import ArgumentParser
+
+from holoscan.conditions import CountCondition
+from holoscan.core import Application, Operator, OperatorSpec
+from holoscan.schedulers import GreedyScheduler, MultiThreadScheduler
+
+from parallel_map import ParallelMapOp, WorkStealingPool
+from parallel_ping import ParallelPingApp
+
+
+class BatchTxOp(Operator):
+    def __init__(self, fragment, *args, num_items=32, **kwargs):
+        self.num_items = num_items
+        super().__init__(fragment, *args, **kwargs)
+
+    def setup(self, spec: OperatorSpec):
+        spec.output("out")
+
+    def compute(self, op_input, op_output, context):
+        op_output.emit(list(range(self.num_items)), "out")
+
+
+class DelayMapOp(ParallelMapOp):
+    """DelayOp applied to every item of a batch: item n sleeps
+    `delay + delay_step * n` seconds and is incremented by n."""
+
+    def __init__(self, fragment, *args, delay=0.1, delay_step=0.0, **kwargs):
+        self.delay = delay
+        self.delay_step = delay_step
+        super().__init__(fragment, *args, **kwargs)
+
+    def process(self, item):
+        time.sleep(self.delay + self.delay_step * item)
+        return item + item
+
+
+class BatchRxOp(Operator):
+    def __init__(self, fragment, *args, **kwargs):
+        self.received = 0
+        self.last = None
+        super().__init__(fragment, *args, **kwargs)
+
+    def setup(self, spec: OperatorSpec):
+        spec.input("in")
+
+    def compute(self, op_input, op_output, context):
+        self.last = op_input.receive("in")
+        self.received += 1
+
+
+class MapApp(Application):
+    def __init__(
+        self, *args, num_items=32, delay=0.1, delay_step=0.0, count=1, pool=None, chunk_size="auto", **kwargs
+    ):
+        self.num_items = num_items
+        self.delay = delay
+        self.delay_step = delay_step
+        self.count = count
+        self.pool = pool
+        self.chunk_size = chunk_size
+        super().__init__(*args, **kwargs)
+
+    def compose(self):
+        tx = BatchTxOp(self, CountCondition(self, self.count), num_items=self.num_items, name="tx")
+        delay = DelayMapOp(
+            self,
+            delay=self.delay,
+            delay_step=self.delay_step,
+            pool=self.pool,
+            chunk_size=self.chunk_size,
+            name="delay_map",
+        )
+        self.rx = BatchRxOp(self, name="rx")
+        self.add_flow(tx, delay)
+        self.add_flow(delay, self.rx)
+
+
+def run_branches(args):
+    app = ParallelPingApp(
+        num_delays=args.num_items, delay=args.delay, delay_step=args.delay_step, count=args.count
+    )
+    app.config("")
+    app.scheduler(
+        MultiThreadScheduler(
+            app,
+            worker_thread_number=args.threads,
+            stop_on_deadlock=True,
+            stop_on_deadlock_timeout=500,
+            name="multithread_scheduler",
+        )
+    )
+    start = time.perf_counter()
+    app.run()
+    return args.count / (time.perf_counter() - start)
+
+
+def run_map(args):
+    chunk_size = args.chunk_size if args.chunk_size == "auto" else int(args.chunk_size)
+    app = MapApp(
+        num_items=args.num_items,
+        delay=args.delay,
+        delay_step=args.delay_step,
+        count=args.count,
+        # The scheduler thread works on the batch too while it waits
+        pool=WorkStealingPool(max(1, args.threads - 1)),
+        chunk_size=chunk_size,
+    )
+    app.config("")
+    app.scheduler(GreedyScheduler(app, name="greedy_scheduler"))
+    start = time.perf_counter()
+    app.run()
+    elapsed = time.perf_counter() - start
+    if app.rx.received != args.count or app.rx.last != [n + n for n in range(args.num_items)]:
+        raise RuntimeError(f"received {app.rx.received} batches, last {app.rx.last}")
+    return args.count / elapsed
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Benchmark ParallelMapOp against one operator per branch")
+    parser.add_argument("-n", "--num_items", type=int, default=32, help="Items per tick.")
+    parser.add_argument("-d", "--delay", type=float, default=0.01, help="Base time per item in s.")
+    parser.add_argument("--delay_step", type=float, default=0.001, help="Extra s per item index.")
+    parser.add_argument("-c", "--count", type=int, default=20, help="Number of ticks.")
+    parser.add_argument("-t", "--threads", type=int, default=8, help="Worker threads.")
+    parser.add_argument("--chunk_size", default="auto", help="Items per map task, or 'auto'.")
+    parser.add_argument("--skip_branches", action="store_true", help="Only run the map.")
+    args = parser.parse_args()
+    if args.num_items < 1 or args.count < 1 or args.threads < 1:
+        parser.error("num_items, count and threads must be >= 1")
+    if args.chunk_size != "auto" and (not args.chunk_size.isdigit() or int(args.chunk_size) < 1):
+        parser.error("chunk_size must be 'auto' or a positive integer")
+
+    work = sum(args.delay + args.delay_step * n for n in range(args.num_items))
+    print(f"{args.num_items} items, {work * 1e3:.1f} ms of work per tick, {args.threads} threads")
+    print(f"{'ideal':>9}: {args.threads / work:>8.2f} ticks/s")
+    if not args.skip_branches:
+        branches = run_branches(args)
+        print(f"{'branches':>9}: {branches:>8.2f} ticks/s")
+    parallel = run_map(args)
+    print(f"{'map':>9}: {parallel:>8.2f} ticks/s", end="")
+    print("" if args.skip_branches else f" ({parallel / branches:.2f}x)")
@@ -0,0 +1,303 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+# Compose-time fusion of linear chains of Python operators.
+#
+# Every connection costs a scheduler hop, a queue push and pop and condition
+# checks for each message, which dominates when the operators themselves only
+# take microseconds. `fuse_chains(AppClass)` returns a subclass of the
+# application whose compose() records the add_flow() calls, finds chains of
+# Python operators where each link is the only connection out of the upstream
+# operator and into the downstream one, and replaces each chain by a
+# `FusedChainOp` that calls the compute() of every stage in turn, handing
+# messages over in memory:
+#
+#   app = fuse_chains(MyPingApp)()
+#
+# Chains never start with a source operator (an operator without inputs),
+# which typically carries the application's CountCondition, nor include
+# operators with conditions of their own. The stage operators stay in the
+# graph, so that they are initialized, started and stopped as usual, but a
+# disabled BooleanCondition keeps the scheduler from ticking them. Since
+# stages are called through their own compute(), profiler.py still records
+# each of them under its own name.
+
+import inspect
+from collections import deque
+
+from holoscan.conditions import BooleanCondition
+from holoscan.core import Operator, OperatorSpec
+
+
+def _is_python_operator(op):
+    return isinstance(op, Operator) and inspect.isfunction(getattr(type(op), "compute", None))
+
+
+def _ports(op, kind):
+    """Names of the input or output ports declared by `op`, None if unknown."""
+    ports = getattr(getattr(op, "spec", None), kind, None)
+    return None if ports is None else list(ports)
+
+
+def _has_conditions(op):
+    conditions = getattr(op, "conditions", None)
+    return bool(conditions) and len(conditions) > 0
+
+
+class _MemoryInput:
+    """`op_input` of a fused stage, reading from in-memory queues."""
+
+    __slots__ = ("queues", "receivers")
+
+    def __init__(self, queues, receivers):
+        self.queues = queues
+        # Ports of kind "receivers", number of connections
+        self.receivers = receivers
+
+    def receive(self, port):
+        queue = self.queues.get(port)
+        if not queue:
+            return None
+        if port in self.receivers:
+            return [queue.popleft() for _ in range(min(len(queue), self.receivers[port]))]
+        return queue.popleft()
+
+
+class _MemoryOutput:
+    """`op_output` of a fused stage, collecting the emitted messages."""
+
+    __slots__ = ("messages",)
+
+    def __init__(self):
+        self.messages = []
+
+    def emit(self, value, port="", *args, **kwargs):
+        self.messages.append((port, value))
+
+
+class FusedChainOp(Operator):
+    """Run a chain of Python operators as a single operator.
+
+    The fused operator exposes the external input ports of the first stage
+    and the external output ports of the last stage, under the same names.
+
+    Parameters
+    ----------
+    stages : list of Operator
+        Operators of the chain, in order.
+    links : list of set of (output port, input port)
+        Connections between consecutive stages.
+    inputs : dict
+        External input ports of the first stage: {port: number of
+        connections, or None for a regular input port}.
+    outputs : list of str
+        External output ports of the last stage.
+    """
+
+    def __init__(self, fragment, *args, stages, links, inputs, outputs, **kwargs):
+        self.stages = stages
+        self.links = links
+        self.inputs = inputs
+        self.outputs = outputs
+        # Messages waiting for each stage after the first
+        self.queues = [{} for _ in stages]
+        self.receivers = [{} for _ in stages]
+        for i, link in enumerate(links):
+            declared = _ports(stages[i + 1], "inputs")
+            for _, in_port in link:
+                self.queues[i + 1][in_port] = deque()
+                if declared is not None and in_port in declared:
+                    continue
+                # Not a regular input port: a "receivers" parameter, which
+                # gets one message per connection
+                self.receivers[i + 1][in_port] = self.receivers[i + 1].get(in_port, 0) + 1
+
+        # Need to call the base class constructor last
+        super().__init__(fragment, *args, **kwargs)
+
+    def setup(self, spec: OperatorSpec):
+        for port, connections in self.inputs.items():
+            if connections is None:
+                spec.input(port)
+            else:
+                spec.param(port, kind="receivers")
+        for port in self.outputs:
+            spec.output(port)
+
+    def _ready(self, i):
+        receivers = self.receivers[i]
+        return all(
+            len(queue) >= receivers.get(port, 1) for port, queue in self.queues[i].items()
+        )
+
+    def compute(self, op_input, op_output, context):
+        last = len(self.stages) - 1
+        # Depth first, so that a message goes through the whole chain before
+        # the next one is handled
+        pending = [0]
+        while pending:
+            i = pending.pop()
+            stage = self.stages[i]
+            stage_input = op_input if i == 0 else _MemoryInput(self.queues[i], self.receivers[i])
+            stage_output = _MemoryOutput()
+            stage.compute(stage_input, stage_output, context)
+
+            # Run the stage again after its successors if more messages are
+            # waiting for it
+            if i > 0 and self._ready(i):
+                pending.append(i)
+            if i == last:
+                for port, value in stage_output.messages:
+                    op_output.emit(value, port)
+                continue
+            queues = self.queues[i + 1]
+            for port, value in stage_output.messages:
+                for out_port, in_port in self.links[i]:
+                    if out_port == port:
+                        queues[in_port].append(value)
+            if self._ready(i + 1):
+                pending.append(i + 1)
+
+
+def _resolve(op, port, kind):
+    """Actual name of `port`, an empty name standing for the only port."""
+    if port:
+        return port
+    ports = _ports(op, kind)
+    return ports[0] if ports is not None and len(ports) == 1 else None
+
+
+def _find_chains(flows):
+    """Chains of fusable operators in the recorded flows."""
+    downstream, upstream = {}, {}
+    ops = {}
+    for u, v, _ in flows:
+        ops[id(u)], ops[id(v)] = u, v
+        downstream.setdefault(id(u), set()).add(id(v))
+        upstream.setdefault(id(v), set()).add(id(u))
+
+    def fusable(u, v):
+        # The only connection out of u and into v, between Python operators
+        # that are not sources and have no conditions of their own
+        return (
+            downstream.get(id(u)) == {id(v)}
+            and upstream.get(id(v)) == {id(u)}
+            and all(_is_python_operator(op) and not _has_conditions(op) for op in (u, v))
+            and id(u) in upstream
+        )
+
+    chains = []
+    for key, op in ops.items():
+        preds = upstream.get(key, set())
+        if len(preds) == 1 and fusable(ops[next(iter(preds))], op):
+            # Not the start of a chain
+            continue
+        chain = [op]
+        while len(downstream.get(id(chain[-1]), ())) == 1:
+            nxt = ops[next(iter(downstream[id(chain[-1])]))]
+            if not fusable(chain[-1], nxt):
+                break
+            chain.append(nxt)
+        if len(chain) > 1:
+            chains.append(chain)
+    return chains
+
+
+def fuse_chains(app_class):
+    """Subclass of `app_class` whose linear operator chains are fused."""
+
+    class FusedApp(app_class):
+        def add_flow(self, upstream, downstream, port_pairs=None):
+            self._flows.append((upstream, downstream, port_pairs))
+
+        def compose(self):
+            self._flows = []
+            super().compose()
+            flows = []
+            for u, v, pairs in self._flows:
+                resolved = {
+                    (_resolve(u, out, "outputs"), _resolve(v, inp, "inputs"))
+                    for out, inp in (pairs or {("", "")})
+                }
+                flows.append((u, v, pairs, resolved))
+
+            # Chains with connections whose port names cannot be resolved
+            # are left alone
+            chains = []
+            for chain in _find_chains([(u, v, resolved) for u, v, _, resolved in flows]):
+                ids = {id(op) for op in chain}
+                if all(
+                    None not in pair
+                    for u, v, _, resolved in flows
+                    if id(u) in ids or id(v) in ids
+                    for pair in resolved
+                ):
+                    chains.append(chain)
+            self.fused_ops = []
+            replaced = {}
+            for chain in chains:
+                head, tail = chain[0], chain[-1]
+                links = [
+                    next(resolved for u, v, _, resolved in flows if u is a and v is b)
+                    for a, b in zip(chain, chain[1:])
+                ]
+                inputs, outputs = {}, []
+                declared = _ports(head, "inputs")
+                for u, v, _, resolved in flows:
+                    if v is head:
+                        for _, port in resolved:
+                            if declared is not None and port in declared:
+                                inputs[port] = None
+                            else:
+                                inputs[port] = (inputs.get(port) or 0) + 1
+                    if u is tail:
+                        outputs.extend(port for port, _ in resolved if port not in outputs)
+                fused = FusedChainOp(
+                    self,
+                    stages=chain,
+                    links=links,
+                    inputs=inputs,
+                    outputs=outputs,
+                    name="+".join(op.name for op in chain),
+                )
+                self.fused_ops.append(fused)
+                for op in chain:
+                    replaced[id(op)] = (fused, op is head, op is tail)
+                    # Initialized, started and stopped with the app, but
+                    # never scheduled
+                    op.add_arg(BooleanCondition(self, enable_tick=False, name=f"{op.name}_fused"))
+                    self.add_operator(op)
+
+            for u, v, pairs, resolved in flows:
+                fu, _, u_is_tail = replaced.get(id(u), (u, False, True))
+                fv, v_is_head, _ = replaced.get(id(v), (v, True, False))
+                if fu is fv:
+                    # Inside a fused chain
+                    continue
+                if not (u_is_tail and v_is_head):
+                    raise RuntimeError(f"cannot reconnect {u.name} -> {v.name} after fusion")
+                if fu is u and fv is v:
+                    app_class.add_flow(self, u, v, *([pairs] if pairs is not None else []))
+                else:
+                    app_class.add_flow(self, fu, fv, resolved)
+
+    FusedApp.__name__ = FusedApp.__qualname__ = f"Fused{app_class.__name__}"
+    return FusedApp
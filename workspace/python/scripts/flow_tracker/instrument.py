@@ -0,0 +1,142 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+
+# Chained compute() instrumentation shared by profiler.py,
+# memory_accounting.py and ../tao_peoplenet/metrics.py.
+#
+# Each tool owns an `Instrument`: a list of registered operator classes and a
+# function wrapping their compute(). Several tools may be enabled at once,
+# their wrappers then stack on the same compute(). Disabling a tool removes
+# its own layer only: the chain of each class is rebuilt from the original
+# compute() and the layers of the tools still enabled.
+
+import threading
+
+_lock = threading.Lock()
+
+# Operator class -> (compute() defined by the class or None, enabled instruments)
+_chains = {}
+
+
+class Instrument:
+    """Wrap the compute() of registered Operator subclasses while enabled.
+
+    `wrap(compute)` returns the function replacing `compute`, called as
+    `compute(self, op_input, op_output, context)`.
+    """
+
+    def __init__(self, wrap):
+        self.wrap = wrap
+        self.classes = []
+        self.enabled = False
+
+    def register(self, cls):
+        """Register `cls`, instrumented right away if enabled. Returns `cls`."""
+        with _lock:
+            if cls not in self.classes:
+                self.classes.append(cls)
+                if self.enabled:
+                    _push(cls, self)
+        return cls
+
+    def enable(self):
+        with _lock:
+            if not self.enabled:
+                self.enabled = True
+                for cls in self.classes:
+                    _push(cls, self)
+
+    def disable(self):
+        with _lock:
+            if self.enabled:
+                self.enabled = False
+                for cls in self.classes:
+                    _pop(cls, self)
+
+
+def _push(cls, instrument):
+    original, layers = _chains.setdefault(cls, (cls.__dict__.get("compute"), []))
+    if instrument in layers:
+        return
+    if original is None and any(
+        instrument in _chains.get(base, (None, ()))[1] for base in cls.__mro__[1:]
+    ):
+        # compute() is inherited from a class already wrapped by this tool
+        if not layers:
+            del _chains[cls]
+        return
+    layers.append(instrument)
+    _relink(cls)
+
+
+def _pop(cls, instrument):
+    chain = _chains.get(cls)
+    if chain is not None and instrument in chain[1]:
+        chain[1].remove(instrument)
+        _relink(cls)
+
+
+def _relink(cls):
+    original, layers = _chains[cls]
+    if not layers:
+        del _chains[cls]
+        if original is not None:
+            cls.compute = original
+        elif "compute" in cls.__dict__:
+            # compute() was inherited, drop the override
+            del cls.compute
+        return
+    compute = original if original is not None else _inherited(cls)
+    for instrument in layers:
+        wrapped = instrument.wrap(compute)
+        wrapped.__wrapped__ = compute
+        wrapped.__name__ = "compute"
+        compute = wrapped
+    cls.compute = compute
+
+
+def _inherited(cls):
+    # Looked up on each call, so that the base class may be rewrapped later
+    def compute(self, op_input, op_output, context):
+        return super(cls, self).compute(op_input, op_output, context)
+
+    return compute
+
+
+class CountingInput:
+    """Wrap `op_input` to count the messages received on each port in `counts`."""
+
+    __slots__ = ("op_input", "counts")
+
+    def __init__(self, op_input, counts):
+        self.op_input = op_input
+        self.counts = counts
+
+    def receive(self, port, *args, **kwargs):
+        value = self.op_input.receive(port, *args, **kwargs)
+        if value is not None:
+            n = len(value) if isinstance(value, (list, tuple)) else 1
+            self.counts[port] = self.counts.get(port, 0) + n
+        return value
+
+    def __getattr__(self, name):
+        return getattr(self.op_input, name)
@@ -0,0 +1,218 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+# Opt-in per-operator memory and allocation accounting.
+#
+# Decorate Python operators with `@account_memory` and call `enable()` before
+# `app.run()`. Around sampled compute() calls:
+#   * host memory is measured with tracemalloc: the transient peak above the
+#     memory in use before the call, the bytes still held after it and the
+#     number of new blocks still alive;
+#   * device memory is measured by routing CuPy allocations through a
+#     counting allocator on top of the default memory pool, which sees every
+#     allocation made by the calling thread and the pool usage each of them
+#     reaches; the highest is the operator's pool peak.
+# `report()` prints peaks and per-tick averages for each operator.
+#
+# tracemalloc is process-wide: run with the GreedyScheduler for exact host
+# attribution. Device counters are per thread and exact with any scheduler.
+# `enable(device=False)` measures host memory only, e.g. to find the
+# allocation hot spots of the NumPy path on a machine without a GPU.
+#
+# The PeopleNet operators are registered; turn accounting on with the
+# "memory_accounting" block of ../tao_peoplenet/tao_peoplenet.yaml.
+
+import atexit
+import threading
+import tracemalloc
+
+from instrument import Instrument
+
+_lock = threading.Lock()
+_stats = {}
+_local = threading.local()
+
+_enabled = False
+_sample_every = 1
+_snapshots = False
+_pool = None
+# CuPy, imported by enable() when device memory is accounted
+_cupy = None
+
+
+class _OperatorStats:
+    __slots__ = (
+        "calls",
+        "samples",
+        "host_peak",
+        "host_peak_sum",
+        "host_retained_sum",
+        "host_blocks_sum",
+        "device_allocs_sum",
+        "device_bytes_sum",
+        "device_peak",
+    )
+
+    def __init__(self):
+        for name in self.__slots__:
+            setattr(self, name, 0)
+
+
+def _wrap(compute):
+    def accounted_compute(self, op_input, op_output, context):
+        stats = _stats.get(self.name)
+        if stats is None:
+            stats = _stats.setdefault(self.name, _OperatorStats())
+        stats.calls += 1
+        if (stats.calls - 1) % _sample_every:
+            return compute(self, op_input, op_output, context)
+
+        before = tracemalloc.take_snapshot() if _snapshots else None
+        tracemalloc.reset_peak()
+        current, _ = tracemalloc.get_traced_memory()
+        _local.device_allocs = 0
+        _local.device_bytes = 0
+        _local.device_peak = 0
+        try:
+            return compute(self, op_input, op_output, context)
+        finally:
+            after_current, after_peak = tracemalloc.get_traced_memory()
+            host_peak = after_peak - current
+            stats.samples += 1
+            stats.host_peak = max(stats.host_peak, host_peak)
+            stats.host_peak_sum += host_peak
+            stats.host_retained_sum += after_current - current
+            if before is not None:
+                diff = tracemalloc.take_snapshot().compare_to(before, "filename")
+                stats.host_blocks_sum += sum(max(0, stat.count_diff) for stat in diff)
+            stats.device_allocs_sum += _local.device_allocs
+            stats.device_bytes_sum += _local.device_bytes
+            stats.device_peak = max(stats.device_peak, _local.device_peak)
+
+    return accounted_compute
+
+
+_instrument = Instrument(_wrap)
+
+
+def account_memory(cls):
+    """Class decorator registering an Operator subclass for accounting."""
+    return _instrument.register(cls)
+
+
+class _CountingPool:
+    """CuPy allocator counting allocations on top of a memory pool."""
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    def malloc(self, size):
+        memory = self.pool.malloc(size)
+        _local.device_allocs = getattr(_local, "device_allocs", 0) + 1
+        _local.device_bytes = getattr(_local, "device_bytes", 0) + size
+        # Pool usage right after an allocation of the calling thread, reset
+        # before each sampled compute()
+        used = self.pool.used_bytes()
+        if used > getattr(_local, "device_peak", 0):
+            _local.device_peak = used
+        return memory
+
+
+def enable(sample_every=1, snapshots=False, device=True, report_at_exit=True):
+    """Start accounting for decorated operators.
+
+    Only every `sample_every`-th call of each operator is measured. With
+    `snapshots=True` the number of new host blocks is counted as well, which
+    takes a tracemalloc snapshot before and after each sampled call and is
+    much slower. `device=False` (or no CuPy) measures host memory only.
+    """
+    global _enabled, _sample_every, _snapshots, _pool, _cupy
+    with _lock:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _sample_every = max(1, int(sample_every))
+        _snapshots = snapshots
+        if device and _pool is None:
+            try:
+                import cupy as cp
+            except ImportError:
+                cp = None
+            if cp is not None:
+                _cupy = cp
+                _pool = _CountingPool(cp.get_default_memory_pool())
+                cp.cuda.set_allocator(_pool.malloc)
+        if report_at_exit and not _enabled:
+            atexit.register(report)
+        _enabled = True
+    _instrument.enable()
+
+
+def disable():
+    """Stop accounting and restore the original compute() methods."""
+    global _enabled, _pool
+    _instrument.disable()
+    with _lock:
+        _enabled = False
+        if _pool is not None:
+            _cupy.cuda.set_allocator(_pool.pool.malloc)
+            _pool = None
+
+
+def results():
+    """Per-operator accounting, averages are per sampled tick."""
+    out = {}
+    for name, stats in list(_stats.items()):
+        n = max(1, stats.samples)
+        out[name] = {
+            "calls": stats.calls,
+            "samples": stats.samples,
+            "host_peak_bytes": stats.host_peak,
+            "host_peak_bytes_per_tick": stats.host_peak_sum / n,
+            "host_retained_bytes_per_tick": stats.host_retained_sum / n,
+            "host_new_blocks_per_tick": stats.host_blocks_sum / n if _snapshots else None,
+            "device_allocs_per_tick": stats.device_allocs_sum / n,
+            "device_bytes_per_tick": stats.device_bytes_sum / n,
+            "device_pool_peak_bytes": stats.device_peak,
+        }
+    return out
+
+
+def report():
+    """Print the accounting table, operators with the largest peaks first."""
+    rows = sorted(
+        results().items(),
+        key=lambda item: (item[1]["device_pool_peak_bytes"], item[1]["host_peak_bytes"]),
+        reverse=True,
+    )
+    if not rows:
+        return
+    print(
+        f"{'operator':>20} {'calls':>7} {'host peak':>11} {'host/tick':>11} {'kept/tick':>11}"
+        f" {'blocks':>7} {'dev allocs':>10} {'dev B/tick':>12} {'pool peak':>12}"
+    )
+    for name, r in rows:
+        blocks = r["host_new_blocks_per_tick"]
+        print(
+            f"{name:>20} {r['calls']:>7} {r['host_peak_bytes']:>11} "
+            f"{r['host_peak_bytes_per_tick']:>11.0f} {r['host_retained_bytes_per_tick']:>11.0f} "
+            f"{'-' if blocks is None else f'{blocks:.1f}':>7} {r['device_allocs_per_tick']:>10.1f} {r['device_bytes_per_tick']:>12.0f} "
+            f"{r['device_pool_peak_bytes']:>12}"
+        )
@@ -0,0 +1,249 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+# Parallel map inside one operator, on a shared work-stealing thread pool.
+#
+# `ParallelMapOp` receives a batch (any sequence) on "in", applies
+# `process()` to every item on the process-wide pool returned by
+# `shared_pool()` and emits the list of results, in input order, on "out":
+#
+#   class DetectOp(ParallelMapOp):
+#       def process(self, tile):
+#           return detect(tile)
+#
+# The batch is cut into chunks spread over the workers' deques. Each worker
+# takes work from the back of its own deque and, when it runs dry, steals
+# from the front of the others', so an uneven batch still keeps every worker
+# busy. The calling thread (the scheduler's) works on chunks too while it
+# waits. With chunk_size="auto", chunks are sized from the measured cost per
+# item so that each one takes about `target_chunk_s`, with at least two
+# chunks per worker.
+#
+# Python threads share the GIL: process() only runs in parallel when it
+# spends its time in code that releases it (NumPy, CuPy, I/O, sleeping).
+# The pool size defaults to the number of CPUs and can be set with the
+# PARALLEL_MAP_THREADS environment variable.
+
+import math
+import os
+import threading
+import time
+from collections import deque
+
+from holoscan.core import Operator, OperatorSpec
+
+
+class _Job:
+    __slots__ = ("fn", "items", "results", "remaining", "busy", "error", "lock", "done")
+
+    def __init__(self, fn, items, chunks):
+        self.fn = fn
+        self.items = items
+        self.results = [None] * len(items)
+        self.remaining = chunks
+        self.busy = 0.0
+        self.error = None
+        self.lock = threading.Lock()
+        self.done = threading.Event()
+
+    def run(self, start, end):
+        begin = time.perf_counter()
+        try:
+            if self.error is None:
+                fn, items = self.fn, self.items
+                self.results[start:end] = [fn(items[i]) for i in range(start, end)]
+        except BaseException as e:
+            self.error = e
+        with self.lock:
+            self.busy += time.perf_counter() - begin
+            self.remaining -= 1
+            if self.remaining == 0:
+                self.done.set()
+
+
+class WorkStealingPool:
+    """Thread pool with one deque per worker and work stealing."""
+
+    def __init__(self, num_workers=None):
+        self.num_workers = max(1, num_workers or os.cpu_count() or 1)
+        self.deques = [deque() for _ in range(self.num_workers)]
+        self.cond = threading.Condition()
+        self.next = 0
+        self.threads = [
+            threading.Thread(target=self._worker, args=(i,), name=f"parallel_map_{i}", daemon=True)
+            for i in range(self.num_workers)
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def _take(self, index):
+        """A task from deque `index` (newest first), else stolen (oldest first)."""
+        n = self.num_workers
+        if index is not None:
+            try:
+                return self.deques[index].pop()
+            except IndexError:
+                pass
+        first = 0 if index is None else index + 1
+        for k in range(n):
+            try:
+                return self.deques[(first + k) % n].popleft()
+            except IndexError:
+                continue
+        return None
+
+    def _worker(self, index):
+        while True:
+            task = self._take(index)
+            if task is None:
+                with self.cond:
+                    # Tasks are pushed with the lock held, so none can be
+                    # missed between this check and wait()
+                    task = self._take(index)
+                    if task is None:
+                        self.cond.wait()
+                        continue
+            task[0].run(task[1], task[2])
+
+    def map(self, fn, items, chunk_size=1):
+        """[fn(item) for item in items], computed on the pool.
+
+        Returns the results and the total time spent in `fn`, in seconds.
+        """
+        n = len(items)
+        if n == 0:
+            return [], 0.0
+        chunk_size = max(1, int(chunk_size))
+        bounds = [(start, min(start + chunk_size, n)) for start in range(0, n, chunk_size)]
+        job = _Job(fn, items, len(bounds))
+        with self.cond:
+            # Round robin from a moving start, so that small batches do not
+            # all land on the first worker
+            for k, (start, end) in enumerate(bounds):
+                self.deques[(self.next + k) % self.num_workers].append((job, start, end))
+            self.next = (self.next + len(bounds)) % self.num_workers
+            self.cond.notify(len(bounds))
+
+        # Help instead of blocking, until the last chunk is finished
+        while not job.done.is_set():
+            task = self._take(None)
+            if task is None:
+                job.done.wait()
+            else:
+                task[0].run(task[1], task[2])
+        if job.error is not None:
+            raise job.error
+        return job.results, job.busy
+
+
+_shared_pool = None
+_shared_lock = threading.Lock()
+
+
+def shared_pool():
+    """The process-wide pool, created on first use."""
+    global _shared_pool
+    with _shared_lock:
+        if _shared_pool is None:
+            threads = os.environ.get("PARALLEL_MAP_THREADS")
+            _shared_pool = WorkStealingPool(int(threads) if threads else None)
+        return _shared_pool
+
+
+class ChunkTuner:
+    """Chunk size giving chunks of about `target_s` seconds."""
+
+    def __init__(self, target_s=0.5e-3, smoothing=0.2):
+        self.target_s = target_s
+        self.smoothing = smoothing
+        # Exponential moving average of the time per item
+        self.item_s = None
+
+    def chunk_size(self, n, num_workers):
+        # At least two chunks per worker, so that stealing can balance them
+        largest = max(1, math.ceil(n / (2 * num_workers)))
+        if self.item_s is None:
+            return max(1, n // (4 * num_workers))
+        return min(largest, max(1, int(self.target_s / max(self.item_s, 1e-9))))
+
+    def update(self, busy, n):
+        if n:
+            item_s = busy / n
+            if self.item_s is None:
+                self.item_s = item_s
+            else:
+                self.item_s += self.smoothing * (item_s - self.item_s)
+
+
+class ParallelMapOp(Operator):
+    """Base class of operators mapping `process()` over a batch in parallel.
+
+    **==Named Inputs==**
+
+        in : sequence
+            Batch of independent items.
+
+    **==Named Outputs==**
+
+        out : list
+            `process(item)` for each item, in input order.
+
+    Parameters
+    ----------
+    chunk_size : int or "auto"
+        Items per task. "auto" tunes it from the measured cost per item.
+    pool : WorkStealingPool
+        Pool to run on, by default `shared_pool()`.
+    target_chunk_s : float
+        Duration of a chunk aimed at by the "auto" chunk size.
+    """
+
+    def __init__(
+        self, fragment, *args, chunk_size="auto", pool=None, target_chunk_s=0.5e-3, **kwargs
+    ):
+        if chunk_size != "auto" and int(chunk_size) < 1:
+            raise ValueError("chunk_size must be 'auto' or >= 1")
+        self.chunk_size = chunk_size
+        self.pool = pool
+        self.tuner = ChunkTuner(target_chunk_s)
+
+        # Need to call the base class constructor last
+        super().__init__(fragment, *args, **kwargs)
+
+    def setup(self, spec: OperatorSpec):
+        spec.input("in")
+        spec.output("out")
+
+    def process(self, item):
+        raise NotImplementedError
+
+    def map(self, items):
+        pool = self.pool or shared_pool()
+        if self.chunk_size == "auto":
+            chunk_size = self.tuner.chunk_size(len(items), pool.num_workers)
+        else:
+            chunk_size = self.chunk_size
+        results, busy = pool.map(self.process, items, chunk_size)
+        self.tuner.update(busy, len(items))
+        return results
+
+    def compute(self, op_input, op_output, context):
+        op_output.emit(self.map(op_input.receive("in")), "out")
@@ -0,0 +1,158 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+
+# Operators and application of tracker_and_schedulers.py: a transmitter
+# fanning out to `num_delays` DelayOps running in parallel, all joined by
+# one receiver. They live in their own module so that the script can parse
+# its arguments (and answer --help) before loading the Holoscan bindings.
+
+import time
+
+from holoscan.conditions import CountCondition
+from holoscan.core import Application, Operator, OperatorSpec
+
+from profiler import profile_compute
+from trace_context import LatencyHistograms, TraceSampler, receive_traced, traced
+
+
+@profile_compute
+class PingTxOp(Operator):
+    """Simple transmitter operator.
+
+    This operator has:
+        outputs: "out"
+
+    On each tick, it transmits an integer on the "out" port. The transmitted value is incremented
+    with each call to compute. If a `sampler` is given, the messages it samples carry a trace
+    context.
+    """
+
+    def __init__(self, fragment, *args, sampler=None, **kwargs):
+        self.sampler = sampler
+
+        # Need to call the base class constructor last
+        super().__init__(fragment, *args, **kwargs)
+
+    def setup(self, spec: OperatorSpec):
+        spec.output("out")
+
+    def compute(self, op_input, op_output, context):
+        if self.sampler is None:
+            op_output.emit(0, "out")
+        else:
+            op_output.emit(self.sampler.start(0, self.name), "out")
+
+
+@profile_compute
+class DelayOp(Operator):
+    """Example of an operator modifying data.
+
+    This operator waits for a specified delay and then increments the received
+    value by a user-specified integer increment.
+    """
+
+    def __init__(self, fragment, *args, delay=0.25, increment=1, **kwargs):
+        self.delay = delay
+        self.increment = increment
+
+        # Need to call the base class constructor last
+        super().__init__(fragment, *args, **kwargs)
+
+    def setup(self, spec: OperatorSpec):
+        spec.input("in")
+        spec.output("out_name")
+        spec.output("out_val")
+
+    def compute(self, op_input, op_output, context):
+        value, trace = receive_traced(op_input, "in", self.name)
+        # print(f"{self.name}: now waiting {self.delay:0.3f} s")
+        time.sleep(self.delay)
+        # print(f"{self.name}: finished waiting")
+        new_value = value + self.increment
+        # print(f"{self.name}: sending new value ({new_value})")
+        op_output.emit(self.name, "out_name")
+        op_output.emit(traced(new_value, trace), "out_val")
+
+
+@profile_compute
+class PingRxOp(Operator):
+    """Simple (multi)-receiver operator.
+
+    This is an example of a native operator that can dynamically have any
+    number of inputs connected to is "receivers" port. Traced messages are
+    aggregated into `histograms`.
+    """
+
+    def __init__(self, fragment, *args, histograms=None, **kwargs):
+        self.histograms = histograms or LatencyHistograms()
+
+        # Need to call the base class constructor last
+        super().__init__(fragment, *args, **kwargs)
+
+    def setup(self, spec: OperatorSpec):
+        spec.param("names", kind="receivers")
+        spec.param("values", kind="receivers")
+
+    def compute(self, op_input, op_output, context):
+        # In this case, nothing will be printed until all messages have
+        # been received.
+        names = op_input.receive("names")
+        values = [self.histograms.record(value, self.name) for value in op_input.receive("values")]
+        # print(f"number of received names: {len(names)}")
+        # print(f"number of received values: {len(values)}")
+        # print(f"sum of received values: {sum(values)}")
+
+
+# Application using the operators defined above
+
+
+class ParallelPingApp(Application):
+    def __init__(
+        self, *args, num_delays=8, delay=0.5, delay_step=0.1, count=1, trace_every=0, **kwargs
+    ):
+        self.num_delays = num_delays
+        self.delay = delay
+        self.delay_step = delay_step
+        self.count = count
+        # The sampling period can be changed while the app runs, through
+        # `app.sampler.every` (0 turns tracing off)
+        self.sampler = TraceSampler(every=trace_every)
+        self.histograms = LatencyHistograms()
+        super().__init__(*args, **kwargs)
+
+    def compose(self):
+        # Configure the operators. Here we use CountCondition to terminate
+        # execution after a specific number of messages have been sent.
+        tx = PingTxOp(self, CountCondition(self, self.count), sampler=self.sampler, name="tx")
+        delay_ops = [
+            DelayOp(
+                self,
+                delay=self.delay + self.delay_step * n,
+                increment=n,
+                name=f"delay{n:02d}",
+            )
+            for n in range(self.num_delays)
+        ]
+        rx = PingRxOp(self, histograms=self.histograms, name="rx")
+        for d in delay_ops:
+            self.add_flow(tx, d)
+            self.add_flow(d, rx, {("out_val", "values"), ("out_name", "names")})
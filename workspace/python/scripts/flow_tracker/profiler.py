@@ -0,0 +1,158 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+# Opt-in per-operator compute() profiler with Chrome trace export.
+#
+# Decorate Python operators with `@profile_compute`, then call `enable()`
+# before `app.run()`. Every compute() call is recorded (wall time, thread CPU
+# time, thread id and number of messages received) in a bounded per-thread
+# ring buffer, and the trace is written as Chrome trace JSON at exit, ready to
+# be opened in https://ui.perfetto.dev or chrome://tracing.
+#
+# While disabled, decorated classes keep their original compute(), so the
+# profiler costs nothing.
+
+import atexit
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from instrument import CountingInput, Instrument
+
+_lock = threading.Lock()
+_buffers = []
+_local = threading.local()
+
+_capacity = 100000
+_path = None
+
+
+def _wrap(compute):
+    def profiled_compute(self, op_input, op_output, context):
+        counts = {}
+        wall = time.perf_counter_ns()
+        cpu = time.thread_time_ns()
+        try:
+            return compute(self, CountingInput(op_input, counts), op_output, context)
+        finally:
+            end = time.perf_counter_ns()
+            _buffer().append(
+                (self.name, wall, end - wall, time.thread_time_ns() - cpu, sum(counts.values()))
+            )
+
+    return profiled_compute
+
+
+_instrument = Instrument(_wrap)
+
+
+def profile_compute(cls):
+    """Class decorator registering an Operator subclass for profiling."""
+    return _instrument.register(cls)
+
+
+def _buffer():
+    """Ring buffer of the calling thread, created on first use."""
+    try:
+        return _local.buffer
+    except AttributeError:
+        buffer = deque(maxlen=_capacity)
+        with _lock:
+            _buffers.append((threading.get_native_id(), threading.current_thread().name, buffer))
+        _local.buffer = buffer
+        return buffer
+
+
+def enable(path="trace.json", capacity=100000):
+    """Start profiling decorated operators.
+
+    Each thread keeps the last `capacity` compute() calls. The trace is
+    written to `path` at interpreter exit (pass None to only write it with
+    `write_trace()`).
+    """
+    global _capacity, _path
+    with _lock:
+        _capacity = capacity
+        if path is not None and _path is None:
+            atexit.register(_write_at_exit)
+        _path = path
+    _instrument.enable()
+
+
+def disable():
+    """Stop profiling and restore the original compute() methods."""
+    _instrument.disable()
+
+
+def records():
+    """Return (tid, thread name, operator, start ns, wall ns, cpu ns, messages) tuples."""
+    with _lock:
+        buffers = list(_buffers)
+    return [
+        (tid, thread, *record) for tid, thread, buffer in buffers for record in list(buffer)
+    ]
+
+
+def summary():
+    """Per-operator call count, mean wall time and mean CPU time in ms."""
+    totals = {}
+    for _, _, name, _, wall, cpu, _ in records():
+        calls, wall_sum, cpu_sum = totals.get(name, (0, 0, 0))
+        totals[name] = (calls + 1, wall_sum + wall, cpu_sum + cpu)
+    return {
+        name: {"calls": calls, "wall_ms": wall / calls / 1e6, "cpu_ms": cpu / calls / 1e6}
+        for name, (calls, wall, cpu) in totals.items()
+    }
+
+
+def write_trace(path):
+    """Write the recorded calls as Chrome trace JSON."""
+    pid = os.getpid()
+    events = []
+    threads = {}
+    for tid, thread, name, start, wall, cpu, messages in records():
+        threads[tid] = thread
+        events.append(
+            {
+                "name": name,
+                "cat": "compute",
+                "ph": "X",
+                "ts": start / 1e3,
+                "dur": wall / 1e3,
+                "pid": pid,
+                "tid": tid,
+                "args": {"cpu_ms": cpu / 1e6, "messages": messages},
+            }
+        )
+    for tid, thread in threads.items():
+        events.append(
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": thread}}
+        )
+    with open(path, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+    return len(events) - len(threads)
+
+
+def _write_at_exit():
+    if _path is not None:
+        write_trace(_path)
@@ -0,0 +1,207 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+# Sampled end-to-end latency tracing carried inside messages.
+#
+# Unlike the Data Flow Tracker, which records every message, a source stamps
+# only every Nth message with a trace context. Each operator that handles a
+# traced message appends its name and a timestamp, and a sink aggregates the
+# finished traces into fixed-size per-hop latency histograms, so memory stays
+# bounded however long the application runs. Untraced messages are passed
+# through untouched.
+#
+#   sampler = TraceSampler(every=100)          # in the source
+#   out = sampler.start(value, self.name)
+#
+#   value, trace = receive_traced(op_input, "in", self.name)   # in between
+#   op_output.emit(traced(new_value, trace), "out")
+#
+#   histograms.record(message, self.name)      # in the sink
+#
+# The sampling period can be changed at any time with `sampler.every = n`
+# (0 disables tracing).
+
+import itertools
+import math
+import threading
+import time
+
+
+class TraceContext:
+    """Trace id and the (operator name, timestamp in ns) stamps so far."""
+
+    __slots__ = ("trace_id", "stamps")
+
+    def __init__(self, trace_id, stamps):
+        self.trace_id = trace_id
+        self.stamps = stamps
+
+    def stamped(self, name):
+        # A new context per hop, since a message may fan out to several
+        # operators that stamp it concurrently
+        return TraceContext(self.trace_id, self.stamps + ((name, time.perf_counter_ns()),))
+
+
+class Traced:
+    """Message wrapper carrying a trace context next to the value."""
+
+    __slots__ = ("value", "context")
+
+    def __init__(self, value, context):
+        self.value = value
+        self.context = context
+
+    def __repr__(self):
+        return f"Traced({self.value!r}, trace_id={self.context.trace_id})"
+
+
+class TraceSampler:
+    """Decide in a source which messages are traced."""
+
+    def __init__(self, every=100):
+        self.every = every
+        self._count = itertools.count()
+        self._ids = itertools.count()
+
+    def start(self, value, name):
+        """Return `value`, wrapped with a new trace for every Nth call."""
+        every = self.every
+        if every <= 0 or next(self._count) % every:
+            return value
+        return Traced(value, TraceContext(next(self._ids), ((name, time.perf_counter_ns()),)))
+
+
+def unwrap(message):
+    """Return (value, context), with a None context for untraced messages."""
+    if type(message) is Traced:
+        return message.value, message.context
+    return message, None
+
+
+def receive_traced(op_input, port, name):
+    """Receive from `port` and stamp the trace, if the message has one."""
+    value, context = unwrap(op_input.receive(port))
+    if context is not None:
+        context = context.stamped(name)
+    return value, context
+
+
+def traced(value, context):
+    """Wrap `value` with `context` for emitting (no-op when untraced)."""
+    return value if context is None else Traced(value, context)
+
+
+class LatencyHistogram:
+    """Latency histogram with log-spaced bins and fixed memory.
+
+    Bins are 1/4 of a power of two wide, from 1 us to about 2**40 us, which
+    keeps percentile estimates within ~20%.
+    """
+
+    BINS_PER_OCTAVE = 4
+    OCTAVES = 40
+
+    __slots__ = ("bins", "count", "total", "minimum", "maximum")
+
+    def __init__(self):
+        self.bins = [0] * (self.BINS_PER_OCTAVE * self.OCTAVES + 1)
+        self.count = 0
+        self.total = 0
+        self.minimum = None
+        self.maximum = 0
+
+    def record(self, latency_ns):
+        us = latency_ns / 1e3
+        index = 0 if us <= 1 else min(len(self.bins) - 1, int(math.log2(us) * self.BINS_PER_OCTAVE) + 1)
+        self.bins[index] += 1
+        self.count += 1
+        self.total += latency_ns
+        self.maximum = max(self.maximum, latency_ns)
+        self.minimum = latency_ns if self.minimum is None else min(self.minimum, latency_ns)
+
+    def percentile(self, q):
+        """Upper bound of the bin holding the q-th percentile, in ms."""
+        if not self.count:
+            return math.nan
+        target = q / 100 * self.count
+        seen = 0
+        for index, n in enumerate(self.bins):
+            seen += n
+            if seen >= target:
+                return min(2 ** (index / self.BINS_PER_OCTAVE) / 1e3, self.maximum / 1e6)
+        return self.maximum / 1e6
+
+
+class LatencyHistograms:
+    """Per-hop and end-to-end histograms aggregated in a sink.
+
+    At most `max_paths` distinct hops are tracked; traces over further hops
+    are only counted in `dropped`.
+    """
+
+    def __init__(self, max_paths=1024):
+        self.max_paths = max_paths
+        self.histograms = {}
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def _histogram(self, key):
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            if len(self.histograms) >= self.max_paths:
+                return None
+            histogram = self.histograms.setdefault(key, LatencyHistogram())
+        return histogram
+
+    def record(self, message, name):
+        """Finish the trace of `message` (if any) at operator `name`.
+
+        Returns the unwrapped value, so sinks can write
+        `value = histograms.record(op_input.receive("in"), self.name)`.
+        """
+        value, context = unwrap(message)
+        if context is None:
+            return value
+        stamps = context.stamped(name).stamps
+        with self._lock:
+            for (src, t0), (dst, t1) in zip(stamps, stamps[1:]):
+                histogram = self._histogram((src, dst))
+                if histogram is None:
+                    self.dropped += 1
+                else:
+                    histogram.record(t1 - t0)
+            if len(stamps) > 2:
+                histogram = self._histogram((stamps[0][0], f"{name} (end-to-end)"))
+                if histogram is not None:
+                    histogram.record(stamps[-1][1] - stamps[0][1])
+        return value
+
+    def print(self):
+        print(f"{'hop':>40} {'count':>7} {'mean ms':>9} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+        with self._lock:
+            items = sorted(self.histograms.items())
+        for (src, dst), h in items:
+            print(
+                f"{src + ' -> ' + dst:>40} {h.count:>7} {h.total / h.count / 1e6:>9.3f} "
+                f"{h.percentile(50):>9.3f} {h.percentile(99):>9.3f} {h.maximum / 1e6:>9.3f}"
+            )
+        if self.dropped:
+            print(f"{self.dropped} hops not recorded (more than {self.max_paths} distinct hops)")
@@ -21,111 +21,8 @@
 
 import multiprocessing
 from argparse import ArgumentParser
-import time
-from holoscan.conditions import CountCondition
-from holoscan.core import Application, Operator, OperatorSpec
-from holoscan.schedulers import GreedyScheduler, MultiThreadScheduler, EventBasedScheduler
-from holoscan.core import Tracker
 
-
-class PingTxOp(Operator):
-    """Simple transmitter operator.
-
-    This operator has:
-        outputs: "out"
-
-    On each tick, it transmits an integer on the "out" port. The transmitted value is incremented
-    with each call to compute.
-    """
-
-    def setup(self, spec: OperatorSpec):
-        spec.output("out")
-
-    def compute(self, op_input, op_output, context):
-        op_output.emit(0, "out")
-
-
-class DelayOp(Operator):
-    """Example of an operator modifying data.
-
-    This operator waits for a specified delay and then increments the received
-    value by a user-specified integer increment.
-    """
-
-    def __init__(self, fragment, *args, delay=0.25, increment=1, **kwargs):
-        self.delay = delay
-        self.increment = increment
-
-        # Need to call the base class constructor last
-        super().__init__(fragment, *args, **kwargs)
-
-    def setup(self, spec: OperatorSpec):
-        spec.input("in")
-        spec.output("out_name")
-        spec.output("out_val")
-
-    def compute(self, op_input, op_output, context):
-        # print(f"{self.name}: now waiting {self.delay:0.3f} s")
-        time.sleep(self.delay)
-        # print(f"{self.name}: finished waiting")
-        new_value = op_input.receive("in") + self.increment
-        # print(f"{self.name}: sending new value ({new_value})")
-        op_output.emit(self.name, "out_name")
-        op_output.emit(new_value, "out_val")
-
-
-class PingRxOp(Operator):
-    """Simple (multi)-receiver operator.
-
-    This is an example of a native operator that can dynamically have any
-    number of inputs connected to is "receivers" port.
-    """
-
-    def __init__(self, fragment, *args, **kwargs):
-        # Need to call the base class constructor last
-        super().__init__(fragment, *args, **kwargs)
-
-    def setup(self, spec: OperatorSpec):
-        spec.param("names", kind="receivers")
-        spec.param("values", kind="receivers")
-
-    def compute(self, op_input, op_output, context):
-        # In this case, nothing will be printed until all messages have
-        # been received.
-        names = op_input.receive("names")
-        values = op_input.receive("values")
-        # print(f"number of received names: {len(names)}")
-        # print(f"number of received values: {len(values)}")
-        # print(f"sum of received values: {sum(values)}")
-
-
-# Now define a simple application using the operators defined above
-
-
-class ParallelPingApp(Application):
-    def __init__(self, *args, num_delays=8, delay=0.5, delay_step=0.1, **kwargs):
-        self.num_delays = num_delays
-        self.delay = delay
-        self.delay_step = delay_step
-        super().__init__(*args, **kwargs)
-
-    def compose(self):
-        # Configure the operators. Here we use CountCondition to terminate
-        # execution after a specific number of messages have been sent.
-        tx = PingTxOp(self, CountCondition(self, 1), name="tx")
-        delay_ops = [
-            DelayOp(
-                self,
-                delay=self.delay + self.delay_step * n,
-                increment=n,
-                name=f"delay{n:02d}",
-            )
-            for n in range(self.num_delays)
-        ]
-        rx = PingRxOp(self, name="rx")
-        for d in delay_ops:
-            self.add_flow(tx, d)
-            self.add_flow(d, rx, {("out_val", "values"), ("out_name", "names")})
+import profiler
 
 
 if __name__ == "__main__":
@@ -187,6 +84,31 @@ if __name__ == "__main__":
             "multithread scheduler."
         ),
     )
+    parser.add_argument(
+        "-c",
+        "--count",
+        type=int,
+        default=1,
+        help="The number of messages sent by the transmitter.",
+    )
+    parser.add_argument(
+        "--trace_every",
+        type=int,
+        default=0,
+        help=(
+            "If nonzero, every Nth message carries a trace context and per-hop latency"
+            " histograms are printed at the end."
+        ),
+    )
+    parser.add_argument(
+        "--trace",
+        type=str,
+        default="",
+        help=(
+            "If set, record every compute() call and write a Chrome trace JSON file to this path"
+            " (open it in https://ui.perfetto.dev to see how the scheduler overlaps operators)."
+        ),
+    )
 
     args = parser.parse_args()
     if args.delay < 0:
@@ -195,6 +117,10 @@ if __name__ == "__main__":
         raise ValueError("delay_step must be non-negative")
     if args.num_delay_ops < 1:
         raise ValueError("num_delay_ops must be >= 1")
+    if args.count < 1:
+        raise ValueError("count must be >= 1")
+    if args.trace_every < 0:
+        raise ValueError("trace_every must be non-negative")
     if args.scheduler not in ["greedy", "multithread", "event-based"]:
         raise ValueError("scheduler type must be one of the following: greedy, multithread, or event-based.")
     if args.threads < -1:
@@ -211,10 +137,21 @@ if __name__ == "__main__":
         if args.recession < 1:
             raise ValueError("recession must be non-negative")
 
+    # Only now, so that --help and argument errors skip loading the bindings
+    from holoscan.core import Tracker
+    from holoscan.schedulers import EventBasedScheduler, GreedyScheduler, MultiThreadScheduler
+
+    from parallel_ping import ParallelPingApp
+
+    if args.trace:
+        profiler.enable(args.trace)
+
     app = ParallelPingApp(
         num_delays=args.num_delay_ops,
         delay=args.delay,
         delay_step=args.delay_step,
+        count=args.count,
+        trace_every=args.trace_every,
     )
     with Tracker(
         app, num_start_messages_to_skip=0, num_last_messages_to_discard=0
@@ -244,4 +181,6 @@ if __name__ == "__main__":
         app.scheduler(scheduler)
         app.run()
         tracker.print()
+        if app.histograms.histograms:
+            app.histograms.print()
         tracker.get_num_paths()
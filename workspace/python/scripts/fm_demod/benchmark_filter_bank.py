@@ -0,0 +1,122 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+# Direct (time-domain) versus overlap-save FFT filtering across tap counts.
+#
+# Both filter the same stream, cut into blocks, with the same bank of
+# lowpass filters and decimation; the direct version convolves every block
+# with every filter (xp.convolve, carrying the last taps - 1 samples) and
+# then keeps every Dth sample. Throughput is in input megasamples per second
+# for the whole bank, and the outputs are checked against each other.
+#
+#   python benchmark_filter_bank.py
+#   python benchmark_filter_bank.py -f 8 -d 4 --taps 64 512 4096
+#   python benchmark_filter_bank.py --gpu
+
+import time
+from argparse import ArgumentParser
+
+import numpy as np
+
+from filter_bank import OverlapSaveFilterBank
+from fm_demod import lowpass_taps
+
+try:
+    import cupy as cp
+except ImportError:
+    cp = None
+
+
+class DirectFilterBank:
+    def __init__(self, taps, decimation=1, xp=np):
+        self.taps = [xp.asarray(t) for t in taps]
+        self.decimation = decimation
+        self.xp = xp
+        self.history = None
+        # Index in the next block of the next output sample
+        self.phase = 0
+
+    def __call__(self, x):
+        xp = self.xp
+        num_taps = len(self.taps[0])
+        if self.history is None:
+            self.history = xp.zeros(num_taps - 1, x.dtype)
+        ext = xp.concatenate([self.history, x])
+        self.history = ext[len(ext) - (num_taps - 1) :]
+        y = xp.stack(
+            [xp.convolve(ext, t, mode="valid")[self.phase :: self.decimation] for t in self.taps]
+        )
+        self.phase = (self.phase - len(x)) % self.decimation
+        return y
+
+
+def throughput(bank, blocks, xp):
+    # The first block warms up (plan, FFT twiddles, CuPy kernels)
+    outputs = [bank(blocks[0])]
+    if xp is not np:
+        xp.cuda.get_current_stream().synchronize()
+    start = time.perf_counter()
+    outputs += [bank(block) for block in blocks[1:]]
+    if xp is not np:
+        xp.cuda.get_current_stream().synchronize()
+    samples = sum(len(block) for block in blocks[1:])
+    return samples / (time.perf_counter() - start) / 1e6, xp.concatenate(outputs, axis=1)
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Benchmark direct versus overlap-save FIR filtering")
+    parser.add_argument(
+        "--taps", type=int, nargs="+", default=[16, 64, 256, 1024, 4096], help="Tap counts."
+    )
+    parser.add_argument("-f", "--filters", type=int, default=4, help="Filters in the bank.")
+    parser.add_argument("-d", "--decimation", type=int, default=1, help="Decimation factor.")
+    parser.add_argument("-b", "--block_size", type=int, default=65536, help="Samples per block.")
+    parser.add_argument("-c", "--count", type=int, default=20, help="Number of blocks.")
+    parser.add_argument("--gpu", action="store_true", help="Use CuPy instead of NumPy.")
+    args = parser.parse_args()
+    if args.gpu and cp is None:
+        parser.error("--gpu requires CuPy")
+    xp = cp if args.gpu else np
+
+    rng = np.random.default_rng(0)
+    blocks = [
+        xp.asarray(rng.standard_normal(args.block_size, dtype=np.float32))
+        for _ in range(args.count + 1)
+    ]
+    print(
+        f"{args.filters} filters, decimation {args.decimation}, "
+        f"{args.block_size} samples per block, {'CuPy' if args.gpu else 'NumPy'}"
+    )
+    print(f"{'taps':>6} {'direct MS/s':>12} {'FFT MS/s':>10} {'speedup':>8} {'nfft':>6} {'error':>9}")
+    for num_taps in args.taps:
+        # Bands spread over the output bandwidth
+        cutoffs = [0.4 * (k + 1) / args.filters / args.decimation for k in range(args.filters)]
+        taps = np.stack([lowpass_taps(num_taps, cutoff) for cutoff in cutoffs])
+        direct, y_direct = throughput(DirectFilterBank(taps, args.decimation, xp), blocks, xp)
+        bank = OverlapSaveFilterBank(taps, args.decimation, xp=xp)
+        fft, y_fft = throughput(bank, blocks, xp)
+        # The FFT bank holds back less than one hop of output
+        n = y_fft.shape[1]
+        error = float(abs(y_fft - y_direct[:, :n]).max())
+        print(
+            f"{num_taps:>6} {direct:>12.2f} {fft:>10.2f} {fft / direct:>8.2f} "
+            f"{bank.plan(args.block_size).nfft:>6} {error:>9.2e}"
+        )
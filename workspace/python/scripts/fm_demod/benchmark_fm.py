@@ -0,0 +1,118 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+# Real-time factor of the FM demodulation chain on synthetic IQ.
+#
+# The real-time factor is the duration of the signal processed divided by
+# the time it took, so anything above 1 keeps up with a live receiver.
+# Every stage is first timed on its own, then the whole FMDemodApp pipeline
+# is run under the GreedyScheduler; the pipeline time includes generating the
+# synthetic IQ.
+#
+#   python benchmark_fm.py                       # NumPy, 1.2 MS/s
+#   python benchmark_fm.py --fs 2.4e6 -b 262144
+#   python benchmark_fm.py --gpu                 # CuPy
+
+import time
+from argparse import ArgumentParser
+
+import numpy as np
+from holoscan.schedulers import GreedyScheduler
+
+from fm_demod import Decimator, Deemphasis, Discriminator, FMDemodApp, FMSignal
+
+try:
+    import cupy as cp
+except ImportError:
+    cp = None
+
+
+def synchronize(xp):
+    if xp is not np:
+        xp.cuda.get_current_stream().synchronize()
+
+
+def time_stages(args, xp):
+    fs_channel = args.fs / args.channel_decimation
+    signal = FMSignal(args.fs, xp=xp)
+    blocks = [signal(args.block_size) for _ in range(args.count)]
+    stages = [
+        ("channel", Decimator(args.channel_decimation, xp=xp)),
+        ("discriminator", Discriminator(fs_channel, xp=xp)),
+        ("deemphasis", Deemphasis(fs_channel, xp=xp)),
+        ("audio", Decimator(args.audio_decimation, xp=xp)),
+    ]
+    results = []
+    for name, stage in stages:
+        # Warm up (CuPy kernel compilation, caches), then time
+        stage(blocks[0])
+        synchronize(xp)
+        start = time.perf_counter()
+        outputs = [stage(block) for block in blocks]
+        synchronize(xp)
+        results.append((name, (time.perf_counter() - start) / args.count))
+        blocks = outputs
+    return results
+
+
+def run_app(args, xp):
+    app = FMDemodApp(
+        count=args.count,
+        fs=args.fs,
+        block_size=args.block_size,
+        channel_decimation=args.channel_decimation,
+        audio_decimation=args.audio_decimation,
+        xp=xp,
+    )
+    app.config("")
+    app.scheduler(GreedyScheduler(app, name="greedy_scheduler"))
+    start = time.perf_counter()
+    app.run()
+    return (time.perf_counter() - start) / args.count
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Benchmark the FM demodulation operators")
+    parser.add_argument("--fs", type=float, default=1.2e6, help="IQ sample rate in Hz.")
+    parser.add_argument("-b", "--block_size", type=int, default=65536, help="IQ samples per block.")
+    parser.add_argument("-c", "--count", type=int, default=50, help="Number of blocks.")
+    parser.add_argument("--channel_decimation", type=int, default=5)
+    parser.add_argument("--audio_decimation", type=int, default=5)
+    parser.add_argument("--gpu", action="store_true", help="Use CuPy instead of NumPy.")
+    args = parser.parse_args()
+    if args.gpu and cp is None:
+        parser.error("--gpu requires CuPy")
+    xp = cp if args.gpu else np
+
+    block_time = args.block_size / args.fs
+    print(
+        f"{args.fs / 1e6:g} MS/s IQ, {args.block_size} samples per block "
+        f"({block_time * 1e3:.1f} ms), audio at {args.fs / args.channel_decimation / args.audio_decimation:.0f} Hz, "
+        f"{'CuPy' if args.gpu else 'NumPy'}"
+    )
+    print(f"{'stage':>14} {'ms/block':>9} {'RTF':>8}")
+    stages = time_stages(args, xp)
+    for name, seconds in stages:
+        print(f"{name:>14} {seconds * 1e3:>9.3f} {block_time / seconds:>8.1f}")
+    total = sum(seconds for _, seconds in stages)
+    print(f"{'stages':>14} {total * 1e3:>9.3f} {block_time / total:>8.1f}")
+    pipeline = run_app(args, xp)
+    print(f"{'pipeline':>14} {pipeline * 1e3:>9.3f} {block_time / pipeline:>8.1f}")
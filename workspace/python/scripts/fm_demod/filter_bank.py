@@ -0,0 +1,175 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+# Streaming FIR filter bank by FFT overlap-save.
+#
+# A block of N input samples costs O(N * taps) with time-domain convolution,
+# but only O(N * log(nfft)) here: the input is cut into overlapping frames of
+# `nfft` samples, hop L = nfft - taps + 1, every frame is transformed once,
+# multiplied by the spectrum of each filter of the bank and transformed back,
+# and the first taps - 1 (circularly aliased) outputs of each frame dropped.
+#
+# * The FFT size is chosen per input block size, as the power of two with
+#   the lowest cost per output sample that is not larger than a block; the
+#   plan and the filter spectra are computed once and cached per block size.
+# * With `decimation` D > 1, the hop is a multiple of D and the spectra are
+#   folded into D sub-bands before the inverse FFT, which then produces only
+#   every Dth output (polyphase decimation in the frequency domain).
+# * Samples not filling a whole frame, and the last taps - 1 inputs, are kept
+#   for the next block, so the output is exactly that of one long
+#   convolution however the stream is cut, delayed by less than one hop.
+#
+# Runs on NumPy or CuPy (`xp`). For short filters the direct form of
+# DecimateOp in fm_demod.py is as fast; see benchmark_filter_bank.py.
+
+import numpy as np
+from holoscan.core import Operator, OperatorSpec
+
+try:
+    import cupy as cp
+except ImportError:
+    cp = None
+
+
+class _Plan:
+    __slots__ = ("nfft", "hop", "pad", "spectra")
+
+    def __init__(self, nfft, hop, pad, spectra):
+        self.nfft = nfft
+        self.hop = hop
+        # Zeros in front of the kept history, so that frames are nfft long
+        self.pad = pad
+        self.spectra = spectra
+
+
+class OverlapSaveFilterBank:
+    """Apply every filter of `taps` (filters x taps, or 1-D for one filter).
+
+    Calls return (filters, samples) arrays, or 1-D arrays for a single
+    filter, with every `decimation`th output sample. The output is real when
+    both the input and the taps are.
+    """
+
+    def __init__(self, taps, decimation=1, xp=np, max_plans=8):
+        taps = np.asarray(taps)
+        self.single = taps.ndim == 1
+        self.taps = np.atleast_2d(taps)
+        self.num_taps = self.taps.shape[1]
+        self.decimation = int(decimation)
+        if self.decimation < 1:
+            raise ValueError("decimation must be >= 1")
+        self.xp = xp
+        self.max_plans = max_plans
+        self._plans = {}
+        self.history = None
+        self.pending = None
+
+    def plan(self, block_size):
+        """Plan (FFT size, hop and filter spectra) for blocks of `block_size`."""
+        plan = self._plans.get(block_size)
+        if plan is not None:
+            return plan
+        T, D = self.num_taps, self.decimation
+        # FFT sizes D * 2**k, so that spectra fold into D sub-bands, from the
+        # first one with a hop of at least T up to the block size
+        nfft = D
+        while nfft - T + 1 < max(T, D):
+            nfft *= 2
+        largest = max(nfft, block_size + T - 1)
+        best = None
+        while True:
+            hop = (nfft - T + 1) // D * D
+            cost = nfft * np.log2(nfft) / (hop / D)
+            if best is None or cost < best[0]:
+                best = (cost, nfft, hop)
+            if nfft >= largest:
+                break
+            nfft *= 2
+        _, nfft, hop = best
+        spectra = np.fft.fft(self.taps, nfft, axis=1)
+        plan = _Plan(nfft, hop, nfft - hop - (T - 1), self.xp.asarray(spectra.astype(np.complex64)))
+        if len(self._plans) >= self.max_plans:
+            self._plans.pop(next(iter(self._plans)))
+        self._plans[block_size] = plan
+        return plan
+
+    def __call__(self, x):
+        xp = self.xp
+        plan = self.plan(len(x))
+        T, D = self.num_taps, self.decimation
+        real = not xp.iscomplexobj(x) and not np.iscomplexobj(self.taps)
+        if self.history is None:
+            self.history = xp.zeros(T - 1, x.dtype)
+            self.pending = x[:0]
+        pending = xp.concatenate([self.pending, x]) if len(self.pending) else x
+        frames = len(pending) // plan.hop
+        used = frames * plan.hop
+
+        ext = xp.concatenate([xp.zeros(plan.pad, x.dtype), self.history, pending[:used]])
+        stride = ext.strides[0]
+        # Overlapping frames of nfft samples, hop apart, without copying
+        windows = xp.lib.stride_tricks.as_strided(
+            ext, shape=(frames, plan.nfft), strides=(plan.hop * stride, stride)
+        )
+        spectrum = xp.fft.fft(windows, axis=1)[None, :, :] * plan.spectra[:, None, :]
+        keep = plan.nfft - plan.hop
+        if D > 1:
+            # y[n * D] of a length-nfft IDFT is the length-nfft/D IDFT of the
+            # spectrum folded onto nfft/D bins
+            folded = spectrum.reshape(len(plan.spectra), frames, D, plan.nfft // D).mean(axis=2)
+            y = xp.fft.ifft(folded, axis=2)[:, :, keep // D :]
+        else:
+            y = xp.fft.ifft(spectrum, axis=2)[:, :, keep:]
+        y = y.reshape(len(plan.spectra), -1)
+        if real:
+            y = y.real
+        y = y.astype(xp.float32 if real else xp.complex64)
+
+        if used:
+            tail = xp.concatenate([self.history, pending[:used]])
+            self.history = tail[len(tail) - (T - 1) :].copy()
+        self.pending = pending[used:].copy()
+        return y[0] if self.single else y
+
+
+class FIRFilterBankOp(Operator):
+    """Streaming FIR filter bank (overlap-save) with optional decimation.
+
+    This operator has:
+        inputs: "in"
+        outputs: "out"
+    Emits (filters, samples) arrays, 1-D for a single filter, once at least
+    one FFT frame of input has been received.
+    """
+
+    def __init__(self, fragment, *args, taps, decimation=1, xp=np, **kwargs):
+        self.bank = OverlapSaveFilterBank(taps, decimation, xp=xp)
+        # Need to call the base class constructor last
+        super().__init__(fragment, *args, **kwargs)
+
+    def setup(self, spec: OperatorSpec):
+        spec.input("in")
+        spec.output("out")
+
+    def compute(self, op_input, op_output, context):
+        y = self.bank(op_input.receive("in"))
+        if y.shape[-1]:
+            op_output.emit(y, "out")
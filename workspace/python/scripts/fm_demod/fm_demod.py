@@ -0,0 +1,361 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+# Block-streaming FM demodulation operators (see images/FMDemod.png).
+#
+#   BasebandSourceOp -> DecimateOp -> DiscriminatorOp -> DeemphasisOp -> DecimateOp -> AudioSinkOp
+#   complex IQ          channel       phase difference    75 us IIR        to audio
+#
+# Each stage processes a whole block at once with array operations and
+# keeps the state it needs between ticks (last sample, filter history,
+# decimation phase, IIR output), so the output does not depend on how the
+# stream is cut into blocks. The DSP lives in plain classes, wrapped by thin
+# operators, and runs on NumPy or CuPy (`xp`).
+#
+#   python fm_demod.py                  # on the GPU (CuPy)
+#   python fm_demod.py --cpu --wav out.wav
+
+import math
+import wave
+from argparse import ArgumentParser
+
+import numpy as np
+from holoscan.conditions import CountCondition
+from holoscan.core import Application, Operator, OperatorSpec
+from holoscan.schedulers import GreedyScheduler
+
+try:
+    import cupy as cp
+except ImportError:
+    cp = None
+
+
+def lowpass_taps(num_taps, cutoff):
+    """Hamming-windowed sinc lowpass, `cutoff` in cycles per sample."""
+    n = np.arange(num_taps) - (num_taps - 1) / 2
+    taps = 2 * cutoff * np.sinc(2 * cutoff * n) * np.hamming(num_taps)
+    return (taps / taps.sum()).astype(np.float32)
+
+
+class FMSignal:
+    """Synthetic FM baseband: complex IQ modulated by a sum of tones.
+
+    `tones` are (frequency in Hz, amplitude) pairs, with a peak amplitude of
+    at most 1 mapped to `deviation` Hz. Noise is added for a carrier to
+    noise ratio of `cnr_db` (None for none).
+    """
+
+    def __init__(
+        self, fs=1.2e6, tones=((1000.0, 0.5), (3000.0, 0.3)), deviation=75e3, cnr_db=30.0, xp=np, seed=0
+    ):
+        self.fs = fs
+        self.tones = tones
+        self.deviation = deviation
+        self.noise = None if cnr_db is None else 10 ** (-cnr_db / 20) / math.sqrt(2)
+        self.xp = xp
+        self.rng = np.random.default_rng(seed)
+        self.n = 0
+        self.phase = 0.0
+
+    def __call__(self, size):
+        xp = self.xp
+        t = (self.n + xp.arange(size, dtype=xp.float64)) / self.fs
+        message = sum(a * xp.sin(2 * math.pi * f * t) for f, a in self.tones)
+        # Phase is the running sum of the instantaneous frequency
+        phase = self.phase + xp.cumsum(message * (2 * math.pi * self.deviation / self.fs))
+        self.phase = float(phase[-1]) % (2 * math.pi)
+        self.n += size
+        iq = xp.exp(1j * phase).astype(xp.complex64)
+        if self.noise is not None:
+            noise = self.rng.standard_normal((2, size), dtype=np.float32) * self.noise
+            iq += xp.asarray(noise[0] + 1j * noise[1])
+        return iq
+
+
+class Decimator:
+    """FIR lowpass and downsampling by `factor`, computing only the kept outputs.
+
+    The last `len(taps) - 1` inputs and the position of the next kept sample
+    are carried over to the next block.
+    """
+
+    def __init__(self, factor, taps=None, xp=np):
+        self.factor = factor
+        if taps is None:
+            # Cut off at 80% of the output Nyquist frequency
+            taps = lowpass_taps(8 * factor + 1, 0.4 / factor)
+        self.xp = xp
+        self.reversed_taps = xp.asarray(np.ascontiguousarray(np.asarray(taps)[::-1]))
+        self.history = None
+        # Index in the next block of the next output sample
+        self.phase = 0
+
+    def __call__(self, x):
+        xp = self.xp
+        num_taps = len(self.reversed_taps)
+        if self.history is None:
+            self.history = xp.zeros(num_taps - 1, x.dtype)
+        ext = xp.concatenate([self.history, x])
+        self.history = ext[len(ext) - (num_taps - 1) :].copy()
+        count = max(0, -(-(len(x) - self.phase) // self.factor))
+        # One row of `num_taps` inputs per output sample, without copying
+        windows = xp.lib.stride_tricks.as_strided(
+            ext[self.phase :],
+            shape=(count, num_taps),
+            strides=(self.factor * ext.strides[0], ext.strides[0]),
+        )
+        y = windows @ self.reversed_taps
+        self.phase += count * self.factor - len(x)
+        return y
+
+
+class Discriminator:
+    """Phase-difference FM discriminator: angle(x[n] * conj(x[n - 1])).
+
+    The output is scaled so that a frequency deviation of `deviation` Hz
+    gives 1.
+    """
+
+    def __init__(self, fs, deviation=75e3, xp=np):
+        self.gain = fs / (2 * math.pi * deviation)
+        self.xp = xp
+        self.last = None
+
+    def __call__(self, x):
+        xp = self.xp
+        if len(x) == 0:
+            # A decimator can output an empty block
+            return xp.zeros(0, xp.float32)
+        previous = xp.empty_like(x)
+        previous[0] = x[0] if self.last is None else self.last
+        previous[1:] = x[:-1]
+        self.last = x[-1]
+        return (xp.angle(x * xp.conj(previous)) * self.gain).astype(xp.float32)
+
+
+class OnePole:
+    """First order IIR y[n] = a * y[n - 1] + (1 - a) * x[n], vectorized.
+
+    The block is split into segments short enough that a**-L stays below
+    e**10: within a segment the recursion is a scaled cumulative sum, and
+    the carry between segments is a small lower triangular matrix product.
+    Both are exact (up to rounding), unlike truncating the impulse response.
+    """
+
+    def __init__(self, a, xp=np):
+        self.a = a
+        self.xp = xp
+        self.segment = int(max(1, min(1024, 10 / -math.log(a))))
+        self.y = 0.0
+        self._carry = {}
+        k = np.arange(self.segment, dtype=np.float64)
+        self.grow = xp.asarray(a**-k)
+        self.shrink = xp.asarray(a**k)
+        # a**(j + 1): weight of the previous output at position j
+        self.decay = xp.asarray(a ** (k + 1))
+
+    def _carry_matrix(self, segments):
+        # T[s, t] = b**(s - t) for t <= s, with b = a**L
+        matrix = self._carry.get(segments)
+        if matrix is None:
+            s = np.arange(segments)
+            powers = np.subtract.outer(s, s)
+            b = self.a**self.segment
+            with np.errstate(under="ignore"):
+                matrix = np.where(powers >= 0, b ** np.maximum(powers, 0).astype(np.float64), 0.0)
+            matrix = self._carry[segments] = self.xp.asarray(matrix)
+        return matrix
+
+    def __call__(self, x):
+        xp = self.xp
+        n, size = len(x), self.segment
+        if n == 0:
+            return xp.zeros(0, xp.float32)
+        segments = -(-n // size)
+        padded = xp.zeros(segments * size, xp.float64)
+        padded[:n] = x
+        padded = padded.reshape(segments, size)
+        # Zero initial state within each segment
+        local = xp.cumsum(padded * ((1 - self.a) * self.grow), axis=1) * self.shrink
+        # y at the end of each segment: Y[s] = b * Y[s - 1] + local[s, -1]
+        ends = self._carry_matrix(segments) @ local[:, -1]
+        ends += self.y * self.a ** (size * (xp.arange(segments) + 1.0))
+        starts = xp.concatenate([xp.asarray([self.y]), ends[:-1]])
+        y = local + starts[:, None] * self.decay
+        self.y = float(ends[-1]) if n % size == 0 else float(y.reshape(-1)[n - 1])
+        return y.reshape(-1)[:n].astype(xp.float32)
+
+
+class Deemphasis(OnePole):
+    """FM de-emphasis, a single pole lowpass with time constant `tau` s
+    (75 us in the Americas and Korea, 50 us elsewhere)."""
+
+    def __init__(self, fs, tau=75e-6, xp=np):
+        super().__init__(math.exp(-1 / (fs * tau)), xp=xp)
+
+
+class _StageOp(Operator):
+    """Operator applying a stateful DSP stage to every block.
+
+    This operator has:
+        inputs: "in"
+        outputs: "out"
+    """
+
+    def setup(self, spec: OperatorSpec):
+        spec.input("in")
+        spec.output("out")
+
+    def compute(self, op_input, op_output, context):
+        y = self.stage(op_input.receive("in"))
+        # Decimators output nothing for blocks shorter than their factor
+        if len(y):
+            op_output.emit(y, "out")
+
+
+class DecimateOp(_StageOp):
+    def __init__(self, fragment, *args, factor, taps=None, xp=np, **kwargs):
+        self.stage = Decimator(factor, taps, xp=xp)
+        super().__init__(fragment, *args, **kwargs)
+
+
+class DiscriminatorOp(_StageOp):
+    def __init__(self, fragment, *args, fs, deviation=75e3, xp=np, **kwargs):
+        self.stage = Discriminator(fs, deviation, xp=xp)
+        super().__init__(fragment, *args, **kwargs)
+
+
+class DeemphasisOp(_StageOp):
+    def __init__(self, fragment, *args, fs, tau=75e-6, xp=np, **kwargs):
+        self.stage = Deemphasis(fs, tau, xp=xp)
+        super().__init__(fragment, *args, **kwargs)
+
+
+class BasebandSourceOp(Operator):
+    """Emit blocks of `block_size` complex64 IQ samples from an FMSignal.
+
+    This operator has:
+        outputs: "out"
+    """
+
+    def __init__(self, fragment, *args, signal, block_size=65536, **kwargs):
+        self.signal = signal
+        self.block_size = block_size
+        # Need to call the base class constructor last
+        super().__init__(fragment, *args, **kwargs)
+
+    def setup(self, spec: OperatorSpec):
+        spec.output("out")
+
+    def compute(self, op_input, op_output, context):
+        op_output.emit(self.signal(self.block_size), "out")
+
+
+class AudioSinkOp(Operator):
+    """Collect the audio blocks on the host (kept in `blocks`)."""
+
+    def __init__(self, fragment, *args, **kwargs):
+        self.blocks = []
+        super().__init__(fragment, *args, **kwargs)
+
+    def setup(self, spec: OperatorSpec):
+        spec.input("in")
+
+    def compute(self, op_input, op_output, context):
+        block = op_input.receive("in")
+        self.blocks.append(block.get() if hasattr(block, "get") else np.asarray(block))
+
+    def audio(self):
+        return np.concatenate(self.blocks) if self.blocks else np.zeros(0, np.float32)
+
+
+class FMDemodApp(Application):
+    """Synthetic FM receiver: `fs` IQ -> `fs / channel_decimation` -> audio
+    at `fs / (channel_decimation * audio_decimation)`."""
+
+    def __init__(
+        self,
+        *args,
+        count=20,
+        fs=1.2e6,
+        block_size=65536,
+        channel_decimation=5,
+        audio_decimation=5,
+        xp=np,
+        **kwargs,
+    ):
+        self.count = count
+        self.fs = fs
+        self.block_size = block_size
+        self.channel_decimation = channel_decimation
+        self.audio_decimation = audio_decimation
+        self.xp = xp
+        self.audio_rate = fs / (channel_decimation * audio_decimation)
+        super().__init__(*args, **kwargs)
+
+    def compose(self):
+        xp = self.xp
+        fs_channel = self.fs / self.channel_decimation
+        src = BasebandSourceOp(
+            self,
+            CountCondition(self, self.count),
+            signal=FMSignal(self.fs, xp=xp),
+            block_size=self.block_size,
+            name="baseband",
+        )
+        channel = DecimateOp(self, factor=self.channel_decimation, xp=xp, name="channel")
+        discriminator = DiscriminatorOp(self, fs=fs_channel, xp=xp, name="discriminator")
+        deemphasis = DeemphasisOp(self, fs=fs_channel, xp=xp, name="deemphasis")
+        audio = DecimateOp(self, factor=self.audio_decimation, xp=xp, name="audio")
+        self.sink = AudioSinkOp(self, name="sink")
+
+        ops = [src, channel, discriminator, deemphasis, audio, self.sink]
+        for upstream, downstream in zip(ops, ops[1:]):
+            self.add_flow(upstream, downstream)
+
+
+def write_wav(path, audio, rate):
+    pcm = (np.clip(audio, -1, 1) * 32767).astype("<i2")
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(int(rate))
+        f.writeframes(pcm.tobytes())
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="FM demodulation example")
+    parser.add_argument("--cpu", action="store_true", help="Use NumPy instead of CuPy.")
+    parser.add_argument("-c", "--count", type=int, default=20, help="Number of IQ blocks.")
+    parser.add_argument("--wav", default="", help="Write the demodulated audio to this WAV file.")
+    args = parser.parse_args()
+
+    app = FMDemodApp(count=args.count, xp=np if args.cpu or cp is None else cp)
+    app.config("")
+    app.scheduler(GreedyScheduler(app, name="greedy_scheduler"))
+    app.run()
+
+    audio = app.sink.audio()
+    spectrum = np.abs(np.fft.rfft(audio * np.hanning(len(audio))))
+    peak = spectrum.argmax() * app.audio_rate / len(audio)
+    print(f"{len(audio)} audio samples at {app.audio_rate:.0f} Hz, strongest tone at {peak:.0f} Hz")
+    if args.wav:
+        write_wav(args.wav, audio, app.audio_rate)
@@ -0,0 +1,519 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+# Propose a split of an application's operators into fragments.
+#
+# The operator graph is read from the application's compose(), and the
+# per-operator compute times and per-edge message sizes come from a profile
+# file (see peoplenet_profile.yaml). Compute times measured by a profiling run
+# of flow_tracker/profiler.py (its Chrome trace, or a dump of `summary()`)
+# can be given with --timings and replace those of the profile. The partitioner assigns operators to k
+# fragments so that compute is balanced and the bytes crossing fragments are
+# minimized, then prints the fragment layout as YAML and as a compose()
+# skeleton in the style of answers/ex6.py.
+#
+#   python partitioner.py --app ../answers/ex3.py:FFTApp -k 2
+#   python partitioner.py --app ../answers/ex3.py:FFTApp -k 2 --timings trace.json
+#   python partitioner.py --synthetic 12 -k 3
+#   python partitioner.py --check 50     # heuristic against exact on random graphs
+
+import importlib.util
+import itertools
+import json
+import random
+from argparse import ArgumentParser
+
+import yaml
+
+
+class OperatorGraph:
+    """Operator graph annotated with costs.
+
+    `nodes` maps operator names to compute time (ms per tick) and `edges`
+    maps (upstream, downstream) pairs to a dict with the message size in
+    bytes per tick ("bytes") and the connected ports ("ports").
+    """
+
+    def __init__(self):
+        self.nodes = {}
+        self.edges = {}
+
+    def add_node(self, name, compute_ms=0.0):
+        self.nodes[name] = float(compute_ms)
+
+    def add_edge(self, upstream, downstream, nbytes=0, ports=()):
+        edge = self.edges.setdefault((upstream, downstream), {"bytes": 0, "ports": set()})
+        edge["bytes"] = int(nbytes)
+        edge["ports"].update(ports)
+
+    def apply_profile(self, profile):
+        """Set costs from a profile dict (see peoplenet_profile.yaml)."""
+        default_ms = profile.get("default_compute_ms", 1.0)
+        default_bytes = profile.get("default_message_bytes", 0)
+        operators = profile.get("operators", {})
+        edges = profile.get("edges", {})
+        for name in self.nodes:
+            self.nodes[name] = float(operators.get(name, default_ms))
+        for (upstream, downstream), edge in self.edges.items():
+            edge["bytes"] = int(edges.get(f"{upstream}->{downstream}", default_bytes))
+
+    def apply_compute_times(self, times):
+        """Set the compute times (ms per tick) of the operators in `times`.
+
+        Returns the names of the operators without a measurement.
+        """
+        for name in self.nodes:
+            if name in times:
+                self.nodes[name] = float(times[name])
+        return [name for name in self.nodes if name not in times]
+
+    def topological_order(self, rng=None):
+        """Kahn's algorithm; ties are shuffled when `rng` is given."""
+        indegree = {name: 0 for name in self.nodes}
+        successors = {name: [] for name in self.nodes}
+        for upstream, downstream in self.edges:
+            indegree[downstream] += 1
+            successors[upstream].append(downstream)
+        ready = [name for name, n in indegree.items() if n == 0]
+        order = []
+        while ready:
+            if rng is not None:
+                rng.shuffle(ready)
+            name = ready.pop(0)
+            order.append(name)
+            for nxt in successors[name]:
+                indegree[nxt] -= 1
+                if indegree[nxt] == 0:
+                    ready.append(nxt)
+        # Cycles (not expected in a Holoscan graph) keep their remaining nodes
+        order += [name for name in self.nodes if name not in order]
+        return order
+
+
+def load_compute_times(path):
+    """Mean compute time (ms) per operator from a profiling run.
+
+    `path` is either the Chrome trace written by flow_tracker/profiler.py
+    or a JSON/YAML dump of `profiler.summary()`.
+    """
+    with open(path) as f:
+        data = json.load(f) if path.endswith(".json") else yaml.safe_load(f)
+    if isinstance(data, dict) and "traceEvents" in data:
+        totals = {}
+        for event in data["traceEvents"]:
+            if event.get("ph") == "X" and event.get("cat") == "compute":
+                calls, total_us = totals.get(event["name"], (0, 0.0))
+                totals[event["name"]] = (calls + 1, total_us + event["dur"])
+        return {name: total_us / calls / 1e3 for name, (calls, total_us) in totals.items()}
+    return {name: stats["wall_ms"] for name, stats in data.items()}
+
+
+def graph_from_app(app):
+    """Build an OperatorGraph from an application's compose()."""
+    compose_graph = getattr(app, "compose_graph", None)
+    if compose_graph is not None:
+        compose_graph()
+    else:
+        app.compose()
+
+    graph = OperatorGraph()
+    operators = app.graph.get_nodes()
+    for op in operators:
+        graph.add_node(op.name)
+    for op in operators:
+        for nxt in app.graph.get_next_nodes(op):
+            port_map = app.graph.get_port_map(op, nxt)
+            ports = {(out, inp) for out, ins in port_map.items() for inp in ins}
+            graph.add_edge(op.name, nxt.name, ports=ports)
+    return graph
+
+
+def load_app(spec, args=(), config=None):
+    """Instantiate an application from "path/to/script.py:ClassName"."""
+    path, _, class_name = spec.rpartition(":")
+    module_spec = importlib.util.spec_from_file_location("partitioned_app", path)
+    module = importlib.util.module_from_spec(module_spec)
+    module_spec.loader.exec_module(module)
+    app = getattr(module, class_name)(*args)
+    if config is not None:
+        app.config(config)
+    return app
+
+
+class Partition:
+    """Assignment of operators to fragments, with its costs."""
+
+    def __init__(self, graph, k, assignment):
+        self.graph = graph
+        self.k = k
+        self.assignment = dict(assignment)
+        self.loads = [0.0] * k
+        for name, part in self.assignment.items():
+            self.loads[part] += graph.nodes[name]
+        self.cut_edges = [
+            edge for edge in graph.edges if self.assignment[edge[0]] != self.assignment[edge[1]]
+        ]
+        self.cut_bytes = sum(graph.edges[edge]["bytes"] for edge in self.cut_edges)
+
+    @property
+    def max_load(self):
+        return max(self.loads)
+
+    @property
+    def imbalance(self):
+        """Largest fragment load over the ideal load (1.0 is perfect)."""
+        total = sum(self.loads)
+        return self.max_load * self.k / total if total > 0 else 1.0
+
+    def fragments(self):
+        parts = [[] for _ in range(self.k)]
+        for name in self.graph.topological_order():
+            parts[self.assignment[name]].append(name)
+        return parts
+
+    def to_config(self):
+        """Fragment layout as a YAML-friendly dict."""
+        fragments = self.fragments()
+        connections = []
+        for upstream, downstream in self.cut_edges:
+            ports = sorted(self.graph.edges[(upstream, downstream)]["ports"]) or [("", "")]
+            connections.append(
+                {
+                    "from": f"fragment{self.assignment[upstream] + 1}",
+                    "to": f"fragment{self.assignment[downstream] + 1}",
+                    "ports": [
+                        [".".join(filter(None, (upstream, out))), ".".join(filter(None, (downstream, inp)))]
+                        for out, inp in ports
+                    ],
+                    "bytes_per_tick": self.graph.edges[(upstream, downstream)]["bytes"],
+                }
+            )
+        return {
+            "fragments": {
+                f"fragment{i + 1}": {"operators": names, "compute_ms": round(self.loads[i], 3)}
+                for i, names in enumerate(fragments)
+            },
+            "connections": connections,
+            "cut_bytes_per_tick": self.cut_bytes,
+            "imbalance": round(self.imbalance, 3),
+        }
+
+    def to_code(self):
+        """compose() skeleton for the partitioned application.
+
+        Operator construction is application specific, so each fragment lists
+        the operators and internal flows to move into it.
+        """
+        lines = ["from holoscan.core import Application, Fragment"]
+        for i, names in enumerate(self.fragments()):
+            lines += ["", "", f"class Fragment{i + 1}(Fragment):", "    def compose(self):"]
+            lines.append(f"        # Create the operators: {', '.join(names)}")
+            internal = [
+                (u, v)
+                for (u, v) in self.graph.edges
+                if self.assignment[u] == i and self.assignment[v] == i
+            ]
+            if internal:
+                lines += [f"        # self.add_flow({u}, {v})" for u, v in internal]
+            else:
+                lines += [f"        # self.add_operator({name})" for name in names]
+            lines.append("        pass")
+        lines += ["", "", "class PartitionedApp(Application):", "    def compose(self):"]
+        for i in range(self.k):
+            lines.append(f'        fragment{i + 1} = Fragment{i + 1}(self, name="fragment{i + 1}")')
+        for connection in self.to_config()["connections"]:
+            ports = ", ".join(f'("{out}", "{inp}")' for out, inp in connection["ports"])
+            lines.append(f"        # {connection['bytes_per_tick']} bytes per tick")
+            lines.append(f"        self.add_flow({connection['from']}, {connection['to']}, {{{ports}}})")
+        return "\n".join(lines) + "\n"
+
+
+def _cost(partition):
+    # Lexicographic: cut bytes first, then the most loaded fragment
+    return (partition.cut_bytes, partition.max_load)
+
+
+def _feasible(loads, counts, capacity):
+    return max(loads) <= capacity and min(counts) > 0
+
+
+def partition_exact(graph, k, capacity):
+    """Try every assignment (first operator pinned to fragment 0)."""
+    names = list(graph.nodes)
+    best = None
+    for rest in itertools.product(range(k), repeat=len(names) - 1):
+        parts = (0,) + rest
+        loads, counts = [0.0] * k, [0] * k
+        for name, part in zip(names, parts):
+            loads[part] += graph.nodes[name]
+            counts[part] += 1
+        if not _feasible(loads, counts, capacity):
+            continue
+        candidate = Partition(graph, k, zip(names, parts))
+        if best is None or _cost(candidate) < _cost(best):
+            best = candidate
+    return best
+
+
+def _initial(graph, k, order):
+    """Cut a topological order into k consecutive runs of similar load."""
+    target = sum(graph.nodes.values()) / k
+    assignment, part, load = {}, 0, 0.0
+    for i, name in enumerate(order):
+        remaining = len(order) - i
+        # Move on when this part is full, but leave an operator for each
+        # remaining part
+        if part < k - 1 and load > 0 and (load + graph.nodes[name] / 2 > target or remaining <= k - 1 - part):
+            part, load = part + 1, 0.0
+        assignment[name] = part
+        load += graph.nodes[name]
+    return assignment
+
+
+def _refine(graph, k, assignment, capacity):
+    """Greedy single-operator moves while they lower the cost (FM style)."""
+    neighbors = {name: [] for name in graph.nodes}
+    for (u, v), edge in graph.edges.items():
+        neighbors[u].append((v, edge["bytes"]))
+        neighbors[v].append((u, edge["bytes"]))
+
+    loads, counts = [0.0] * k, [0] * k
+    for name, part in assignment.items():
+        loads[part] += graph.nodes[name]
+        counts[part] += 1
+
+    improved = True
+    while improved:
+        improved = False
+        for name in graph.nodes:
+            src = assignment[name]
+            if counts[src] == 1:
+                continue
+            weight = graph.nodes[name]
+            # Bytes to each part from this operator's neighbors
+            links = [0] * k
+            for other, nbytes in neighbors[name]:
+                links[assignment[other]] += nbytes
+            best_part, best_gain = None, (0, 0.0)
+            for dst in range(k):
+                if dst == src:
+                    continue
+                new_dst = loads[dst] + weight
+                if new_dst > capacity and new_dst > loads[src]:
+                    continue
+                cut_gain = links[dst] - links[src]
+                balance_gain = max(loads[src], loads[dst]) - max(loads[src] - weight, new_dst)
+                gain = (cut_gain, balance_gain)
+                if gain > best_gain:
+                    best_part, best_gain = dst, gain
+            if best_part is not None:
+                assignment[name] = best_part
+                loads[src] -= weight
+                loads[best_part] += weight
+                counts[src] -= 1
+                counts[best_part] += 1
+                improved = True
+    return assignment
+
+
+def partition_heuristic(graph, k, capacity, restarts=32, seed=0):
+    """Refine several topological-order splits and keep the best."""
+    rng = random.Random(seed)
+    best = None
+    for restart in range(restarts):
+        order = graph.topological_order(rng if restart else None)
+        assignment = _refine(graph, k, _initial(graph, k, order), capacity)
+        candidate = Partition(graph, k, assignment)
+        feasible = candidate.max_load <= capacity
+        key = (not feasible,) + _cost(candidate)
+        if best is None or key < best[0]:
+            best = (key, candidate)
+    return best[1]
+
+
+def partition(graph, k, max_imbalance=0.2, exact_limit=200000, restarts=32, seed=0):
+    """Split `graph` into `k` fragments.
+
+    Every fragment gets at least one operator and at most
+    `(1 + max_imbalance)` times the average compute load (relaxed to the
+    largest single operator if needed). Among those splits, the one with
+    the fewest bytes crossing fragments is returned. Small graphs are
+    solved exactly, larger ones with a refined greedy heuristic.
+    """
+    if not 1 <= k <= len(graph.nodes):
+        raise ValueError("k must be between 1 and the number of operators")
+    total = sum(graph.nodes.values())
+    capacity = max(total / k * (1.0 + max_imbalance), max(graph.nodes.values()))
+    if k ** (len(graph.nodes) - 1) <= exact_limit:
+        result = partition_exact(graph, k, capacity)
+        if result is not None:
+            return result
+    return partition_heuristic(graph, k, capacity, restarts=restarts, seed=seed)
+
+
+def synthetic_graph(n, seed=0, layers=None):
+    """Random layered DAG with log-normal compute times and message sizes."""
+    rng = random.Random(seed)
+    layers = layers or max(2, int(n ** 0.5))
+    graph = OperatorGraph()
+    layer_of = []
+    for i in range(n):
+        name = f"op{i:03d}"
+        graph.add_node(name, rng.lognormvariate(0.0, 1.0))
+        layer_of.append(min(layers - 1, i * layers // n))
+    for i in range(n):
+        later = [j for j in range(n) if layer_of[j] == layer_of[i] + 1]
+        for j in rng.sample(later, min(len(later), rng.randint(1, 2))):
+            nbytes = int(rng.lognormvariate(10.0, 2.5))
+            graph.add_edge(f"op{i:03d}", f"op{j:03d}", nbytes, {("out", "in")})
+    return graph
+
+
+def check_heuristic(trials=20, n=8, k=3, max_imbalance=0.2):
+    """Compare the heuristic with the exact search on random graphs.
+
+    Returns (number of graphs where the heuristic cut is optimal, list of
+    failures), where a failure is a seed for which the exact search found a
+    feasible split and the heuristic returned an infeasible one.
+    """
+    optimal, failures = 0, []
+    for seed in range(trials):
+        graph = synthetic_graph(n, seed=seed)
+        capacity = sum(graph.nodes.values()) / k * (1.0 + max_imbalance)
+        capacity = max(capacity, max(graph.nodes.values()))
+        exact = partition_exact(graph, k, capacity)
+        if exact is None:
+            continue
+        heuristic = partition_heuristic(graph, k, capacity, seed=seed)
+        if heuristic.max_load > capacity or min(
+            list(heuristic.assignment.values()).count(part) for part in range(k)
+        ) == 0:
+            failures.append(seed)
+        elif heuristic.cut_bytes <= exact.cut_bytes:
+            optimal += 1
+    return optimal, failures
+
+
+def describe(label, result):
+    print(
+        f"{label}: cut {result.cut_bytes} bytes/tick over {len(result.cut_edges)} edges, "
+        f"loads {[round(load, 2) for load in result.loads]} ms, imbalance {result.imbalance:.2f}"
+    )
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Cost-model-driven fragment partitioner")
+    parser.add_argument(
+        "--app",
+        type=str,
+        help='Application to partition, as "path/to/script.py:ClassName".',
+    )
+    parser.add_argument(
+        "--app_args",
+        type=str,
+        default="[]",
+        help="JSON list of positional arguments for the application constructor.",
+    )
+    parser.add_argument(
+        "--config",
+        type=str,
+        default=None,
+        help="YAML configuration file passed to app.config() before compose().",
+    )
+    parser.add_argument(
+        "--profile",
+        type=str,
+        default=None,
+        help="YAML profile with per-operator compute times and per-edge message sizes.",
+    )
+    parser.add_argument(
+        "--timings",
+        type=str,
+        default=None,
+        help="Chrome trace (or summary() dump) of flow_tracker/profiler.py giving compute times.",
+    )
+    parser.add_argument(
+        "--check",
+        type=int,
+        default=0,
+        help="Compare the heuristic with the exact search on this many random graphs.",
+    )
+    parser.add_argument(
+        "--synthetic",
+        type=int,
+        default=0,
+        help="Partition a random synthetic graph with this many operators instead of an application.",
+    )
+    parser.add_argument("-k", "--fragments", type=int, default=2, help="Number of fragments.")
+    parser.add_argument(
+        "--max_imbalance",
+        type=float,
+        default=0.2,
+        help="Allowed excess of the most loaded fragment over the average load.",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+    parser.add_argument(
+        "--emit",
+        type=str,
+        default="yaml",
+        help="Output format: yaml or code.",
+    )
+    args = parser.parse_args()
+    if args.emit not in ["yaml", "code"]:
+        raise ValueError("emit must be one of the following: yaml or code.")
+    if args.fragments < 1:
+        raise ValueError("fragments must be >= 1")
+
+    if args.check:
+        optimal, failures = check_heuristic(
+            args.check, k=args.fragments, max_imbalance=args.max_imbalance
+        )
+        print(f"heuristic cut optimal on {optimal} of {args.check} random graphs")
+        if failures:
+            raise SystemExit(f"heuristic split infeasible for seeds {failures}")
+    elif args.synthetic:
+        graph = synthetic_graph(args.synthetic, seed=args.seed)
+        capacity = sum(graph.nodes.values()) / args.fragments * (1.0 + args.max_imbalance)
+        capacity = max(capacity, max(graph.nodes.values()))
+        describe("heuristic", partition_heuristic(graph, args.fragments, capacity, seed=args.seed))
+        if args.fragments ** (args.synthetic - 1) <= 2000000:
+            exact = partition_exact(graph, args.fragments, capacity)
+            if exact is not None:
+                describe("exact    ", exact)
+    elif args.app:
+        app = load_app(args.app, json.loads(args.app_args), args.config)
+        graph = graph_from_app(app)
+        if args.profile:
+            with open(args.profile) as f:
+                graph.apply_profile(yaml.safe_load(f))
+        if args.timings:
+            missing = graph.apply_compute_times(load_compute_times(args.timings))
+            if missing:
+                print(f"# no timings for {', '.join(missing)}, using the profile")
+        result = partition(
+            graph, args.fragments, max_imbalance=args.max_imbalance, seed=args.seed
+        )
+        if args.emit == "yaml":
+            print(yaml.safe_dump(result.to_config(), sort_keys=False), end="")
+        else:
+            print(result.to_code(), end="")
+    else:
+        parser.error("one of --app or --synthetic is required")
@@ -0,0 +1,187 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+# Compute spent on branches that are thrown away: eager versus gated inputs.
+#
+# `num_branches` producers each do `work` FFTs per tick, and one message per
+# tick is forwarded, the branches taking turns:
+#
+#   eager: every producer runs every tick and EagerSelectOp receives all
+#          inputs, like MyOp in answers/ex1.py
+#   lazy:  producers gated by gate_branches(), so only the selected one runs
+#
+# Every run checks that each branch forwarded its share of the messages and
+# that no producer ticked more often than it was selected. The lazy pipeline
+# is also checked with the MultiThreadScheduler.
+#
+#   python benchmark_selector.py
+#   python benchmark_selector.py -n 4 --work 50
+
+import time
+from argparse import ArgumentParser
+
+import numpy as np
+from holoscan.conditions import CountCondition
+from holoscan.core import Application, Operator, OperatorSpec
+from holoscan.schedulers import GreedyScheduler, MultiThreadScheduler
+
+from selector import GatedProducer, SelectorOp, gate_branches
+
+
+class ProducerOp(Operator):
+    """Expensive source: `work` FFTs of 4096 points per tick."""
+
+    def __init__(self, fragment, *args, work=20, **kwargs):
+        self.work = work
+        self.signal = np.random.default_rng(0).standard_normal(4096)
+        self.ticks = 0
+        super().__init__(fragment, *args, **kwargs)
+
+    def setup(self, spec: OperatorSpec):
+        spec.output("out")
+
+    def compute(self, op_input, op_output, context):
+        for _ in range(self.work):
+            spectrum = np.fft.fft(self.signal)
+        self.ticks += 1
+        op_output.emit(float(abs(spectrum[1])), "out")
+
+
+class GatedProducerOp(GatedProducer, ProducerOp):
+    """ProducerOp whose ticks are handed out by a SelectorOp."""
+
+
+class EagerSelectOp(Operator):
+    """Receive every input and forward one, taking turns."""
+
+    def __init__(self, fragment, *args, num_branches=2, **kwargs):
+        self.num_branches = num_branches
+        self.index = 0
+        super().__init__(fragment, *args, **kwargs)
+
+    def setup(self, spec: OperatorSpec):
+        for branch in range(self.num_branches):
+            spec.input(f"in{branch}")
+        spec.output("out")
+
+    def compute(self, op_input, op_output, context):
+        values = [op_input.receive(f"in{branch}") for branch in range(self.num_branches)]
+        op_output.emit(values[self.index % self.num_branches], "out")
+        self.index += 1
+
+
+class SinkOp(Operator):
+    def __init__(self, fragment, *args, **kwargs):
+        self.received = 0
+        super().__init__(fragment, *args, **kwargs)
+
+    def setup(self, spec: OperatorSpec):
+        spec.input("in")
+
+    def compute(self, op_input, op_output, context):
+        op_input.receive("in")
+        self.received += 1
+
+
+class SelectApp(Application):
+    def __init__(self, *args, lazy=True, count=100, num_branches=2, work=20, **kwargs):
+        self.lazy = lazy
+        self.count = count
+        self.num_branches = num_branches
+        self.work = work
+        super().__init__(*args, **kwargs)
+
+    def compose(self):
+        n = self.num_branches
+        self.sink = SinkOp(self, name="sink")
+        if self.lazy:
+            self.producers = [
+                GatedProducerOp(self, work=self.work, name=f"producer{k}") for k in range(n)
+            ]
+            # Round robin for `count` ticks, then stop
+            self.selector = SelectorOp(
+                self,
+                num_branches=n,
+                select=lambda tick: tick % n if tick < self.count else None,
+                name="selector",
+            )
+            gate_branches(self, self.selector, self.producers)
+        else:
+            self.producers = [
+                ProducerOp(self, CountCondition(self, self.count), work=self.work, name=f"producer{k}")
+                for k in range(n)
+            ]
+            self.selector = EagerSelectOp(self, num_branches=n, name="selector")
+            for k, producer in enumerate(self.producers):
+                self.add_flow(producer, self.selector, {("out", f"in{k}")})
+        self.add_flow(self.selector, self.sink)
+
+
+def run(lazy, args, multithread=False):
+    app = SelectApp(lazy=lazy, count=args.count, num_branches=args.num_branches, work=args.work)
+    app.config("")
+    if multithread:
+        scheduler = MultiThreadScheduler(
+            app,
+            worker_thread_number=args.num_branches + 2,
+            stop_on_deadlock_timeout=500,
+            name="multithread_scheduler",
+        )
+    else:
+        scheduler = GreedyScheduler(app, name="greedy_scheduler")
+    app.scheduler(scheduler)
+    start = time.perf_counter()
+    app.run()
+    elapsed = time.perf_counter() - start
+    check(app, lazy, args)
+    return elapsed, sum(producer.ticks for producer in app.producers)
+
+
+def check(app, lazy, args):
+    """Raise if a branch forwarded the wrong number of messages."""
+    n = args.num_branches
+    if app.sink.received != args.count:
+        raise RuntimeError(f"sink received {app.sink.received} messages instead of {args.count}")
+    # Round robin: branch k is selected on ticks k, k + n, ...
+    expected = [len(range(k, args.count, n)) for k in range(n)]
+    ticks = [producer.ticks for producer in app.producers]
+    if lazy and (app.selector.selected != expected or ticks != expected):
+        raise RuntimeError(
+            f"forwarded {app.selector.selected} and produced {ticks} per branch, expected {expected}"
+        )
+    if not lazy and ticks != [args.count] * n:
+        raise RuntimeError(f"produced {ticks} per branch, expected {args.count} each")
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Benchmark gated selector inputs against eager receiving")
+    parser.add_argument("-c", "--count", type=int, default=200, help="Messages forwarded.")
+    parser.add_argument("-n", "--num_branches", type=int, default=2, help="Input branches.")
+    parser.add_argument("--work", type=int, default=20, help="FFTs per producer tick.")
+    args = parser.parse_args()
+
+    print(f"{args.num_branches} branches, {args.count} messages, {args.work} FFTs per producer tick")
+    results = {name: run(name == "lazy", args) for name in ("eager", "lazy")}
+    for name, (elapsed, ticks) in results.items():
+        print(f"{name:>6}: {elapsed * 1e3:>8.1f} ms, {ticks:>5} producer ticks")
+    print(f"speedup: {results['eager'][0] / results['lazy'][0]:.2f}x")
+    run(True, args, multithread=True)
+    print("per-branch counts checked with the greedy and multithread schedulers")
@@ -0,0 +1,170 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+# Selector operator whose unselected input branches are not computed.
+#
+# `MyOp` in answers/ex1.py has to receive both "in2" and "in3" on every tick
+# and forwards only one of them, so the producer of the other input does its
+# work for nothing. With `gate_branches()`, every branch producer gets a
+# BooleanCondition that keeps it from being scheduled, and SelectorOp hands
+# the tick from branch to branch:
+#
+#   1. only the producer of the selected branch is enabled; after its
+#      compute() it disables itself and enables the selector;
+#   2. the selector receives that branch's message, emits it on "out",
+#      calls `select(tick)` to choose the next branch, enables its producer
+#      and disables itself. Once `select()` returns None no producer is
+#      enabled any more, which ends the stream.
+#
+# So exactly one producer runs per tick. The selector's branch inputs have
+# no message condition, since only the selected one receives a message.
+# The selector is enabled at the end of the producer's compute(), before
+# the message is published: when it is scheduled in between (with the
+# MultiThreadScheduler), it finds no message and simply stays enabled.
+#
+# Producers are Python operators deriving from `GatedProducer`, which wraps
+# their compute() when the class is defined (Holoscan looks compute() up
+# once, when the operator is constructed). They must emit one message per
+# tick on the connected port.
+#
+#   class SourceOp(GatedProducer, Operator):
+#       ...
+#
+#   selector = SelectorOp(self, num_branches=2, select=lambda tick: tick % 2, name="selector")
+#   gate_branches(self, selector, [SourceOp(self, name="a"), SourceOp(self, name="b")])
+#   self.add_flow(selector, downstream)
+
+from holoscan.conditions import BooleanCondition
+from holoscan.core import ConditionType, Operator, OperatorSpec
+
+
+class GatedProducer:
+    """Mixin of the operators producing a SelectorOp branch, see gate_branches().
+
+    List it before the Operator base class. Outside of a gated branch the
+    operator behaves as usual.
+    """
+
+    _branch_gate = None
+    _selector_gate = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        compute = cls.compute
+        if getattr(compute, "_gated", False):
+            return
+
+        def gated_compute(self, op_input, op_output, context):
+            try:
+                return compute(self, op_input, op_output, context)
+            finally:
+                if self._branch_gate is not None:
+                    self._branch_gate.disable_tick()
+                    self._selector_gate.enable_tick()
+
+        gated_compute._gated = True
+        gated_compute.__wrapped__ = compute
+        gated_compute.__name__ = "compute"
+        cls.compute = gated_compute
+
+
+def _round_robin(num_branches):
+    return lambda tick: tick % num_branches
+
+
+class SelectorOp(Operator):
+    """Forward the message of one input branch per tick.
+
+    This operator has:
+        inputs: "in0" ... "in{num_branches - 1}"
+        outputs: "out"
+    `select(tick)` returns the branch whose message is forwarded on tick
+    `tick` (round robin by default), or None to stop. Branch producers are
+    connected and gated by `gate_branches()`.
+    """
+
+    def __init__(self, fragment, *args, num_branches=2, select=None, **kwargs):
+        if num_branches < 1:
+            raise ValueError("num_branches must be >= 1")
+        self.num_branches = num_branches
+        self.select = select or _round_robin(num_branches)
+        name = kwargs.get("name", "selector")
+        self.gate = BooleanCondition(fragment, enable_tick=False, name=f"{name}_gate")
+        self.branch_gates = [None] * num_branches
+        self.tick = 0
+        self.active = None
+        # Messages forwarded per branch
+        self.selected = [0] * num_branches
+
+        # Need to call the base class constructor last
+        super().__init__(fragment, self.gate, *args, **kwargs)
+
+    def setup(self, spec: OperatorSpec):
+        for branch in range(self.num_branches):
+            spec.input(f"in{branch}").condition(ConditionType.NONE)
+        spec.output("out")
+
+    def _activate(self):
+        """Enable the producer of the branch selected for the current tick."""
+        branch = self.select(self.tick)
+        if branch is None:
+            self.active = None
+            return
+        if not 0 <= branch < self.num_branches:
+            raise ValueError(f"{self.name}: select({self.tick}) returned {branch}")
+        self.active = branch
+        self.branch_gates[branch].enable_tick()
+
+    def compute(self, op_input, op_output, context):
+        message = op_input.receive(f"in{self.active}")
+        if message is None:
+            # Enabled by the producer, whose message is not published yet
+            return
+        self.gate.disable_tick()
+        op_output.emit(message, "out")
+        self.selected[self.active] += 1
+        self.tick += 1
+        self._activate()
+
+
+def gate_branches(app, selector, producers, ports=None):
+    """Connect `producers[k]` to input "in{k}" of `selector`, gated.
+
+    Producers must derive from GatedProducer. `ports[k]` is the output port
+    of producer k ("" for its only port). Only the producer of the branch
+    selected for the first tick starts enabled.
+    """
+    if len(producers) != selector.num_branches:
+        raise ValueError(
+            f"{selector.name} has {selector.num_branches} branches, got {len(producers)} producers"
+        )
+    ports = ports or [""] * len(producers)
+    for branch, (producer, port) in enumerate(zip(producers, ports)):
+        if not isinstance(producer, GatedProducer):
+            raise TypeError(f"{producer.name} must derive from GatedProducer")
+        gate = BooleanCondition(app, enable_tick=False, name=f"{producer.name}_gate")
+        producer.add_arg(gate)
+        producer._branch_gate = gate
+        producer._selector_gate = selector.gate
+        selector.branch_gates[branch] = gate
+        app.add_flow(producer, selector, {(port, f"in{branch}")})
+    selector._activate()
+
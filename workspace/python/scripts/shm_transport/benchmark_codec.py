@@ -0,0 +1,119 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+# Encode/decode time and encoded size of the codec versus pickle protocol 5
+# for typical messages of the tutorial applications.
+#
+# Like the codec, pickle is given a `buffer_callback`, so large array
+# buffers are passed out of band instead of being copied into the pickle;
+# sizes include those buffers.
+
+import pickle
+import timeit
+from argparse import ArgumentParser
+
+import numpy as np
+
+import codec
+
+
+class ValueData:
+    """Same class as in ping/ping.py"""
+
+    def __init__(self, value):
+        self.data = value
+
+
+class Detection:
+    """Example of a `__slots__` record"""
+
+    __slots__ = ("frame_id", "label", "score", "box")
+
+    def __init__(self, frame_id, label, score, box):
+        self.frame_id = frame_id
+        self.label = label
+        self.score = score
+        self.box = box
+
+
+codec.register_codec(ValueData, 1, lambda value: value.data, ValueData)
+codec.register_record(Detection, 2)
+
+
+def messages():
+    rng = np.random.default_rng(0)
+    return {
+        "int": 42,
+        "ValueData": ValueData(42),
+        "Detection": Detection(7, "person", 0.93, (10.0, 20.0, 110.0, 220.0)),
+        "list of floats": [float(x) for x in rng.random(100)],
+        "tensor dict": {
+            "person": rng.random((1, 16, 2), dtype=np.float32),
+            "faces": rng.random((1, 16, 2), dtype=np.float32),
+        },
+        "array 4 MB": rng.random(1 << 20, dtype=np.float32),
+        "frame 1.5 MB": np.zeros((544, 960, 3), dtype=np.uint8),
+    }
+
+
+def pickle_encode(obj):
+    buffers = []
+    data = pickle.dumps(obj, protocol=5, buffer_callback=buffers.append)
+    return data, [buffer.raw() for buffer in buffers]
+
+
+def measure(fn, number):
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Codec versus pickle benchmark")
+    parser.add_argument(
+        "-n",
+        "--number",
+        type=int,
+        default=2000,
+        help="Number of encode/decode calls per repetition.",
+    )
+    args = parser.parse_args()
+
+    print(
+        f"{'message':>15} {'codec B':>9} {'pickle B':>9} "
+        f"{'enc us':>8} {'pkl enc':>8} {'dec us':>8} {'pkl dec':>8}"
+    )
+    for name, obj in messages().items():
+        chunks = codec.encode(obj)
+        encoded = b"".join(chunks)
+        pickled, buffers = pickle_encode(obj)
+        pickled_size = len(pickled) + sum(buffer.nbytes for buffer in buffers)
+
+        # The codec result is a list of buffers referencing the arrays, so
+        # encoding time excludes the copy to the transport; decoding returns
+        # views of the received buffer
+        encode_us = measure(lambda: codec.encode(obj), args.number)
+        pickle_encode_us = measure(lambda: pickle_encode(obj), args.number)
+        decode_us = measure(lambda: codec.decode(encoded), args.number)
+        pickle_decode_us = measure(lambda: pickle.loads(pickled, buffers=buffers), args.number)
+
+        print(
+            f"{name:>15} {len(encoded):>9} {pickled_size:>9} "
+            f"{encode_us:>8.2f} {pickle_encode_us:>8.2f} {decode_us:>8.2f} {pickle_decode_us:>8.2f}"
+        )
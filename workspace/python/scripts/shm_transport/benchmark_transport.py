@@ -0,0 +1,136 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+# Inter-process throughput and latency of the shared memory channel versus
+# the TCP fallback, for payloads from 8 B to 64 MB. The receiver runs in a
+# second local process, like two fragments placed on the same host. The
+# sender runs flat out, so latencies include the time spent queued in the
+# channel.
+#
+# The shared memory segments live in /dev/shm: run containers with
+# `--ipc=host` (or a large `--shm-size`) for the biggest payloads.
+
+import multiprocessing
+import time
+from argparse import ArgumentParser
+
+import numpy as np
+
+from shm_transport import ShmChannel, SocketChannel
+
+
+def open_benchmark_channel(transport, size, create, port):
+    if transport == "shm":
+        # Deeper rings for small payloads, at most 256 MB of shared memory
+        num_slots = int(max(4, min(256, (256 << 20) // size)))
+        return ShmChannel(
+            f"holoscan_bench_{port}", create=create, num_slots=num_slots, slot_size=size
+        )
+    return SocketChannel("127.0.0.1", port, create=create)
+
+
+def receiver(transport, size, count, port, results):
+    channel = open_benchmark_channel(transport, size, False, port)
+    latencies = np.empty(count, dtype=np.int64)
+    start = None
+    for i in range(count):
+        message = channel.recv()
+        latencies[i] = time.monotonic_ns() - channel.last_stamp
+        if start is None:
+            start = time.perf_counter()
+        # Dropping the message hands a shared memory slot back to the sender
+        del message
+    elapsed = time.perf_counter() - start
+    channel.close()
+    results.put((elapsed, latencies))
+
+
+def run(transport, size, count, port):
+    results = multiprocessing.Queue()
+    process = multiprocessing.Process(
+        target=receiver, args=(transport, size, count, port, results)
+    )
+    process.start()
+    channel = open_benchmark_channel(transport, size, True, port)
+    payload = np.ones(size, dtype=np.uint8)
+    for _ in range(count):
+        channel.send(payload)
+    elapsed, latencies = results.get()
+    process.join()
+    channel.close()
+
+    # The first message includes connection setup, leave it out of the rate
+    rate = (count - 1) / elapsed if count > 1 and elapsed > 0 else float("nan")
+    return rate, rate * size / 1e9, np.percentile(latencies / 1e3, [50, 99])
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Shared memory versus socket transport benchmark")
+    parser.add_argument(
+        "--transports",
+        type=str,
+        default="shm,socket",
+        help="Comma-separated list of transports to measure: shm, socket.",
+    )
+    parser.add_argument(
+        "--max_size",
+        type=int,
+        default=64 << 20,
+        help="Largest payload in bytes. Sizes go from 8 B up to this value by factors of 8.",
+    )
+    parser.add_argument(
+        "--total_bytes",
+        type=int,
+        default=1 << 30,
+        help="Approximate number of bytes sent per measurement (at least 20 and at most 20000 messages).",
+    )
+    parser.add_argument(
+        "-p",
+        "--port",
+        type=int,
+        default=13380,
+        help="Base TCP port (also used to name the shared memory segments).",
+    )
+    args = parser.parse_args()
+
+    transports = args.transports.split(",")
+    for transport in transports:
+        if transport not in ["shm", "socket"]:
+            raise ValueError("transports must be a list of: shm, socket.")
+
+    sizes = []
+    size = 8
+    while size <= args.max_size:
+        sizes.append(size)
+        size *= 8
+    if sizes[-1] != args.max_size:
+        sizes.append(args.max_size)
+
+    print(f"{'transport':>9} {'size (B)':>10} {'msg/s':>10} {'GB/s':>8} {'p50 (us)':>10} {'p99 (us)':>10}")
+    port = args.port
+    for size in sizes:
+        count = int(min(20000, max(20, args.total_bytes // size)))
+        for transport in transports:
+            rate, throughput, (p50, p99) = run(transport, size, count, port)
+            port += 1
+            print(
+                f"{transport:>9} {size:>10} {rate:>10.0f} {throughput:>8.3f} {p50:>10.1f} {p99:>10.1f}"
+            )
@@ -0,0 +1,325 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+# Compact binary codec for messages crossing process boundaries.
+#
+# Scalars, strings, containers, NumPy scalars and arrays and registered types
+# are written as a type tag followed by a fixed-size header and, for arrays,
+# the raw array bytes. Contiguous arrays are not copied by `encode()`: the
+# result is a list of buffers that reference them, ready for `socket.sendmsg`
+# or a copy into shared memory. Types without a codec, and arrays of
+# structured dtypes, fall back to pickle.
+
+import pickle
+import struct
+
+import numpy as np
+
+# Type tags
+NONE, TRUE, FALSE, INT, BIGINT, FLOAT, COMPLEX, STR, BYTES = range(9)
+ARRAY, LIST, TUPLE, DICT, REGISTERED, PICKLE, FLOATS, INTS = range(9, 17)
+# NumPy scalar, encoded like a 0-d array
+SCALAR = 17
+
+TAG = struct.Struct("<B")
+LENGTH = struct.Struct("<I")
+INT64 = struct.Struct("<q")
+FLOAT64 = struct.Struct("<d")
+COMPLEX128 = struct.Struct("<dd")
+TYPE_ID = struct.Struct("<H")
+# dtype string, number of dimensions, number of bytes; the shape follows
+ARRAY_HEADER = struct.Struct("<16sBxxxxxxxQ")
+
+
+def plain_dtype(dtype):
+    """True if arrays of `dtype` can be described by the dtype string alone.
+
+    Structured and subarray dtypes lose their fields in `dtype.str` (they
+    become "|V<n>"), and the string must fit in the 16 byte header field.
+    """
+    return (
+        not dtype.hasobject
+        and dtype.fields is None
+        and dtype.subdtype is None
+        and len(dtype.str) <= 16
+    )
+
+
+# Array data is aligned so that decoded arrays are aligned views
+ALIGNMENT = 16
+PADDING = bytes(ALIGNMENT)
+
+# Arrays smaller than this are copied into the header buffer, since an extra
+# buffer costs more than the copy
+INLINE_ARRAY_BYTES = 512
+
+_codecs_by_type = {}
+_codecs_by_id = {}
+
+
+def register_codec(cls, type_id, encode, decode):
+    """Register a codec for instances of `cls`.
+
+    `encode(obj)` returns a value the codec already handles (a scalar, a
+    tuple, a dict of arrays, ...) and `decode(value)` rebuilds the object.
+    `type_id` identifies the type on the wire and must be the same on both
+    ends.
+    """
+    if not 0 <= type_id < 1 << 16:
+        raise ValueError("type_id must fit in 16 bits")
+    if type_id in _codecs_by_id and _codecs_by_id[type_id][0] is not cls:
+        raise ValueError(f"type_id {type_id} is already used by {_codecs_by_id[type_id][0]}")
+    _codecs_by_type[cls] = (type_id, encode)
+    _codecs_by_id[type_id] = (cls, decode)
+
+
+def register_record(cls, type_id):
+    """Register a `__slots__` class, encoded as the tuple of its slots."""
+    slots = tuple(name for name in cls.__slots__ if name != "__weakref__")
+
+    def encode(obj):
+        return tuple(getattr(obj, name) for name in slots)
+
+    def decode(values):
+        obj = cls.__new__(cls)
+        for name, value in zip(slots, values):
+            setattr(obj, name, value)
+        return obj
+
+    register_codec(cls, type_id, encode, decode)
+
+
+class _Encoder:
+    __slots__ = ("chunks", "header", "offset")
+
+    def __init__(self):
+        self.chunks = []
+        self.header = bytearray()
+        # Bytes already moved to `chunks`
+        self.offset = 0
+
+    def buffer(self, data):
+        """Append a large buffer without copying it."""
+        if self.header:
+            self.chunks.append(self.header)
+            self.offset += len(self.header)
+            self.header = bytearray()
+        self.chunks.append(data)
+        self.offset += data.nbytes
+
+    def align(self):
+        self.header += PADDING[: -(self.offset + len(self.header)) % ALIGNMENT]
+
+    def encode(self, obj):
+        header = self.header
+        cls = type(obj)
+        if obj is None:
+            header += TAG.pack(NONE)
+        elif cls is bool:
+            header += TAG.pack(TRUE if obj else FALSE)
+        elif cls is int:
+            if -(1 << 63) <= obj < 1 << 63:
+                header += TAG.pack(INT) + INT64.pack(obj)
+            else:
+                data = obj.to_bytes((obj.bit_length() + 8) // 8, "little", signed=True)
+                header += TAG.pack(BIGINT) + LENGTH.pack(len(data)) + data
+        elif cls is float:
+            header += TAG.pack(FLOAT) + FLOAT64.pack(obj)
+        elif cls is complex:
+            header += TAG.pack(COMPLEX) + COMPLEX128.pack(obj.real, obj.imag)
+        elif cls is str:
+            data = obj.encode()
+            header += TAG.pack(STR) + LENGTH.pack(len(data)) + data
+        elif cls is bytes or cls is bytearray:
+            header += TAG.pack(BYTES) + LENGTH.pack(len(obj)) + obj
+        elif isinstance(obj, np.ndarray) and plain_dtype(obj.dtype):
+            self.encode_array(obj)
+        elif isinstance(obj, np.generic) and plain_dtype(obj.dtype):
+            self.encode_array(np.asarray(obj), SCALAR)
+        elif cls is list and obj and all(type(item) is float for item in obj):
+            # Lists of numbers are packed in one call instead of item by item
+            header += TAG.pack(FLOATS) + LENGTH.pack(len(obj)) + struct.pack(f"<{len(obj)}d", *obj)
+        elif cls is list and obj and all(type(item) is int for item in obj):
+            try:
+                data = struct.pack(f"<{len(obj)}q", *obj)
+            except struct.error:
+                data = None
+            if data is not None:
+                header += TAG.pack(INTS) + LENGTH.pack(len(obj)) + data
+            else:
+                header += TAG.pack(LIST) + LENGTH.pack(len(obj))
+                for item in obj:
+                    self.encode(item)
+        elif cls is list or cls is tuple:
+            header += TAG.pack(LIST if cls is list else TUPLE) + LENGTH.pack(len(obj))
+            for item in obj:
+                self.encode(item)
+        elif cls is dict:
+            header += TAG.pack(DICT) + LENGTH.pack(len(obj))
+            for key, value in obj.items():
+                self.encode(key)
+                self.encode(value)
+        elif cls in _codecs_by_type:
+            type_id, encode = _codecs_by_type[cls]
+            header += TAG.pack(REGISTERED) + TYPE_ID.pack(type_id)
+            self.encode(encode(obj))
+        else:
+            data = pickle.dumps(obj, protocol=5)
+            header += TAG.pack(PICKLE) + LENGTH.pack(len(data)) + data
+
+    def encode_array(self, array, tag=ARRAY):
+        if not plain_dtype(array.dtype):
+            raise ValueError(f"dtype {array.dtype} cannot be encoded as a plain array")
+        if array.dtype.byteorder == ">":
+            array = array.astype(array.dtype.newbyteorder("<"))
+        if not array.flags.c_contiguous:
+            array = array.copy(order="C")
+        self.header += TAG.pack(tag)
+        self.header += ARRAY_HEADER.pack(array.dtype.str.encode(), array.ndim, array.nbytes)
+        self.header += struct.pack(f"<{array.ndim}q", *array.shape)
+        self.align()
+        data = array.reshape(-1).view(np.uint8)
+        if array.nbytes < INLINE_ARRAY_BYTES:
+            self.header += memoryview(data)
+        else:
+            self.buffer(data)
+
+    def finish(self):
+        if self.header:
+            self.chunks.append(self.header)
+        return self.chunks
+
+
+def encode(obj):
+    """Encode `obj` into a list of buffers.
+
+    Contiguous arrays are referenced, not copied, so the buffers must be
+    written out before the arrays are modified.
+    """
+    encoder = _Encoder()
+    encoder.encode(obj)
+    return encoder.finish()
+
+
+def encoded_size(chunks):
+    return sum(memoryview(chunk).nbytes for chunk in chunks)
+
+
+def encode_into(obj, buffer):
+    """Encode `obj` into a writable buffer and return the number of bytes."""
+    view = memoryview(buffer).cast("B")
+    offset = 0
+    for chunk in encode(obj):
+        chunk = memoryview(chunk).cast("B")
+        view[offset : offset + chunk.nbytes] = chunk
+        offset += chunk.nbytes
+    return offset
+
+
+class _Decoder:
+    __slots__ = ("data", "array", "view", "offset")
+
+    def __init__(self, data):
+        self.data = data
+        self.array = None
+        self.view = memoryview(data).cast("B")
+        self.offset = 0
+
+    def unpack(self, fmt):
+        values = fmt.unpack_from(self.view, self.offset)
+        self.offset += fmt.size
+        return values
+
+    def raw(self, n):
+        data = self.view[self.offset : self.offset + n]
+        self.offset += n
+        return data
+
+    def decode(self):
+        (tag,) = self.unpack(TAG)
+        if tag == NONE:
+            return None
+        if tag == TRUE:
+            return True
+        if tag == FALSE:
+            return False
+        if tag == INT:
+            return self.unpack(INT64)[0]
+        if tag == BIGINT:
+            (n,) = self.unpack(LENGTH)
+            return int.from_bytes(self.raw(n), "little", signed=True)
+        if tag == FLOAT:
+            return self.unpack(FLOAT64)[0]
+        if tag == COMPLEX:
+            return complex(*self.unpack(COMPLEX128))
+        if tag == STR:
+            (n,) = self.unpack(LENGTH)
+            return str(self.raw(n), "utf-8")
+        if tag == BYTES:
+            (n,) = self.unpack(LENGTH)
+            return bytes(self.raw(n))
+        if tag == ARRAY:
+            return self.decode_array()
+        if tag == SCALAR:
+            return self.decode_array()[()]
+        if tag == LIST or tag == TUPLE:
+            (n,) = self.unpack(LENGTH)
+            items = [self.decode() for _ in range(n)]
+            return items if tag == LIST else tuple(items)
+        if tag == FLOATS or tag == INTS:
+            (n,) = self.unpack(LENGTH)
+            values = struct.unpack_from(f"<{n}{'d' if tag == FLOATS else 'q'}", self.view, self.offset)
+            self.offset += 8 * n
+            return list(values)
+        if tag == DICT:
+            (n,) = self.unpack(LENGTH)
+            return {self.decode(): self.decode() for _ in range(n)}
+        if tag == REGISTERED:
+            (type_id,) = self.unpack(TYPE_ID)
+            if type_id not in _codecs_by_id:
+                raise KeyError(f"no codec registered for type id {type_id}")
+            return _codecs_by_id[type_id][1](self.decode())
+        if tag == PICKLE:
+            (n,) = self.unpack(LENGTH)
+            return pickle.loads(self.raw(n))
+        raise ValueError(f"unknown type tag {tag}")
+
+    def decode_array(self):
+        dtype, ndim, nbytes = self.unpack(ARRAY_HEADER)
+        shape = struct.unpack_from(f"<{ndim}q", self.view, self.offset)
+        self.offset += 8 * ndim
+        self.offset += -self.offset % ALIGNMENT
+        if self.array is None:
+            # Arrays are sliced out of the input, so an ndarray subclass (such
+            # as a shared memory SlotArray) is kept alive by every array
+            data = self.data
+            self.array = data if isinstance(data, np.ndarray) else np.frombuffer(data, np.uint8)
+        data = self.array[self.offset : self.offset + nbytes]
+        self.offset += nbytes
+        return data.view(np.dtype(dtype.rstrip(b"\0").decode())).reshape(shape)
+
+
+def decode(data):
+    """Decode a message produced by `encode()`.
+
+    Arrays are returned as views of `data` (no copy).
+    """
+    return _Decoder(data).decode()
@@ -0,0 +1,61 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+
+# NumPy arrays lent out of a buffer pool.
+#
+# Shared memory slots (shm_transport.py) and ring blocks of the UDP source
+# (../udp_ingest/udp_source.py) are handed to consumers as array views, and
+# go back to their pool once no view of them is left:
+#
+#   array = leased(np.ndarray(shape, dtype, buffer=...), partial(pool.free, index))
+
+import numpy as np
+
+
+class LeasedArray(np.ndarray):
+    """NumPy array viewing a buffer lent by a pool.
+
+    Every view derived from the array keeps a reference to the lease, so
+    the buffer is handed back only once the last view is garbage collected.
+    """
+
+    def __array_finalize__(self, obj):
+        self._lease = getattr(obj, "_lease", None)
+
+
+class _Lease:
+    """Reference held by every LeasedArray view of a buffer."""
+
+    __slots__ = ("release",)
+
+    def __init__(self, release):
+        self.release = release
+
+    def __del__(self):
+        self.release()
+
+
+def leased(array, release):
+    """View `array` as a LeasedArray, calling `release()` after its last view."""
+    view = array.view(LeasedArray)
+    view._lease = _Lease(release)
+    return view
@@ -0,0 +1,133 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+# Same pipeline as answers/ex6.py, but the two halves run as separate local
+# processes connected by a shared memory channel instead of the network path
+# used between fragments. Start the receiver and the transmitter in two
+# terminals:
+#
+#   python shm_ping.py --role rx
+#   python shm_ping.py --role tx
+
+import os
+from argparse import ArgumentParser
+
+from holoscan.conditions import CountCondition
+from holoscan.core import Application, Operator, OperatorSpec
+from holoscan.operators import PingRxOp, PingTxOp
+
+from shm_transport import open_channel
+
+
+class ChannelTxOp(Operator):
+    """Send every received message through a channel.
+
+    This operator has:
+        inputs: "in"
+    """
+
+    def __init__(self, fragment, *args, channel_args=None, **kwargs):
+        self.channel_args = channel_args or {}
+        self.channel = None
+        # Need to call the base class constructor last
+        super().__init__(fragment, *args, **kwargs)
+
+    def setup(self, spec: OperatorSpec):
+        spec.input("in")
+
+    def start(self):
+        self.channel = open_channel(create=True, **self.channel_args)
+
+    def stop(self):
+        self.channel.close()
+
+    def compute(self, op_input, op_output, context):
+        self.channel.send(op_input.receive("in"))
+
+
+class ChannelRxOp(Operator):
+    """Emit the messages arriving on a channel.
+
+    This operator has:
+        outputs: "out"
+    Arrays sent through a shared memory channel are emitted as views of the
+    shared memory slot, without copying.
+    """
+
+    def __init__(self, fragment, *args, channel_args=None, timeout=10.0, **kwargs):
+        self.channel_args = channel_args or {}
+        self.timeout = timeout
+        self.channel = None
+        # Need to call the base class constructor last
+        super().__init__(fragment, *args, **kwargs)
+
+    def setup(self, spec: OperatorSpec):
+        spec.output("out")
+
+    def start(self):
+        self.channel = open_channel(create=False, **self.channel_args)
+
+    def stop(self):
+        self.channel.close()
+
+    def compute(self, op_input, op_output, context):
+        message = self.channel.recv(timeout=self.timeout)
+        if message is None:
+            raise TimeoutError(f"{self.name}: no message received in {self.timeout} s")
+        op_output.emit(message, "out")
+
+
+class PingTxApp(Application):
+    def compose(self):
+        # Configure the operators. Here we use CountCondition to terminate
+        # execution after a specific number of messages have been sent.
+        tx = PingTxOp(self, CountCondition(self, 10), name="tx")
+        channel_tx = ChannelTxOp(self, channel_args=self.kwargs("channel"), name="channel_tx")
+
+        self.add_flow(tx, channel_tx)
+
+
+class PingRxApp(Application):
+    def compose(self):
+        # The receiver ticks once per message sent by PingTxApp
+        channel_rx = ChannelRxOp(
+            self, CountCondition(self, 10), channel_args=self.kwargs("channel"), name="channel_rx"
+        )
+        rx = PingRxOp(self, name="rx")
+
+        self.add_flow(channel_rx, rx)
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Shared memory ping example")
+    parser.add_argument(
+        "--role",
+        type=str,
+        required=True,
+        help="Which half of the application to run: tx or rx.",
+    )
+    args = parser.parse_args()
+    if args.role not in ["tx", "rx"]:
+        raise ValueError("role must be one of the following: tx or rx.")
+
+    app = PingTxApp() if args.role == "tx" else PingRxApp()
+    app.config(os.path.join(os.path.dirname(__file__), "shm_ping.yaml"))
+    app.run()
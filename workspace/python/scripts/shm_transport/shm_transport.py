@@ -0,0 +1,420 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import platform
+import socket
+import struct
+import time
+import warnings
+from functools import partial
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+import codec
+from lease import LeasedArray, leased
+
+# Slot states. The producer only moves a slot from FREE to READY and the
+# consumer only moves it from READY to BUSY and from BUSY back to FREE, so
+# a single producer and a single consumer never need a lock between them.
+FREE, READY, BUSY = 0, 1, 2
+
+# Memory ordering: a slot is published with plain stores, the payload and
+# control block first and the state last, and the consumer reads them in the
+# opposite order. This relies on the stores of one process becoming visible
+# to the other in program order, which x86-64 guarantees (total store order).
+# Weakly ordered CPUs, such as the ARM cores of Jetson and IGX, may reorder
+# them, and Python offers no portable memory fence, so the consumer could see
+# READY before the payload. There, open_channel() uses the TCP channel unless
+# shared memory is forced.
+STRONG_ORDERING = platform.machine().lower() in ("x86_64", "amd64", "i386", "i686", "x86")
+
+# Payload kinds
+ARRAY, CODEC = 0, 1
+
+MAX_NDIM = 8
+
+# Per-slot control block, stored in the shared memory segment
+SLOT_META = np.dtype(
+    [
+        ("state", "<i8"),
+        ("seq", "<u8"),
+        ("kind", "<i8"),
+        ("nbytes", "<u8"),
+        ("stamp", "<i8"),
+        ("ndim", "<i8"),
+        ("dtype", "S16"),
+        ("shape", "<i8", (MAX_NDIM,)),
+    ]
+)
+
+HEADER = struct.Struct("<8sQQ")
+MAGIC = b"HSSHMRB1"
+ALIGNMENT = 64
+
+# Frame header used on sockets, carrying the same fields as SLOT_META
+FRAME = struct.Struct(f"<qQqq16s{MAX_NDIM}q")
+
+
+def _align(n):
+    return (n + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _wait(predicate, timeout, spin=1000, interval=50e-6):
+    """Poll `predicate` until it is true, spinning first then sleeping."""
+    for _ in range(spin):
+        if predicate():
+            return True
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while not predicate():
+        if deadline is not None and time.monotonic() > deadline:
+            return False
+        time.sleep(interval)
+    return True
+
+
+def _describe(obj):
+    """Return (kind, array) for plain arrays and (kind, buffers) otherwise."""
+    if isinstance(obj, np.ndarray) and obj.ndim <= MAX_NDIM and codec.plain_dtype(obj.dtype):
+        return ARRAY, obj if obj.flags.c_contiguous else obj.copy(order="C")
+    return CODEC, codec.encode(obj)
+
+
+def _open_untracked(name):
+    """Attach to an existing segment without registering it for cleanup.
+
+    Only the producer owns (and unlinks) the segment. Before Python 3.13 the
+    resource tracker registers every attached segment and would unlink it
+    when the consumer exits, so registration is skipped for the attach.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        pass
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args, **kwargs: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+# Arrays received from a channel are views of its slots
+SlotArray = LeasedArray
+
+
+class ShmChannel:
+    """Single-producer/single-consumer ring of shared memory slots.
+
+    The producer (`create=True`) creates a POSIX shared memory segment with
+    `num_slots` slots of `slot_size` bytes, the consumer attaches to it by
+    name. Arrays are received as views into the segment (no copy); other
+    objects are written with the codec, and arrays inside them are views of
+    the slot as well.
+    """
+
+    def __init__(self, name, create=False, num_slots=4, slot_size=1 << 20, timeout=10.0):
+        if not STRONG_ORDERING:
+            warnings.warn(
+                f"ShmChannel on {platform.machine()}: slots are published without memory "
+                "fences, which is only safe on x86-64",
+                RuntimeWarning,
+                stacklevel=2,
+            )
+        self.name = name
+        self.create = create
+        self.seq = 0
+        self.last_stamp = 0
+
+        if create:
+            slot_size = _align(slot_size)
+            meta_offset = _align(HEADER.size)
+            data_offset = _align(meta_offset + num_slots * SLOT_META.itemsize)
+            self.shm = shared_memory.SharedMemory(
+                name=name, create=True, size=data_offset + num_slots * slot_size
+            )
+            HEADER.pack_into(self.shm.buf, 0, MAGIC, num_slots, slot_size)
+        else:
+            self.shm = self._attach(name, timeout)
+            _, num_slots, slot_size = HEADER.unpack_from(self.shm.buf, 0)
+            meta_offset = _align(HEADER.size)
+            data_offset = _align(meta_offset + num_slots * SLOT_META.itemsize)
+
+        self.num_slots = num_slots
+        self.slot_size = slot_size
+        self.data_offset = data_offset
+        # A new segment is zero-filled, so every slot starts out FREE
+        self.meta = np.ndarray(num_slots, dtype=SLOT_META, buffer=self.shm.buf, offset=meta_offset)
+        # Field views of the control blocks, indexed by slot
+        self.state = self.meta["state"]
+        self.seqs = self.meta["seq"]
+
+    @staticmethod
+    def _attach(name, timeout):
+        segment = []
+
+        def attach():
+            if not segment:
+                try:
+                    segment.append(_open_untracked(name))
+                except (FileNotFoundError, ValueError):
+                    # Not created yet, or not sized yet (empty file)
+                    return False
+            # The producer writes the header right after creating the segment
+            return HEADER.unpack_from(segment[0].buf, 0)[0] == MAGIC
+
+        if not _wait(attach, timeout, spin=0, interval=0.01):
+            raise TimeoutError(f"shared memory segment {name!r} was not created")
+        return segment[0]
+
+    def _data(self, slot, nbytes):
+        offset = self.data_offset + slot * self.slot_size
+        return self.shm.buf[offset : offset + nbytes]
+
+    # Producer side
+
+    def acquire(self, shape, dtype, timeout=None):
+        """Return a writable array in the next free slot.
+
+        Fill it in place and call `commit()` to publish it. This is the
+        zero-copy path for producers that can build their output directly
+        in shared memory.
+        """
+        dtype = np.dtype(dtype)
+        nbytes = int(np.prod(shape)) * dtype.itemsize
+        slot = self._reserve(nbytes, timeout)
+        self._pending = (slot, ARRAY, nbytes, dtype, tuple(shape))
+        return np.ndarray(shape, dtype=dtype, buffer=self._data(slot, nbytes))
+
+    def commit(self):
+        slot, kind, nbytes, dtype, shape = self._pending
+        self._pending = None
+        self._publish(slot, kind, nbytes, dtype, shape)
+
+    def send(self, obj, timeout=None):
+        kind, payload = _describe(obj)
+        nbytes = payload.nbytes if kind == ARRAY else codec.encoded_size(payload)
+        slot = self._reserve(nbytes, timeout)
+        if kind == ARRAY:
+            dst = np.ndarray(payload.shape, dtype=payload.dtype, buffer=self._data(slot, nbytes))
+            np.copyto(dst, payload)
+            self._publish(slot, ARRAY, nbytes, payload.dtype, payload.shape)
+        else:
+            offset = 0
+            data = self._data(slot, nbytes)
+            for chunk in payload:
+                chunk = memoryview(chunk).cast("B")
+                data[offset : offset + chunk.nbytes] = chunk
+                offset += chunk.nbytes
+            self._publish(slot, CODEC, nbytes, None, ())
+
+    def _reserve(self, nbytes, timeout):
+        if nbytes > self.slot_size:
+            raise ValueError(f"payload of {nbytes} bytes exceeds slot size {self.slot_size}")
+        slot = self.seq % self.num_slots
+        state = self.state
+        if not _wait(lambda: state[slot] == FREE, timeout):
+            raise TimeoutError(f"{self.name}: no free slot (consumer too slow)")
+        return slot
+
+    def _publish(self, slot, kind, nbytes, dtype, shape):
+        meta = self.meta
+        meta["kind"][slot] = kind
+        meta["nbytes"][slot] = nbytes
+        meta["ndim"][slot] = len(shape)
+        meta["shape"][slot, : len(shape)] = shape
+        meta["dtype"][slot] = b"" if dtype is None else dtype.str.encode()
+        meta["stamp"][slot] = time.monotonic_ns()
+        self.seqs[slot] = self.seq
+        # Publishing the state last makes the slot visible to the consumer
+        self.state[slot] = READY
+        self.seq += 1
+
+    # Consumer side
+
+    def recv(self, timeout=None):
+        """Return the next message, or None if `timeout` expires.
+
+        Arrays are returned as SlotArray views of the shared memory slot.
+        """
+        slot = self.seq % self.num_slots
+        state, seqs, seq = self.state, self.seqs, self.seq
+        if not _wait(lambda: state[slot] == READY and seqs[slot] == seq, timeout):
+            return None
+        state[slot] = BUSY
+        self.seq += 1
+
+        meta = self.meta
+        self.last_stamp = int(meta["stamp"][slot])
+        nbytes = int(meta["nbytes"][slot])
+        if meta["kind"][slot] == CODEC:
+            # Arrays in the message are views of `data` and hold the lease
+            data = np.ndarray((nbytes,), dtype=np.uint8, buffer=self._data(slot, nbytes))
+            return codec.decode(leased(data, partial(self._release, slot)))
+
+        shape = tuple(int(n) for n in meta["shape"][slot, : int(meta["ndim"][slot])])
+        dtype = np.dtype(meta["dtype"][slot].decode())
+        array = np.ndarray(shape, dtype=dtype, buffer=self._data(slot, nbytes))
+        return leased(array, partial(self._release, slot))
+
+    def _release(self, slot):
+        if self.shm is not None:
+            self.state[slot] = FREE
+
+    def close(self):
+        if self.shm is None:
+            return
+        shm, self.shm = self.shm, None
+        self.meta = self.state = self.seqs = None
+        try:
+            shm.close()
+        except BufferError:
+            # SlotArray views are still alive, the mapping goes away with them
+            pass
+        if self.create:
+            shm.unlink()
+
+
+class SocketChannel:
+    """TCP fallback with the same interface as ShmChannel.
+
+    The consumer listens on `listen_host:port` (only local connections by
+    default) and the producer connects to `host:port`. Arrays are sent
+    straight from their buffer and received into a new array.
+    """
+
+    def __init__(self, host, port, create=False, timeout=10.0, listen_host="127.0.0.1"):
+        self.create = create
+        self.seq = 0
+        self.last_stamp = 0
+        self.header = bytearray(FRAME.size)
+        # Header bytes received by a recv() that timed out
+        self.header_bytes = 0
+        if create:
+            deadline = time.monotonic() + timeout
+            while True:
+                try:
+                    self.sock = socket.create_connection((host, port), timeout=timeout)
+                    break
+                except ConnectionRefusedError:
+                    if time.monotonic() > deadline:
+                        raise
+                    time.sleep(0.01)
+        else:
+            with socket.create_server((listen_host, port)) as server:
+                server.settimeout(timeout)
+                self.sock, _ = server.accept()
+        self.sock.settimeout(None)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def send(self, obj, timeout=None):
+        kind, payload = _describe(obj)
+        if kind == ARRAY:
+            shape = payload.shape + (0,) * (MAX_NDIM - payload.ndim)
+            header = FRAME.pack(
+                kind, payload.nbytes, time.monotonic_ns(), payload.ndim,
+                payload.dtype.str.encode(), *shape,
+            )
+            self.sock.sendall(header)
+            self.sock.sendall(payload.reshape(-1).view(np.uint8))
+        else:
+            header = FRAME.pack(
+                kind, codec.encoded_size(payload), time.monotonic_ns(), 0, b"", *(0,) * MAX_NDIM
+            )
+            self.sock.sendall(header)
+            for chunk in payload:
+                self.sock.sendall(chunk)
+        self.seq += 1
+
+    def _recv_into(self, view):
+        while len(view):
+            n = self.sock.recv_into(view)
+            if n == 0:
+                raise ConnectionError("socket closed by peer")
+            view = view[n:]
+
+    def recv(self, timeout=None):
+        # The timeout only applies to the header, which is kept across calls
+        # when it times out halfway. The payload is read blocking.
+        self.sock.settimeout(timeout)
+        try:
+            while self.header_bytes < FRAME.size:
+                n = self.sock.recv_into(memoryview(self.header)[self.header_bytes :])
+                if n == 0:
+                    raise ConnectionError("socket closed by peer")
+                self.header_bytes += n
+        except socket.timeout:
+            return None
+        finally:
+            self.sock.settimeout(None)
+        self.header_bytes = 0
+        kind, nbytes, stamp, ndim, dtype, *shape = FRAME.unpack(self.header)
+        self.last_stamp = stamp
+        self.seq += 1
+        if kind == CODEC:
+            payload = bytearray(nbytes)
+            self._recv_into(memoryview(payload))
+            return codec.decode(payload)
+        array = np.empty(shape[:ndim], dtype=np.dtype(dtype.rstrip(b"\0").decode()))
+        self._recv_into(memoryview(array.reshape(-1).view(np.uint8)))
+        return array
+
+    def close(self):
+        self.sock.close()
+
+
+def same_host(host1, host2):
+    """Return True if both host names resolve to the same machine."""
+
+    def addresses(host):
+        if host in ("", "localhost", "127.0.0.1", "::1"):
+            host = socket.gethostname()
+        try:
+            return set(socket.gethostbyname_ex(host)[2])
+        except socket.gaierror:
+            return {host}
+
+    return bool(addresses(host1) & addresses(host2))
+
+
+def open_channel(
+    name,
+    create,
+    tx_host="localhost",
+    rx_host="localhost",
+    port=13370,
+    force_shm=False,
+    listen_host="127.0.0.1",
+    **kwargs,
+):
+    """Open a shared memory channel when both ends run on the same host.
+
+    Both ends pass the same `tx_host`/`rx_host` pair, so they agree on the
+    transport. Across hosts, and on CPUs without strong store ordering
+    unless `force_shm` is set (see STRONG_ORDERING), a SocketChannel
+    connecting to `rx_host:port` is used instead, the consumer listening on
+    `listen_host` (set it to the address of `rx_host`, or "0.0.0.0", across
+    hosts). `create` is True for the producer.
+    """
+    if same_host(tx_host, rx_host) and (STRONG_ORDERING or force_shm):
+        return ShmChannel(name, create=create, **kwargs)
+    timeout = kwargs.get("timeout", 10.0)
+    return SocketChannel(rx_host, port, create=create, timeout=timeout, listen_host=listen_host)
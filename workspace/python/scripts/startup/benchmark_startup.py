@@ -0,0 +1,212 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+# Cold start benchmark of the tutorial applications.
+#
+# Each application is started in a fresh interpreter and the time from launch
+# until the first message has gone through all of its Python operators is
+# split into:
+#   interpreter  process launch until this script runs
+#   import       executing the application module and its imports
+#   create       constructing and configuring the Application
+#   compose      compose(), including imports deferred to it
+#   init         graph initialization until the first compute() starts
+#               (GXF setup, engine loading, ...)
+#   first msg    first compute() start until every Python operator has
+#               computed once
+# The child process exits as soon as the first message is through, so
+# long-running applications do not need to finish.
+#
+#   python benchmark_startup.py                  # all applications
+#   python benchmark_startup.py ping tracker -n 5
+#
+# Operators implemented in C++ cannot be instrumented, so for the PeopleNet
+# application "first msg" ends at the postprocessor.
+
+import time
+
+# As early as possible, to measure the interpreter startup
+_RUNNING = time.time()
+
+import importlib.util
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+from argparse import SUPPRESS, ArgumentParser
+
+SCRIPTS = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# name: (script, application class, positional arguments, keyword arguments,
+# config file), paths relative to the scripts directory
+APPS = {
+    "ping": ("ping/ping.py", "MyPingApp", [], {}, "ping/ping.yaml"),
+    "fft": ("answers/ex3.py", "FFTApp", [], {}, ""),
+    "tracker": (
+        "flow_tracker/parallel_ping.py",
+        "ParallelPingApp",
+        [],
+        {"num_delays": 4, "delay": 0.0, "delay_step": 0.0},
+        "",
+    ),
+    "peoplenet": (
+        "tao_peoplenet/peoplenet_app.py",
+        "PeopleAndFaceDetectApp",
+        ["tao_peoplenet/data/", "tao_peoplenet/data/resnet34_peoplenet_int8.onnx"],
+        {},
+        "tao_peoplenet/tao_peoplenet.yaml",
+    ),
+}
+
+PHASES = ("interpreter", "import", "create", "compose", "init", "first msg")
+
+
+def _report(stamps):
+    print(json.dumps(stamps), flush=True)
+    # Skip the rest of the run and the teardown
+    os._exit(0)
+
+
+def _instrument(module, stamps):
+    """Record the first compute() of every Python operator of `module`."""
+    from holoscan.core import Operator
+
+    lock = threading.Lock()
+    pending = set()
+    classes = {
+        obj
+        for obj in vars(module).values()
+        if isinstance(obj, type) and issubclass(obj, Operator) and "compute" in vars(obj)
+    }
+
+    def wrap(cls):
+        compute = cls.compute
+
+        def timed_compute(self, op_input, op_output, context):
+            with lock:
+                stamps.setdefault("first_compute", time.time())
+            try:
+                return compute(self, op_input, op_output, context)
+            finally:
+                with lock:
+                    pending.discard(id(self))
+                    if not pending:
+                        stamps["first_message"] = time.time()
+                        _report(stamps)
+
+        cls.compute = timed_compute
+
+    for cls in classes:
+        wrap(cls)
+    return classes, pending
+
+
+def run_child(name):
+    """Start application `name` and print the timestamps of its phases."""
+    path, class_name, args, kwargs, config = APPS[name]
+    path = os.path.join(SCRIPTS, path)
+    stamps = {"launched": float(os.environ.get("STARTUP_LAUNCHED", _RUNNING)), "running": _RUNNING}
+
+    # Applications import their sibling modules
+    sys.path.insert(0, os.path.dirname(path))
+    spec = importlib.util.spec_from_file_location(f"startup_{name}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    stamps["imported"] = time.time()
+
+    classes, pending = _instrument(module, stamps)
+    base = getattr(module, class_name)
+
+    class TimedApp(base):
+        def compose(self):
+            stamps["compose_start"] = time.time()
+            super().compose()
+            for op in self.graph.get_nodes():
+                if type(op) in classes:
+                    pending.add(id(op))
+            stamps["composed"] = time.time()
+
+    args = [os.path.join(SCRIPTS, arg) for arg in args]
+    app = TimedApp(*args, **kwargs)
+    app.config(os.path.join(SCRIPTS, config) if config else "")
+    stamps["created"] = time.time()
+    app.run()
+    # The application stopped before all operators ran (or has none)
+    stamps.setdefault("first_compute", time.time())
+    stamps["first_message"] = time.time()
+    _report(stamps)
+
+
+def phases(stamps):
+    """Durations of the startup phases and the total, in ms."""
+    durations = [
+        stamps["running"] - stamps["launched"],
+        stamps["imported"] - stamps["running"],
+        stamps["created"] - stamps["imported"],
+        stamps["composed"] - stamps["compose_start"],
+        stamps["first_compute"] - stamps["composed"],
+        stamps["first_message"] - stamps["first_compute"],
+    ]
+    total = stamps["first_message"] - stamps["launched"]
+    return {phase: d * 1e3 for phase, d in zip(PHASES, durations)}, total * 1e3
+
+
+def measure(name, timeout):
+    env = dict(os.environ, STARTUP_LAUNCHED=repr(time.time()))
+    result = subprocess.run(
+        [sys.executable, __file__, "--child", name],
+        capture_output=True,
+        text=True,
+        timeout=timeout,
+        env=env,
+    )
+    for line in reversed(result.stdout.splitlines()):
+        if line.startswith("{"):
+            return phases(json.loads(line))
+    errors = result.stderr.strip().splitlines()
+    raise RuntimeError(errors[-1] if errors else f"exit status {result.returncode}")
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Measure the cold start of the tutorial applications")
+    parser.add_argument("apps", nargs="*", default=list(APPS), help=f"Applications, among {list(APPS)}.")
+    parser.add_argument("-n", type=int, default=3, help="Runs per application, the median is shown.")
+    parser.add_argument("--timeout", type=float, default=300, help="Timeout of a run in seconds.")
+    parser.add_argument("--child", help=SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child)
+
+    print(f"{'app':>10} " + " ".join(f"{phase:>12}" for phase in PHASES) + f" {'total ms':>10}")
+    for name in args.apps:
+        if name not in APPS:
+            parser.error(f"unknown application {name!r}")
+        try:
+            runs = [measure(name, args.timeout) for _ in range(args.n)]
+        except (RuntimeError, subprocess.TimeoutExpired) as e:
+            print(f"{name:>10} failed: {e}")
+            continue
+        median = {phase: statistics.median(run[0][phase] for run in runs) for phase in PHASES}
+        total = statistics.median(run[1] for run in runs)
+        print(f"{name:>10} " + " ".join(f"{median[phase]:>12.1f}" for phase in PHASES) + f" {total:>10.1f}")
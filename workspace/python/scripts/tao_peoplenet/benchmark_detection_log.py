@@ -0,0 +1,157 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+# Per-frame cost of logging detections in the pipeline thread, and of an
+# offline query: JSON lines written per frame against DetectionLog.
+#
+#   python benchmark_detection_log.py
+#   python benchmark_detection_log.py -n 100000 --detections 50
+
+import json
+import os
+import shutil
+import tempfile
+import time
+from argparse import ArgumentParser
+
+import numpy as np
+
+from detection_log import DetectionLog, DetectionLogReader
+
+LABELS = ("person", "faces")
+
+
+def synthetic_frames(n, detections, seed=0):
+    """Per frame: {label: (boxes (k, 4), scores (k,))}, about `detections`
+    boxes over both labels."""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for _ in range(n):
+        frame = {}
+        for label in LABELS:
+            k = rng.poisson(detections / len(LABELS))
+            corners = np.sort(rng.random((k, 2, 2), np.float32), axis=1)
+            boxes = corners.transpose(0, 2, 1).reshape(k, 4)[:, [0, 2, 1, 3]]
+            frame[label] = (boxes, rng.random(k, np.float32))
+        frames.append(frame)
+    return frames
+
+
+def log_json(path, frames):
+    times = []
+    with open(path, "w") as f:
+        for index, frame in enumerate(frames):
+            start = time.perf_counter()
+            rows = [
+                {"frame": index, "stream": 0, "label": label, "box": box, "score": score}
+                for label, (boxes, scores) in frame.items()
+                for box, score in zip(boxes.tolist(), scores.tolist())
+            ]
+            f.write(json.dumps(rows) + "\n")
+            f.flush()
+            times.append(time.perf_counter() - start)
+    return np.array(times)
+
+
+def log_columnar(directory, frames, chunk_rows):
+    log = DetectionLog(directory, LABELS, chunk_rows=chunk_rows, block=True)
+    times = []
+    for index, frame in enumerate(frames):
+        start = time.perf_counter()
+        for label, (boxes, scores) in frame.items():
+            log.append(index, 0, label, boxes, scores)
+        times.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    log.close()
+    return np.array(times), time.perf_counter() - start, log
+
+
+def query_json(path, first, last, min_score):
+    boxes = []
+    with open(path) as f:
+        for line in f:
+            for row in json.loads(line):
+                if (
+                    first <= row["frame"] <= last
+                    and row["label"] == "faces"
+                    and row["score"] >= min_score
+                ):
+                    boxes.append(row["box"])
+    return np.array(boxes, np.float32).reshape(-1, 4)
+
+
+def query_columnar(directory, first, last, min_score):
+    reader = DetectionLogReader(directory)
+    return reader.query(frames=(first, last), labels=["faces"], min_score=min_score)["box"]
+
+
+def disk_bytes(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Benchmark the columnar detection log")
+    parser.add_argument("-n", type=int, default=20000, help="Frames.")
+    parser.add_argument("--detections", type=int, default=20, help="Mean detections per frame.")
+    parser.add_argument("--chunk_rows", type=int, default=65536, help="Rows per chunk.")
+    args = parser.parse_args()
+
+    frames = synthetic_frames(args.n, args.detections)
+    rows = sum(len(scores) for frame in frames for _, scores in frame.values())
+    first, last = args.n // 2, args.n // 2 + args.n // 10
+
+    work = tempfile.mkdtemp(prefix="detection_log_")
+    try:
+        json_path = os.path.join(work, "detections.jsonl")
+        log_dir = os.path.join(work, "detections")
+        json_times = log_json(json_path, frames)
+        columnar_times, close_s, log = log_columnar(log_dir, frames, args.chunk_rows)
+
+        start = time.perf_counter()
+        json_boxes = query_json(json_path, first, last, 0.8)
+        json_query = time.perf_counter() - start
+        start = time.perf_counter()
+        columnar_boxes = query_columnar(log_dir, first, last, 0.8)
+        columnar_query = time.perf_counter() - start
+        if not np.array_equal(json_boxes, columnar_boxes):
+            raise RuntimeError("the two logs returned different detections")
+
+        print(f"{args.n} frames, {rows} detections, query: faces of frames {first}-{last}")
+        print(
+            f"{'log':>9} {'mean us/frame':>14} {'p99 us':>8} {'MB on disk':>11}"
+            f" {'query ms':>9} {'rows':>7}"
+        )
+        for name, times, path, query_s, found in (
+            ("json", json_times, json_path, json_query, len(json_boxes)),
+            ("columnar", columnar_times, log_dir, columnar_query, len(columnar_boxes)),
+        ):
+            print(
+                f"{name:>9} {times.mean() * 1e6:>14.1f} {np.percentile(times, 99) * 1e6:>8.1f}"
+                f" {disk_bytes(path) / 1e6:>11.1f} {query_s * 1e3:>9.1f} {found:>7}"
+            )
+        print(
+            f"columnar: {log.chunks_written} chunks, {log.memory_bytes / 1e6:.1f} MB of buffers,"
+            f" {log.waits} waits for the writer, {close_s * 1e3:.1f} ms to close"
+        )
+    finally:
+        shutil.rmtree(work)
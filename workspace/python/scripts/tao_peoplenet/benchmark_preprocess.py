@@ -0,0 +1,104 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+# Per-frame timing of the fused CPU preprocessing against the three passes
+# it replaces (convert to float, resize, normalize and transpose).
+#
+#   python benchmark_preprocess.py
+#   python benchmark_preprocess.py --height 720 --width 1280 -n 200
+
+import os
+import time
+from argparse import ArgumentParser
+
+import numpy as np
+import yaml
+
+from fused_preprocessor import Preprocessor, numba, resize_tables
+
+
+def three_pass(src, resize_height, resize_width, scale_min, scale_max):
+    """Unfused reference, one buffer per stage like the original pipeline."""
+    (y0, y1, wy), (x0, x1, wx) = (
+        resize_tables(src.shape[0], resize_height),
+        resize_tables(src.shape[1], resize_width),
+    )
+    # rgb888 -> float32
+    image = src[..., :3].astype(np.float32)
+    # Bilinear resize
+    wy, wx = wy[:, None, None], wx[None, :, None]
+    top = image[y0][:, x0] * (1 - wx) + image[y0][:, x1] * wx
+    bottom = image[y1][:, x0] * (1 - wx) + image[y1][:, x1] * wx
+    resized = top * (1 - wy) + bottom * wy
+    # Normalize, then HWC -> NCHW
+    resized = resized * ((scale_max - scale_min) / 255.0) + scale_min
+    return np.ascontiguousarray(np.moveaxis(resized, 2, 0)[None])
+
+
+def timeit(fn, src, n):
+    fn(src)  # warm up (and compile with Numba)
+    times = []
+    for _ in range(n):
+        start = time.perf_counter()
+        fn(src)
+        times.append(time.perf_counter() - start)
+    return np.array(times) * 1e3
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Benchmark the fused CPU preprocessing")
+    parser.add_argument("--height", type=int, default=1080, help="Input frame height.")
+    parser.add_argument("--width", type=int, default=1920, help="Input frame width.")
+    parser.add_argument("-n", type=int, default=50, help="Frames timed per implementation.")
+    args = parser.parse_args()
+
+    config_file = os.path.join(os.path.dirname(__file__), "tao_peoplenet.yaml")
+    with open(config_file) as f:
+        config = yaml.safe_load(f)["preprocessor"]
+    params = {
+        key: config[key]
+        for key in ("resize_height", "resize_width", "in_dtype", "out_dtype", "scale_min", "scale_max")
+    }
+    src = np.random.randint(0, 256, (args.height, args.width, 3), np.uint8)
+
+    candidates = {
+        "three passes": lambda image: three_pass(
+            image, params["resize_height"], params["resize_width"], params["scale_min"], params["scale_max"]
+        )
+    }
+    for backend in ["numpy"] + (["numba"] if numba is not None else []):
+        candidates[f"fused ({backend})"] = Preprocessor(args.height, args.width, backend=backend, **params)
+
+    reference = candidates["three passes"](src)
+    print(
+        f"{args.width}x{args.height} rgb888 -> 1x3x{params['resize_height']}x{params['resize_width']}"
+        f" {params['out_dtype']}"
+    )
+    print(f"{'implementation':>16} {'mean ms':>9} {'p50 ms':>9} {'p99 ms':>9} {'max error':>10}")
+    for name, fn in candidates.items():
+        error = np.abs(fn(src) - reference).max()
+        times = timeit(fn, src, args.n)
+        print(
+            f"{name:>16} {times.mean():>9.2f} {np.percentile(times, 50):>9.2f}"
+            f" {np.percentile(times, 99):>9.2f} {error:>10.2g}"
+        )
+    if numba is None:
+        print("Numba is not installed, only the NumPy implementation was timed")
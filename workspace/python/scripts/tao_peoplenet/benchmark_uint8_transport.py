@@ -0,0 +1,152 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+# Bytes moved and time per frame from the replayer frame to the inference
+# input, float32 transport against uint8 transport, on the CPU.
+#
+#   float32: format converter (resize, to float32 HWC, normalize), then
+#            PreprocessorOp (copy to the host, transpose, copy back)
+#   uint8:   format converter (resize, rgb888), then NormalizeOp
+#            (normalize and transpose into the NCHW input buffer)
+#
+# The device copies of PreprocessorOp are modelled as host copies. Bytes
+# moved are the bytes read plus written by each stage. Both format
+# converters share the resize code, so the difference comes from the stages
+# after it.
+#
+#   python benchmark_uint8_transport.py
+#   python benchmark_uint8_transport.py --height 2160 --width 3840 -n 20
+
+import os
+import time
+from argparse import ArgumentParser
+
+import numpy as np
+import yaml
+
+from fused_preprocessor import resize_tables
+from uint8_transport import Normalizer
+
+
+class Resizer:
+    """Bilinear HWC resize (separable, like the format converter)."""
+
+    def __init__(self, in_height, in_width, out_height, out_width, channels=3):
+        self.rows = resize_tables(in_height, out_height)
+        self.cols = resize_tables(in_width, out_width)
+        self.shape = (out_height, out_width, channels)
+
+    def __call__(self, src, out):
+        y0, y1, wy = self.rows
+        x0, x1, wx = self.cols
+        rows = src[y0] * (1 - wy)[:, None, None] + src[y1] * wy[:, None, None]
+        resized = rows[:, x0] * (1 - wx)[:, None] + rows[:, x1] * wx[:, None]
+        if out.dtype == np.uint8:
+            np.rint(resized, out=resized)
+        np.copyto(out, resized, casting="unsafe")
+        return out
+
+
+def float32_transport(frame, resizer, scale, offset):
+    """Yields (bytes moved, output) per stage."""
+    converted = resizer(frame, np.empty(resizer.shape, np.float32))
+    converted *= scale
+    converted += offset
+    yield frame.nbytes + converted.nbytes, converted
+    # PreprocessorOp: device -> host, transpose, host -> device
+    host = converted.copy()
+    transposed = np.ascontiguousarray(np.moveaxis(host, 2, 0)[None])
+    device = transposed.copy()
+    yield 2 * converted.nbytes + 2 * host.nbytes + 2 * transposed.nbytes, device
+
+
+def uint8_transport(frame, resizer, normalizer):
+    converted = resizer(frame, np.empty(resizer.shape, np.uint8))
+    yield frame.nbytes + converted.nbytes, converted
+    out = normalizer(converted)
+    yield converted.nbytes + out.nbytes, out
+
+
+def timeit(stages, n):
+    """Per stage bytes moved and times in ms (frames x stages), and the
+    last output."""
+    times = []
+    for _ in range(n + 1):
+        frame_times, traffic = [], []
+        start = time.perf_counter()
+        for moved, out in stages():
+            end = time.perf_counter()
+            frame_times.append(end - start)
+            traffic.append(moved)
+            start = time.perf_counter()
+        times.append(frame_times)
+    # The first frame is a warm up
+    return np.array(traffic), np.array(times[1:]) * 1e3, out
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Benchmark uint8 against float32 frame transport")
+    parser.add_argument("--height", type=int, default=1080, help="Replayer frame height.")
+    parser.add_argument("--width", type=int, default=1920, help="Replayer frame width.")
+    parser.add_argument("-n", type=int, default=50, help="Frames timed per transport.")
+    args = parser.parse_args()
+
+    config_file = os.path.join(os.path.dirname(__file__), "tao_peoplenet.yaml")
+    with open(config_file) as f:
+        config = yaml.safe_load(f)["preprocessor"]
+    scale_min, scale_max = config["scale_min"], config["scale_max"]
+    scale = np.float32((scale_max - scale_min) / 255.0)
+    offset = np.float32(scale_min)
+
+    frame = np.random.randint(0, 256, (args.height, args.width, 3), np.uint8)
+    resizer = Resizer(args.height, args.width, config["resize_height"], config["resize_width"])
+    normalizer = Normalizer(scale_min, scale_max, config["out_dtype"])
+
+    results = {
+        "float32": timeit(lambda: float32_transport(frame, resizer, scale, offset), args.n),
+        "uint8": timeit(lambda: uint8_transport(frame, resizer, normalizer), args.n),
+    }
+    error = np.abs(results["uint8"][2] - results["float32"][2]).max()
+
+    print(
+        f"{args.width}x{args.height} rgb888 -> 1x3x{config['resize_height']}x{config['resize_width']}"
+        f" {config['out_dtype']}"
+    )
+    # "after": the stages after the format converter, "frame": all stages
+    print(
+        f"{'transport':>10} {'MB after':>9} {'ms after':>9} {'p99 ms':>8} {'GB/s':>6}"
+        f" {'MB frame':>9} {'ms frame':>9} {'p99 ms':>8}"
+    )
+    for name, (traffic, times, _) in results.items():
+        after = times[:, 1:].sum(axis=1)
+        total = times.sum(axis=1)
+        print(
+            f"{name:>10} {traffic[1:].sum() / 1e6:>9.1f} {after.mean():>9.2f}"
+            f" {np.percentile(after, 99):>8.2f} {traffic[1:].sum() / after.mean() / 1e6:>6.1f}"
+            f" {traffic.sum() / 1e6:>9.1f} {total.mean():>9.2f} {np.percentile(total, 99):>8.2f}"
+        )
+    moved = {name: traffic[1:].sum() for name, (traffic, _, _) in results.items()}
+    after = {name: times[:, 1:].sum(axis=1).mean() for name, (_, times, _) in results.items()}
+    print(
+        f"after the format converter: {moved['float32'] / moved['uint8']:.1f}x fewer bytes,"
+        f" {after['float32'] / after['uint8']:.1f}x faster"
+    )
+    print(f"max difference of the inference input (uint8 rounding): {error:.2g}")
@@ -0,0 +1,436 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+# Columnar detection log written on a background thread.
+#
+# `DetectionLogOp` passes the postprocessor output through unchanged and
+# appends every detection (frame id, stream id, class, box and score) to a
+# `DetectionLog`. Rows go into preallocated column buffers of `chunk_rows`
+# rows. A full chunk is handed to a writer thread, which saves each column
+# as a .npy file and then appends a line to index.jsonl, so the log on disk
+# only ever lists complete chunks:
+#
+#   directory/
+#     meta.json                   column dtypes and class names
+#     index.jsonl                 one line per chunk: rows, first and last frame
+#     chunk_000000_frame.npy      int64
+#     chunk_000000_stream.npy     int32
+#     chunk_000000_label.npy      uint8, index into meta.json "labels"
+#     chunk_000000_box.npy        float32 (rows, 4): x0, y0, x1, y1 normalized
+#     chunk_000000_score.npy      float32
+#
+# Memory is bounded by `num_buffers` chunk buffers, recycled once written.
+# When they are all waiting for the disk, rows are dropped (counted) or, with
+# `block`, append() waits for the writer (wait time counted).
+#
+# Frame ids are source frame indices. Frames dropped on the way, by a queue
+# policy gate or a replicated postprocessor, are reported to a shared
+# `FrameIds`, so they do not shift the ids of the frames that follow.
+#
+# `DetectionLogOp` writes each run to a new subdirectory of its `directory`,
+# named after the start time. `DetectionLogReader` memory-maps the chunks of
+# a run and skips those outside the frame range of a query:
+#
+#   log = DetectionLogReader("detections/20240601-120000")
+#   rows = log.query(frames=(1000, 2000), labels=["faces"], min_score=0.8)
+#   rows["box"], rows["frame"]
+
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+import numpy as np
+from holoscan.core import Operator, OperatorSpec
+
+from metrics import export_metrics
+from overlay import to_host
+
+COLUMNS = {
+    "frame": (np.int64, ()),
+    "stream": (np.int32, ()),
+    "label": (np.uint8, ()),
+    "box": (np.float32, (4,)),
+    "score": (np.float32, ()),
+}
+
+
+def _chunk_path(directory, chunk, column):
+    return os.path.join(directory, f"chunk_{chunk:06d}_{column}.npy")
+
+
+class _Chunk:
+    """Column buffers of one chunk."""
+
+    __slots__ = ("columns", "rows")
+
+    def __init__(self, chunk_rows):
+        self.columns = {
+            name: np.empty((chunk_rows, *shape), dtype) for name, (dtype, shape) in COLUMNS.items()
+        }
+        self.rows = 0
+
+
+class DetectionLog:
+    """Append detections to column buffers flushed in chunks by a thread.
+
+    At most `num_buffers` chunks of `chunk_rows` rows are held in memory.
+    """
+
+    def __init__(self, directory, labels, chunk_rows=65536, num_buffers=4, block=False):
+        if num_buffers < 2:
+            raise ValueError("num_buffers must be >= 2")
+        self.directory = directory
+        self.labels = list(labels)
+        self.chunk_rows = chunk_rows
+        self.num_buffers = num_buffers
+        self.block = block
+        self.rows = 0
+        self.dropped_rows = 0
+        self.waits = 0
+        self.wait_s = 0.0
+        self.chunks_written = 0
+        self.error = None
+
+        os.makedirs(directory, exist_ok=True)
+        if os.path.exists(os.path.join(directory, "index.jsonl")):
+            raise FileExistsError(f"{directory} already holds a detection log")
+        meta = {
+            "columns": {name: [np.dtype(d).str, list(s)] for name, (d, s) in COLUMNS.items()},
+            "labels": self.labels,
+            "chunk_rows": chunk_rows,
+        }
+        with open(os.path.join(directory, "meta.json"), "w") as f:
+            json.dump(meta, f, indent=2)
+        self.index = open(os.path.join(directory, "index.jsonl"), "a")
+
+        self.free = queue.Queue()
+        for _ in range(num_buffers - 1):
+            self.free.put(_Chunk(chunk_rows))
+        self.chunk = _Chunk(chunk_rows)
+        self.pending = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name="detection_log", daemon=True)
+        self.thread.start()
+
+    @property
+    def memory_bytes(self):
+        """Bytes held by the chunk buffers."""
+        row_bytes = sum(np.dtype(d).itemsize * int(np.prod(s)) for d, s in COLUMNS.values())
+        return self.num_buffers * self.chunk_rows * row_bytes
+
+    def append(self, frame, stream, label, boxes, scores):
+        """Append the detections of one class in one frame.
+
+        `boxes` has shape (n, 4) (or anything reshaping to it) and `scores`
+        shape (n,). Returns the number of rows dropped.
+        """
+        scores = np.asarray(scores, np.float32).reshape(-1)
+        boxes = np.asarray(boxes, np.float32).reshape(-1, 4)[: len(scores)]
+        label = self.labels.index(label) if isinstance(label, str) else label
+        start, n, dropped = 0, len(scores), 0
+        while start < n:
+            if self.chunk is None and not self._next_chunk():
+                dropped = n - start
+                self.dropped_rows += dropped
+                break
+            chunk = self.chunk
+            count = min(n - start, self.chunk_rows - chunk.rows)
+            rows = slice(chunk.rows, chunk.rows + count)
+            columns = chunk.columns
+            columns["frame"][rows] = frame
+            columns["stream"][rows] = stream
+            columns["label"][rows] = label
+            columns["box"][rows] = boxes[start : start + count]
+            columns["score"][rows] = scores[start : start + count]
+            chunk.rows += count
+            start += count
+            if chunk.rows == self.chunk_rows:
+                self.pending.put(chunk)
+                self.chunk = None
+        self.rows += n - dropped
+        return dropped
+
+    def _next_chunk(self):
+        try:
+            self.chunk = self.free.get_nowait()
+        except queue.Empty:
+            if not self.block:
+                return False
+            start = time.perf_counter()
+            self.chunk = self.free.get()
+            self.waits += 1
+            self.wait_s += time.perf_counter() - start
+        self.chunk.rows = 0
+        return True
+
+    def flush(self):
+        """Hand the rows appended so far to the writer."""
+        if self.chunk is not None and self.chunk.rows:
+            self.pending.put(self.chunk)
+            self.chunk = None
+
+    def _run(self):
+        while True:
+            chunk = self.pending.get()
+            if chunk is None:
+                return
+            try:
+                self._write(chunk)
+            except Exception as e:
+                # Keep recycling buffers, the error is raised by close()
+                self.error = e
+            self.free.put(chunk)
+
+    def _write(self, chunk):
+        n = chunk.rows
+        number = self.chunks_written
+        for name, column in chunk.columns.items():
+            path = _chunk_path(self.directory, number, name)
+            with open(path + ".tmp", "wb") as f:
+                np.save(f, column[:n])
+            os.replace(path + ".tmp", path)
+        frames = chunk.columns["frame"][:n]
+        entry = {
+            "chunk": number,
+            "rows": n,
+            "first_frame": int(frames.min()),
+            "last_frame": int(frames.max()),
+        }
+        self.index.write(json.dumps(entry) + "\n")
+        self.index.flush()
+        self.chunks_written += 1
+
+    def close(self):
+        """Write the remaining rows and stop the thread."""
+        self.flush()
+        self.pending.put(None)
+        self.thread.join()
+        self.index.close()
+        if self.error is not None:
+            raise self.error
+
+
+class DetectionLogReader:
+    """Memory-mapped queries over a log written by `DetectionLog`."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, "meta.json")) as f:
+            meta = json.load(f)
+        self.labels = meta["labels"]
+        self.chunks = []
+        with open(os.path.join(directory, "index.jsonl")) as f:
+            for line in f:
+                # A line cut short by a crash is not a complete chunk
+                if line.endswith("\n"):
+                    self.chunks.append(json.loads(line))
+        self._maps = {}
+
+    def __len__(self):
+        return sum(entry["rows"] for entry in self.chunks)
+
+    def column(self, chunk, name):
+        """Column `name` of chunk number `chunk`, memory-mapped."""
+        key = (chunk, name)
+        array = self._maps.get(key)
+        if array is None:
+            array = np.load(_chunk_path(self.directory, chunk, name), mmap_mode="r")
+            self._maps[key] = array
+        return array
+
+    def query(self, frames=None, labels=None, streams=None, min_score=None, columns=None):
+        """Rows matching all the given filters, as {column: array}.
+
+        `frames` is an inclusive (first, last) range, `labels` a list of
+        class names and `streams` a list of stream ids.
+        """
+        columns = list(columns or COLUMNS)
+        label_ids = None if labels is None else [self.labels.index(label) for label in labels]
+        parts = {name: [] for name in columns}
+        for entry in self.chunks:
+            if frames is not None and (
+                entry["last_frame"] < frames[0] or entry["first_frame"] > frames[1]
+            ):
+                continue
+            chunk = entry["chunk"]
+            mask = np.ones(entry["rows"], bool)
+            if frames is not None:
+                frame = self.column(chunk, "frame")
+                mask &= (frame >= frames[0]) & (frame <= frames[1])
+            if label_ids is not None:
+                mask &= np.isin(self.column(chunk, "label"), label_ids)
+            if streams is not None:
+                mask &= np.isin(self.column(chunk, "stream"), streams)
+            if min_score is not None:
+                mask &= self.column(chunk, "score") >= min_score
+            for name in columns:
+                parts[name].append(self.column(chunk, name)[mask])
+        out = {}
+        for name, arrays in parts.items():
+            dtype, shape = COLUMNS[name]
+            out[name] = np.concatenate(arrays) if arrays else np.empty((0, *shape), dtype)
+        return out
+
+
+class FrameIds:
+    """Source frame ids of the frames on their way to a DetectionLogOp.
+
+    A queue policy gate on the source output calls `put()` with the source
+    index of each frame it forwards; without a gate no frame is dropped
+    there, and frames are numbered in order. Operators dropping
+    frames further down call `drop()` with the position of the frame among
+    those that passed the gate. `get()` returns the id of the next frame
+    reaching the log.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.ids = deque()
+        self.dropped = set()
+        self.position = 0
+        self.tagged = False
+
+    def put(self, frame):
+        with self.lock:
+            self.tagged = True
+            self.ids.append(frame)
+
+    def drop(self, position):
+        with self.lock:
+            self.dropped.add(position)
+
+    def get(self):
+        with self.lock:
+            while True:
+                position = self.position
+                self.position += 1
+                frame = self.ids.popleft() if self.tagged else position
+                if position in self.dropped:
+                    self.dropped.remove(position)
+                    continue
+                return frame
+
+
+def _run_directory(directory):
+    """A new subdirectory of `directory`, named after the current time."""
+    name = time.strftime("%Y%m%d-%H%M%S")
+    path, n = os.path.join(directory, name), 1
+    while os.path.exists(path):
+        path = os.path.join(directory, f"{name}-{n}")
+        n += 1
+    return path
+
+
+@export_metrics
+class DetectionLogOp(Operator):
+    """Log the detections of PostprocessorOp and pass them through.
+
+    **==Named Inputs==**
+
+        in : dict
+            {label: rectangles, f"{label}_scores": scores} as emitted by
+            PostprocessorOp with `emit_scores`.
+
+    **==Named Outputs==**
+
+        out : dict
+            The input message, unchanged.
+
+    Frame ids are taken from `frame_ids` or, without it, count the messages
+    received by this operator. The empty placeholder rectangle emitted for a
+    label without detections is not logged.
+
+    Parameters
+    ----------
+    directory : str
+        Parent directory of the logs, each run is written to a new
+        subdirectory named after its start time.
+    labels : list
+        Class names to log.
+    stream_id : int
+        Stream id written with every detection.
+    chunk_rows, num_buffers, block
+        See `DetectionLog`.
+    frame_ids : FrameIds, optional
+        Source frame ids of the received messages.
+    """
+
+    def __init__(
+        self,
+        fragment,
+        *args,
+        directory,
+        labels=("person", "faces"),
+        stream_id=0,
+        chunk_rows=65536,
+        num_buffers=4,
+        block=False,
+        frame_ids=None,
+        **kwargs,
+    ):
+        self.directory = os.path.expanduser(directory)
+        self.log_args = dict(
+            labels=labels,
+            chunk_rows=chunk_rows,
+            num_buffers=num_buffers,
+            block=block,
+        )
+        self.stream_id = stream_id
+        self.frame_ids = frame_ids
+        self.frame = 0
+        self.log = None
+
+        # Need to call the base class constructor last
+        super().__init__(fragment, *args, **kwargs)
+
+    def setup(self, spec: OperatorSpec):
+        spec.input("in")
+        spec.output("out")
+
+    def start(self):
+        self.frame = 0
+        self.log = DetectionLog(_run_directory(self.directory), **self.log_args)
+
+    def stop(self):
+        self.log.close()
+        print(
+            f"{self.name}: logged {self.log.rows} detections of {self.frame} frames"
+            f" to {self.log.directory}, dropped {self.log.dropped_rows},"
+            f" waited {self.log.waits} times ({self.log.wait_s:.3f} s)"
+        )
+
+    def compute(self, op_input, op_output, context):
+        detections = op_input.receive("in")
+        frame = self.frame if self.frame_ids is None else self.frame_ids.get()
+        for label in self.log.labels:
+            scores = detections.get(f"{label}_scores") if hasattr(detections, "get") else None
+            if scores is not None:
+                boxes = to_host(detections[label]).reshape(-1, 4)
+                scores = to_host(scores).reshape(-1)
+                # Skip the zero area placeholder
+                keep = (boxes[:, 2] > boxes[:, 0]) & (boxes[:, 3] > boxes[:, 1])
+                if not keep.all():
+                    boxes, scores = boxes[keep], scores[keep]
+                self.log.append(frame, self.stream_id, label, boxes, scores)
+        self.frame += 1
+        op_output.emit(detections, "out")
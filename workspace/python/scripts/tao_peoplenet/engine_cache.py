@@ -0,0 +1,373 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+# Content-addressed cache of built inference engines.
+#
+# Building a TensorRT engine from the PeopleNet ONNX model takes minutes.
+# `EngineCache.get()` returns the path of an engine built for the same model
+# file contents, inference config and runtime (TensorRT version, GPU), and
+# only calls the builder on a miss:
+#
+#   cache = EngineCache("~/.cache/holoscan/engines", max_bytes=10 << 30)
+#   engine = cache.get(model_path, {"input_shape": [1, 3, 544, 960]}, TensorRTBuilder())
+#
+# Engines are written to a temporary file and renamed into place, so an
+# interrupted build never leaves a broken entry behind, and concurrent
+# launches wait for a single build through an exclusive lock on the lock file
+# of the entry. Entries returned by `get()` stay locked shared until the cache
+# is closed, so that no other process evicts an engine before it is loaded.
+# Hits refresh the modification time of the entry, and the least recently
+# used entries are evicted once the cache grows over its limits; an entry
+# whose lock file is held by another process is left in place.
+#
+# Builders are objects with a `version()` method, included in the key, and a
+# `build(model_path, config, output_path)` method. `FakeBuilder` exercises
+# the cache on machines without a GPU:
+#
+#   python engine_cache.py --fake
+
+import fcntl
+import glob
+import hashlib
+import json
+import os
+import tempfile
+import time
+from argparse import ArgumentParser
+
+from lazy_import import lazy_import
+
+cp = lazy_import("cupy", optional=True)
+trt = lazy_import("tensorrt", optional=True)
+
+ENGINE_SUFFIX = ".engine"
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """SHA-256 of the contents of a file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_key(model_path, config, version):
+    """Key of the engine built from `model_path` with `config` by `version`."""
+    digest = hashlib.sha256()
+    digest.update(file_digest(model_path).encode())
+    # Canonical JSON, so that the key does not depend on the key order
+    digest.update(json.dumps(config, sort_keys=True, default=str).encode())
+    digest.update(version.encode())
+    return digest.hexdigest()
+
+
+class EngineCache:
+    """Directory of built engines, named after their key.
+
+    Parameters
+    ----------
+    directory : str
+    max_bytes : int
+        Total size of the engines above which the least recently used ones
+        are removed, None for no limit.
+    max_entries : int
+        Maximum number of engines, None for no limit.
+    """
+
+    def __init__(self, directory, max_bytes=None, max_entries=None):
+        self.directory = os.path.abspath(os.path.expanduser(directory))
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        # Key -> lock file held shared for the entries returned by get()
+        self._held = {}
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.directory, key + ENGINE_SUFFIX)
+
+    def get(self, model_path, config, builder):
+        """Path of the engine for `model_path` and `config`, built if needed.
+
+        The entry cannot be evicted by another process until `close()`.
+        """
+        key = cache_key(model_path, config, builder.version())
+        path = self.path(key)
+        built = False
+        while True:
+            lock = self._lock(key, fcntl.LOCK_SH)
+            # Checked under the lock: an entry evicted meanwhile is gone
+            if self._touch(path):
+                break
+            lock.close()
+
+            # One build per key across processes, the others wait for it
+            lock = self._lock(key, fcntl.LOCK_EX)
+            try:
+                if not self._touch(path):
+                    self._build(model_path, config, builder, path)
+                    self._write_info(key, model_path, config, builder)
+                    built = True
+            finally:
+                lock.close()
+
+        if built:
+            self.misses += 1
+        else:
+            self.hits += 1
+        if key in self._held:
+            lock.close()
+        else:
+            self._held[key] = lock
+        if built:
+            self.evict(keep=path)
+        return path
+
+    def close(self):
+        """Release the entries returned by get(), once their engines are loaded."""
+        for lock in self._held.values():
+            lock.close()
+        self._held.clear()
+
+    def _lock(self, key, operation):
+        """Open the lock file of `key` and flock() it with `operation`."""
+        name = os.path.join(self.directory, key + ".lock")
+        while True:
+            lock = open(name, "a")
+            fcntl.flock(lock, operation)
+            # Retry if the entry was removed, lock file included, meanwhile
+            try:
+                if os.stat(name).st_ino == os.fstat(lock.fileno()).st_ino:
+                    return lock
+            except FileNotFoundError:
+                pass
+            lock.close()
+
+    def _touch(self, path):
+        """Mark the entry as used, False if it does not exist."""
+        try:
+            os.utime(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _build(self, model_path, config, builder, path):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        os.close(fd)
+        try:
+            builder.build(model_path, config, tmp)
+            with open(tmp, "rb+") as f:
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def _write_info(self, key, model_path, config, builder):
+        # What the entry was built from, for humans
+        info = {
+            "model": os.path.abspath(model_path),
+            "config": config,
+            "version": builder.version(),
+            "built": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(info, f, indent=2, default=str)
+        os.replace(tmp, os.path.join(self.directory, key + ".json"))
+
+    def entries(self):
+        """(path, size, last use) of the engines, most recently used first."""
+        entries = []
+        for path in glob.glob(os.path.join(self.directory, "*" + ENGINE_SUFFIX)):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+        return sorted(entries, key=lambda entry: entry[2], reverse=True)
+
+    def evict(self, keep=None):
+        """Remove the least recently used engines beyond the limits."""
+        total = 0
+        removed = []
+        for n, (path, size, _) in enumerate(self.entries()):
+            total += size
+            over = (self.max_entries is not None and n >= self.max_entries) or (
+                self.max_bytes is not None and total > self.max_bytes
+            )
+            if over and path != keep and self._remove(path):
+                total -= size
+                removed.append(path)
+        return removed
+
+    def _remove(self, path):
+        """Remove an entry unless another process holds its lock."""
+        base = path[: -len(ENGINE_SUFFIX)]
+        try:
+            lock = open(base + ".lock", "r+")
+        except FileNotFoundError:
+            lock = None
+        try:
+            if lock is not None:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    # Being built or used by another process
+                    return False
+            # The lock file goes last, while it is still held
+            for name in (path, base + ".json", base + ".lock"):
+                try:
+                    os.unlink(name)
+                except FileNotFoundError:
+                    pass
+            return True
+        finally:
+            if lock is not None:
+                lock.close()
+
+
+class TensorRTBuilder:
+    """Build a serialized TensorRT engine from an ONNX model.
+
+    `config` may give "input_shape" (used for dynamic dimensions other than
+    the batch), "max_batch" (a dynamic batch profile up to this size),
+    "fp16" and "int8" (builder precision flags, off by default like in
+    InferenceOp) and "workspace_bytes".
+
+    The engine is built on GPU `device`, as given by the "device_map" of
+    InferenceOp, which needs CuPy for any other device than 0.
+    """
+
+    def __init__(self, device=0):
+        self.device = int(device)
+
+    def version(self):
+        if trt is None:
+            raise ImportError("building engines requires the TensorRT Python bindings")
+        gpu = ""
+        if cp is not None:
+            props = cp.cuda.runtime.getDeviceProperties(self.device)
+            gpu = f" {props['name'].decode()} sm_{props['major']}{props['minor']}"
+        return f"tensorrt {trt.__version__}{gpu}"
+
+    def build(self, model_path, config, output_path):
+        if cp is not None:
+            # TensorRT builds on the current device
+            with cp.cuda.Device(self.device):
+                return self._build(model_path, config, output_path)
+        if self.device != 0:
+            raise ImportError(f"building engines on GPU {self.device} requires CuPy")
+        return self._build(model_path, config, output_path)
+
+    def _build(self, model_path, config, output_path):
+        logger = trt.Logger(trt.Logger.WARNING)
+        builder = trt.Builder(logger)
+        network = builder.create_network(1 << int(trt.NetworkDefinitionCreationFlag.EXPLICIT_BATCH))
+        parser = trt.OnnxParser(network, logger)
+        with open(model_path, "rb") as f:
+            if not parser.parse(f.read()):
+                errors = "\n".join(str(parser.get_error(i)) for i in range(parser.num_errors))
+                raise RuntimeError(f"cannot parse {model_path}:\n{errors}")
+
+        builder_config = builder.create_builder_config()
+        builder_config.set_memory_pool_limit(
+            trt.MemoryPoolType.WORKSPACE, config.get("workspace_bytes", 1 << 30)
+        )
+        if config.get("fp16", False):
+            builder_config.set_flag(trt.BuilderFlag.FP16)
+        if config.get("int8", False):
+            builder_config.set_flag(trt.BuilderFlag.INT8)
+
+        shape = config.get("input_shape")
+        max_batch = config.get("max_batch", 1)
+        profile = None
+        for i in range(network.num_inputs):
+            tensor = network.get_input(i)
+            dims = list(tensor.shape)
+            if -1 not in dims:
+                continue
+            if profile is None:
+                profile = builder.create_optimization_profile()
+            fixed = [d if d != -1 else (shape[k] if shape else 1) for k, d in enumerate(dims)]
+            lowest, highest = list(fixed), list(fixed)
+            if dims[0] == -1:
+                lowest[0], fixed[0], highest[0] = 1, max_batch, max_batch
+            profile.set_shape(tensor.name, lowest, fixed, highest)
+        if profile is not None:
+            builder_config.add_optimization_profile(profile)
+
+        engine = builder.build_serialized_network(network, builder_config)
+        if engine is None:
+            raise RuntimeError(f"TensorRT could not build an engine from {model_path}")
+        with open(output_path, "wb") as f:
+            f.write(engine)
+
+
+class FakeBuilder:
+    """Builder writing a hash of its inputs, to test the cache on a CPU."""
+
+    def __init__(self, delay=1.0, size=1 << 20):
+        self.delay = delay
+        self.size = size
+        self.builds = 0
+
+    def version(self):
+        return "fake 1"
+
+    def build(self, model_path, config, output_path):
+        time.sleep(self.delay)
+        self.builds += 1
+        seed = cache_key(model_path, config, self.version()).encode()
+        with open(output_path, "wb") as f:
+            f.write((seed * (self.size // len(seed) + 1))[: self.size])
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Build or look up a cached inference engine")
+    parser.add_argument("model", nargs="?", help="ONNX model (default: a temporary fake model).")
+    parser.add_argument("--cache", default="~/.cache/holoscan/engines", help="Cache directory.")
+    parser.add_argument("--max_gb", type=float, default=10.0, help="Cache size limit in GB.")
+    parser.add_argument("--fake", action="store_true", help="Use FakeBuilder instead of TensorRT.")
+    args = parser.parse_args()
+
+    builder = FakeBuilder() if args.fake else TensorRTBuilder()
+    model = args.model
+    if model is None:
+        if not args.fake:
+            parser.error("a model is required unless --fake is given")
+        fd, model = tempfile.mkstemp(suffix=".onnx")
+        os.write(fd, os.urandom(1 << 16))
+        os.close(fd)
+    cache = EngineCache(args.cache, max_bytes=int(args.max_gb * (1 << 30)))
+
+    try:
+        for attempt in ("first", "second"):
+            start = time.perf_counter()
+            path = cache.get(model, {"input_shape": [1, 3, 544, 960]}, builder)
+            print(f"{attempt} lookup: {time.perf_counter() - start:.3f} s -> {path}")
+    finally:
+        cache.close()
+        if args.model is None:
+            os.unlink(model)
+    print(f"hits {cache.hits}, misses {cache.misses}, {len(cache.entries())} engines cached")
@@ -0,0 +1,253 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+# Fused CPU preprocessing: color conversion, bilinear resize, normalization
+# and HWC to NCHW transpose in a single operator.
+#
+# This replaces the FormatConverterOp + PreprocessorOp pair of the PeopleNet
+# application on nodes without a GPU (or when the GPU is busy with
+# inference). It takes its parameters from the same "preprocessor" config
+# block and writes straight into preallocated NCHW buffers. With Numba the
+# whole stage is a single parallel pass over the output; without it, a NumPy
+# implementation does the resize as two separable passes with the
+# normalization folded into the interpolation weights.
+
+import numpy as np
+from holoscan.core import Operator, OperatorSpec
+
+from lazy_import import lazy_import
+from metrics import export_metrics
+
+cp = lazy_import("cupy", optional=True)
+numba = lazy_import("numba", optional=True)
+
+# Input channels kept for each FormatConverterOp input format
+IN_CHANNELS = {"rgb888": 3, "rgba8888": 4}
+
+
+def resize_tables(in_size, out_size):
+    """Source indices and weights of a bilinear resize along one axis.
+
+    Uses pixel-center alignment, like NPP: output pixel `i` samples the input
+    at `(i + 0.5) * in_size / out_size - 0.5`.
+
+    Returns
+    ----------
+    i0, i1 : int64 arrays (out_size,)
+        Neighbouring input pixels.
+    w : float32 array (out_size,)
+        Weight of `i1`.
+
+    """
+    pos = (np.arange(out_size) + 0.5) * (in_size / out_size) - 0.5
+    pos = np.clip(pos, 0, in_size - 1)
+    i0 = np.floor(pos).astype(np.int64)
+    i1 = np.minimum(i0 + 1, in_size - 1)
+    return i0, i1, (pos - i0).astype(np.float32)
+
+
+class _Workspace:
+    """Intermediate buffers of the NumPy implementation."""
+
+    def __init__(self, in_width, out_height, out_width, channels):
+        self.top = np.empty((out_height, in_width, channels), np.uint8)
+        self.bottom = np.empty_like(self.top)
+        self.rows = np.empty((out_height, in_width, channels), np.float32)
+        self.rows2 = np.empty_like(self.rows)
+        self.left = np.empty((out_height, out_width, channels), np.float32)
+        self.right = np.empty_like(self.left)
+
+
+def preprocess_numpy(src, tables, scale, offset, out, workspace):
+    """Resize and normalize HWC uint8 `src` into NCHW `out` with NumPy."""
+    (y0, y1, wy), (x0, x1, wx) = tables
+    ws = workspace
+    # Vertical pass, the scale is folded into the weights
+    np.take(src, y0, axis=0, out=ws.top)
+    np.take(src, y1, axis=0, out=ws.bottom)
+    np.multiply(ws.top, ((1 - wy) * scale)[:, None, None], out=ws.rows)
+    np.multiply(ws.bottom, (wy * scale)[:, None, None], out=ws.rows2)
+    ws.rows += ws.rows2
+    # Horizontal pass, written straight into the NCHW output
+    np.take(ws.rows, x0, axis=1, out=ws.left)
+    np.take(ws.rows, x1, axis=1, out=ws.right)
+    ws.left *= (1 - wx)[:, None]
+    ws.right *= wx[:, None]
+    dst = out[0].transpose(1, 2, 0)
+    np.add(ws.left, ws.right, out=dst)
+    dst += offset
+    return out
+
+
+def _preprocess_kernel(src, y0, y1, wy, x0, x1, wx, scale, offset, out):
+    channels, height, width = out.shape[1], out.shape[2], out.shape[3]
+    for y in numba.prange(height):
+        r0, r1, b = y0[y], y1[y], wy[y]
+        a = 1 - b
+        for x in range(width):
+            c0, c1, d = x0[x], x1[x], wx[x]
+            e = 1 - d
+            for c in range(channels):
+                top = src[r0, c0, c] * e + src[r0, c1, c] * d
+                bottom = src[r1, c0, c] * e + src[r1, c1, c] * d
+                out[0, c, y, x] = (top * a + bottom * b) * scale + offset
+
+
+# Compiled on first use, so that Numba is only imported when needed
+_preprocess_numba = None
+
+
+def preprocess_numba(src, tables, scale, offset, out, workspace=None):
+    """Resize and normalize HWC uint8 `src` into NCHW `out` in one pass."""
+    global _preprocess_numba
+    if _preprocess_numba is None:
+        _preprocess_numba = numba.njit(parallel=True, fastmath=True, cache=True)(_preprocess_kernel)
+    (y0, y1, wy), (x0, x1, wx) = tables
+    _preprocess_numba(src, y0, y1, wy, x0, x1, wx, np.float32(scale), np.float32(offset), out)
+    return out
+
+
+BACKENDS = {"numpy": preprocess_numpy, "numba": preprocess_numba}
+
+
+class Preprocessor:
+    """Fused preprocessing for a given input and output size.
+
+    Output buffers are allocated once and reused in turn, `num_buffers`
+    of them, so a result stays valid for `num_buffers - 1` further calls.
+    """
+
+    def __init__(
+        self,
+        in_height,
+        in_width,
+        resize_height,
+        resize_width,
+        in_dtype="rgb888",
+        out_dtype="float32",
+        scale_min=0.0,
+        scale_max=1.0,
+        backend="auto",
+        num_buffers=2,
+    ):
+        if in_dtype not in IN_CHANNELS:
+            raise ValueError(f"unsupported in_dtype {in_dtype!r}, expected one of {list(IN_CHANNELS)}")
+        if backend == "auto":
+            backend = "numba" if numba is not None else "numpy"
+        if backend == "numba" and numba is None:
+            raise ImportError("backend 'numba' requires Numba")
+        if backend not in BACKENDS:
+            raise ValueError(f"unknown backend {backend!r}, expected one of {list(BACKENDS)}")
+        self.backend = backend
+        self.in_shape = (in_height, in_width, IN_CHANNELS[in_dtype])
+        self.tables = (resize_tables(in_height, resize_height), resize_tables(in_width, resize_width))
+        # uint8 [0, 255] -> [scale_min, scale_max]
+        self.scale = (scale_max - scale_min) / 255.0
+        self.offset = scale_min
+        self.buffers = [
+            np.empty((1, 3, resize_height, resize_width), np.dtype(out_dtype)) for _ in range(num_buffers)
+        ]
+        self.workspace = (
+            _Workspace(in_width, resize_height, resize_width, 3) if backend == "numpy" else None
+        )
+        self.calls = 0
+
+    def __call__(self, src):
+        if src.shape != self.in_shape or src.dtype != np.uint8:
+            raise ValueError(f"expected a uint8 image of shape {self.in_shape}, got {src.dtype} {src.shape}")
+        out = self.buffers[self.calls % len(self.buffers)]
+        self.calls += 1
+        # Only RGB is kept
+        return BACKENDS[self.backend](src[..., :3], self.tables, self.scale, self.offset, out, self.workspace)
+
+
+@export_metrics
+class FusedPreprocessorOp(Operator):
+    """Fused replacement for FormatConverterOp followed by PreprocessorOp.
+
+    **==Named Inputs==**
+
+        source_video : gxf.Entity or array
+            HWC uint8 image (the tensor named "" of the video replayer).
+
+    **==Named Outputs==**
+
+        out : dict
+            {out_tensor_name: NCHW tensor}, on the GPU if `device="cuda"`.
+
+    Parameters are those of the "preprocessor" config block, plus `backend`
+    ("auto", "numba" or "numpy") and `device` ("cuda" or "cpu").
+    """
+
+    def __init__(
+        self,
+        fragment,
+        *args,
+        resize_width,
+        resize_height,
+        in_dtype="rgb888",
+        out_dtype="float32",
+        out_tensor_name="",
+        scale_min=0.0,
+        scale_max=1.0,
+        backend="auto",
+        device="cuda",
+        **kwargs,
+    ):
+        if device == "cuda" and cp is None:
+            raise ImportError("device 'cuda' requires CuPy, use device='cpu'")
+        self.config = dict(
+            resize_height=resize_height,
+            resize_width=resize_width,
+            in_dtype=in_dtype,
+            out_dtype=out_dtype,
+            scale_min=scale_min,
+            scale_max=scale_max,
+            backend=backend,
+        )
+        self.out_tensor_name = out_tensor_name
+        self.device = device
+        # Created on the first frame, once the input size is known
+        self.preprocessor = None
+
+        # Need to call the base class constructor last
+        super().__init__(fragment, *args, **kwargs)
+
+    def setup(self, spec: OperatorSpec):
+        spec.input("source_video")
+        spec.output("out")
+
+    def compute(self, op_input, op_output, context):
+        message = op_input.receive("source_video")
+        tensor = message.get("") if hasattr(message, "get") else message
+        if hasattr(tensor, "__cuda_array_interface__"):
+            # The replayer was configured to output device memory
+            image = cp.asarray(tensor).get()
+        else:
+            image = np.asarray(tensor)
+
+        if self.preprocessor is None:
+            height, width = image.shape[:2]
+            self.preprocessor = Preprocessor(height, width, **self.config)
+        out = self.preprocessor(image)
+        if self.device == "cuda":
+            out = cp.asarray(out)
+        op_output.emit({self.out_tensor_name: out}, "out")
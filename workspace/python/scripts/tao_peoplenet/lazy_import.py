@@ -0,0 +1,68 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+# Deferred imports for heavy optional modules.
+#
+#   cp = lazy_import("cupy", optional=True)
+#
+# returns a module object right away, but only executes the module the first
+# time one of its attributes is used, so scripts that never touch CuPy (or
+# only print their --help) do not pay for importing it. With
+# `optional=True`, None is returned when the module is not installed, like
+# the usual `try: import ... except ImportError` fallback.
+#
+# Before Python 3.12 the first attribute access is not thread-safe: call
+# `load()` on modules shared by operators of a multithreaded app in
+# compose() or start().
+
+import importlib.util
+import sys
+
+
+def lazy_import(name, optional=False):
+    """Return module `name`, executed on first attribute access."""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    try:
+        spec = importlib.util.find_spec(name)
+    except ImportError:
+        # Missing parent package
+        spec = None
+    if spec is None:
+        if optional:
+            return None
+        raise ImportError(f"No module named {name!r}", name=name)
+
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+def load(module):
+    """Execute a lazy module now and return it (None is returned as is)."""
+    if module is not None:
+        # Any attribute access executes the module
+        module.__name__  # noqa: B018
+    return module
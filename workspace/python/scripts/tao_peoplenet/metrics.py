@@ -0,0 +1,315 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+# Live Prometheus-style metrics for long-running applications.
+#
+# Decorate Python operators with `@export_metrics` and call `enable()` before
+# `app.run()`. A small HTTP server on localhost then serves, in Prometheus
+# text format:
+#   * ticks, messages received and emitted per operator and port (counters),
+#   * the recent tick rate and compute-time quantiles per operator,
+#   * the queue depth of each input port fed by instrumented operators,
+#   * frames dropped, as reported by operators with `record_dropped()`,
+#   * the process resident memory and CPU time.
+#
+#   curl -s http://127.0.0.1:9464/metrics
+#
+# Each operator's counters are only written by the thread running its
+# compute(), and the recent compute times live in a fixed-size ring buffer,
+# so the hot path takes no lock. Scrapes read the counters as they are,
+# which may be one tick apart from each other.
+#
+# Only Python operators can be instrumented; operators implemented in C++
+# (format converter, inference, Holoviz, ...) are not seen.
+
+import os
+import resource
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# The compute() wrappers are chained with the ones of the profiler and the
+# memory accounting, which live next to the flow tracker example
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "flow_tracker"))
+from instrument import CountingInput, Instrument  # noqa: E402
+
+_lock = threading.Lock()
+_stats = {}
+_dropped = {}
+
+_window = 1024
+_server = None
+_app = None
+_edges = None
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+class _OperatorStats:
+    __slots__ = ("ticks", "compute_ns", "received", "emitted", "starts", "durations")
+
+    def __init__(self, window):
+        self.ticks = 0
+        self.compute_ns = 0
+        self.received = {}
+        self.emitted = {}
+        # Ring buffers of the last `window` ticks, indexed by ticks % window
+        self.starts = [0] * window
+        self.durations = [0] * window
+
+
+def _wrap(compute):
+    def exported_compute(self, op_input, op_output, context):
+        stats = _stats.get(self.name)
+        if stats is None:
+            stats = _stats.setdefault(self.name, _OperatorStats(_window))
+        start = time.perf_counter_ns()
+        try:
+            return compute(
+                self,
+                CountingInput(op_input, stats.received),
+                _CountingOutput(op_output, stats.emitted),
+                context,
+            )
+        finally:
+            end = time.perf_counter_ns()
+            index = stats.ticks % len(stats.durations)
+            stats.starts[index] = start
+            stats.durations[index] = end - start
+            stats.compute_ns += end - start
+            # Incremented last, so that a scrape never reads an unwritten slot
+            stats.ticks += 1
+
+    return exported_compute
+
+
+_instrument = Instrument(_wrap)
+
+
+def export_metrics(cls):
+    """Class decorator registering an Operator subclass for the exporter."""
+    return _instrument.register(cls)
+
+
+class _CountingOutput:
+    """Wrap `op_output` to count the messages emitted on each port."""
+
+    __slots__ = ("op_output", "counts")
+
+    def __init__(self, op_output, counts):
+        self.op_output = op_output
+        self.counts = counts
+
+    def emit(self, value, port="", *args, **kwargs):
+        self.op_output.emit(value, port, *args, **kwargs)
+        self.counts[port] = self.counts.get(port, 0) + 1
+
+    def __getattr__(self, name):
+        return getattr(self.op_output, name)
+
+
+def record_dropped(name, n=1):
+    """Count `n` frames dropped by operator `name`.
+
+    Meant to be called from the operator's own compute(), like the other
+    counters.
+    """
+    _dropped[name] = _dropped.get(name, 0) + n
+
+
+def _resident_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # Peak rather than current, in KiB on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _resolve_edges():
+    """(upstream, output port, downstream, input port) of the app's graph."""
+    global _edges
+    if _edges is None and _app is not None:
+        try:
+            graph = _app.graph
+            edges = []
+            for op in graph.get_nodes():
+                for nxt in graph.get_next_nodes(op):
+                    for out, ins in graph.get_port_map(op, nxt).items():
+                        edges.extend((op.name, out, nxt.name, inp) for inp in ins)
+        except Exception:
+            # Not composed yet
+            return []
+        _edges = edges
+    return _edges or []
+
+
+def _quantiles(stats):
+    n = min(stats.ticks, len(stats.durations))
+    durations = sorted(stats.durations[:n])
+    starts = stats.starts[:n]
+    if not durations:
+        return None, None
+    values = [durations[min(n - 1, int(q * n))] / 1e9 for q in QUANTILES]
+    span = max(starts) - min(starts)
+    rate = (n - 1) / span * 1e9 if span > 0 else 0.0
+    return values, rate
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render():
+    """Return all metrics in Prometheus text exposition format."""
+    lines = []
+
+    def metric(name, kind, help, samples):
+        lines.append(f"# HELP {name} {help}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            text = ",".join(f'{key}="{_label(v)}"' for key, v in labels.items())
+            lines.append(f"{name}{{{text}}} {value}" if text else f"{name} {value}")
+
+    stats = sorted(_stats.items())
+    metric(
+        "holoscan_operator_ticks_total",
+        "counter",
+        "Number of compute() calls.",
+        [({"operator": name}, s.ticks) for name, s in stats],
+    )
+    metric(
+        "holoscan_operator_messages_received_total",
+        "counter",
+        "Messages received, per input port.",
+        [({"operator": name, "port": port}, n) for name, s in stats for port, n in list(s.received.items())],
+    )
+    metric(
+        "holoscan_operator_messages_emitted_total",
+        "counter",
+        "Messages emitted, per output port.",
+        [({"operator": name, "port": port}, n) for name, s in stats for port, n in list(s.emitted.items())],
+    )
+
+    rates, summaries = [], []
+    for name, s in stats:
+        values, rate = _quantiles(s)
+        if values is None:
+            continue
+        rates.append(({"operator": name}, f"{rate:.6g}"))
+        label = f'operator="{_label(name)}"'
+        summaries.extend(
+            f'holoscan_operator_compute_seconds{{{label},quantile="{q}"}} {v:.6g}'
+            for q, v in zip(QUANTILES, values)
+        )
+        summaries.append(f"holoscan_operator_compute_seconds_sum{{{label}}} {s.compute_ns / 1e9:.6g}")
+        summaries.append(f"holoscan_operator_compute_seconds_count{{{label}}} {s.ticks}")
+    metric(
+        "holoscan_operator_ticks_per_second",
+        "gauge",
+        f"Tick rate over the last {_window} ticks.",
+        rates,
+    )
+    metric(
+        "holoscan_operator_compute_seconds",
+        "summary",
+        "compute() wall time, quantiles over the recent ticks.",
+        [],
+    )
+    lines.extend(summaries)
+
+    # Queue depth of an input port: messages emitted towards it by
+    # instrumented upstream operators minus messages it received
+    depths = {}
+    for src, out, dst, inp in _resolve_edges():
+        if src not in _stats or dst not in _stats:
+            continue
+        emitted = _stats[src].emitted
+        # An empty port name stands for the only output port
+        sent = emitted.get(out, 0) if out else sum(list(emitted.values()))
+        depths[(dst, inp)] = depths.get((dst, inp), 0) + sent
+    metric(
+        "holoscan_queue_depth",
+        "gauge",
+        "Messages waiting on an input port (instrumented upstream operators only).",
+        [
+            ({"operator": dst, "port": inp}, max(0, sent - _stats[dst].received.get(inp, 0)))
+            for (dst, inp), sent in sorted(depths.items())
+        ],
+    )
+    metric(
+        "holoscan_frames_dropped_total",
+        "counter",
+        "Frames dropped by operators.",
+        [({"operator": name}, n) for name, n in sorted(_dropped.items())],
+    )
+    metric("process_resident_memory_bytes", "gauge", "Resident memory size in bytes.", [({}, _resident_bytes())])
+    metric("process_cpu_seconds_total", "counter", "Process CPU time in seconds.", [({}, f"{time.process_time():.6g}")])
+    return "\n".join(lines) + "\n"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def enable(app=None, host="127.0.0.1", port=9464, window=1024):
+    """Instrument decorated operators and start serving /metrics.
+
+    Pass the application as `app` to get queue depths, which are derived
+    from its graph. Quantiles and tick rates are computed over the last
+    `window` ticks of each operator. The server thread is a daemon thread,
+    so it does not keep the process alive.
+    """
+    global _window, _server, _app, _edges
+    with _lock:
+        _window = max(1, int(window))
+        _app = app
+        _edges = None
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), _Handler)
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name="metrics", daemon=True).start()
+    _instrument.enable()
+    return _server.server_address
+
+
+def disable():
+    """Stop the server and restore the original compute() methods."""
+    global _server
+    _instrument.disable()
+    with _lock:
+        if _server is not None:
+            _server.shutdown()
+            _server.server_close()
+            _server = None
@@ -0,0 +1,241 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+# Overlay rendering and recording without Holoviz.
+#
+# `OverlayRecorderOp` draws the "person" and "faces" rectangles of the
+# postprocessor onto the video frames with NumPy slice writes, using the
+# colors, line widths and opacities of the Holoviz configuration, and hands
+# the annotated frames to a `FrameWriter`. The writer encodes and writes them
+# on a background thread behind a bounded queue, so a slow disk drops frames
+# (counted) instead of slowing down the pipeline.
+#
+# Output formats:
+#   raw   one file of concatenated RGB frames, e.g. for
+#         ffmpeg -f rawvideo -pix_fmt rgb24 -s WxH -r 30 -i out.rgb out.mp4
+#   ppm   a directory of PPM images (no dependency)
+#   png   a directory of PNG images (requires Pillow)
+
+import os
+import queue
+import threading
+
+import numpy as np
+from holoscan.core import Operator, OperatorSpec
+
+from lazy_import import lazy_import
+from metrics import export_metrics
+
+cp = lazy_import("cupy", optional=True)
+Image = lazy_import("PIL.Image", optional=True)
+
+FORMATS = ("raw", "ppm", "png")
+
+
+def to_host(array):
+    """NumPy view or copy of a host or device array."""
+    if hasattr(array, "__cuda_array_interface__"):
+        return cp.asnumpy(cp.asarray(array))
+    return np.asarray(array)
+
+
+def overlay_styles(tensors):
+    """Rectangle styles from the "tensors" list of a Holoviz config.
+
+    Returns {tensor name: (RGB uint8 color, line width, opacity)}, where the
+    opacity includes the alpha of the color.
+    """
+    styles = {}
+    for tensor in tensors:
+        if tensor.get("type") != "rectangles":
+            continue
+        color = tensor.get("color", [1.0, 1.0, 1.0, 1.0])
+        rgb = np.clip(np.rint(np.asarray(color[:3], np.float32) * 255), 0, 255).astype(np.uint8)
+        alpha = color[3] if len(color) > 3 else 1.0
+        styles[tensor["name"]] = (rgb, max(1, int(tensor.get("line_width", 1))), tensor.get("opacity", 1.0) * alpha)
+    return styles
+
+
+def _blend(region, color, opacity):
+    if opacity >= 1:
+        region[...] = color
+    else:
+        region[...] = region * (1 - opacity) + color * opacity
+
+
+def draw_rectangles(frame, points, color, line_width=1, opacity=1.0):
+    """Draw rectangles onto an HWC uint8 `frame`, in place.
+
+    `points` holds normalized (x, y) corner pairs, as emitted for Holoviz:
+    shape (1, 2 * n, 2) or (n, 4). Empty rectangles are ignored.
+    """
+    height, width = frame.shape[:2]
+    boxes = np.asarray(points, np.float32).reshape(-1, 4) * [width, height, width, height]
+    boxes = np.rint(boxes).astype(np.int64)
+    boxes[:, [0, 2]] = np.clip(boxes[:, [0, 2]], 0, width - 1)
+    boxes[:, [1, 3]] = np.clip(boxes[:, [1, 3]], 0, height - 1)
+    boxes = boxes[(boxes[:, 2] > boxes[:, 0]) & (boxes[:, 3] > boxes[:, 1])]
+    color = color[: frame.shape[2]].astype(np.float32)
+
+    lw = line_width
+    for x0, y0, x1, y1 in boxes.tolist():
+        # Horizontal bands span the full width, vertical ones exclude them,
+        # so that no pixel is blended twice
+        _blend(frame[y0 : min(y0 + lw, y1 + 1), x0 : x1 + 1], color, opacity)
+        _blend(frame[max(y1 - lw + 1, y0 + lw) : y1 + 1, x0 : x1 + 1], color, opacity)
+        inner = slice(y0 + lw, max(y0 + lw, y1 - lw + 1))
+        _blend(frame[inner, x0 : min(x0 + lw, x1 + 1)], color, opacity)
+        _blend(frame[inner, max(x1 - lw + 1, x0 + lw) : x1 + 1], color, opacity)
+    return frame
+
+
+class FrameWriter:
+    """Write frames on a background thread.
+
+    At most `max_queue` frames wait to be written. When the queue is full,
+    `write()` drops the frame (and returns False), or waits if `block` is
+    set. Frames must not be modified after they are passed to `write()`.
+    """
+
+    def __init__(self, path, format="raw", max_queue=8, block=False):
+        if format not in FORMATS:
+            raise ValueError(f"unknown format {format!r}, expected one of {FORMATS}")
+        if format == "png" and Image is None:
+            raise ImportError("format 'png' requires Pillow")
+        self.path = path
+        self.format = format
+        self.block = block
+        self.written = 0
+        self.dropped = 0
+        self.shape = None
+        self.error = None
+        if format == "raw":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self.file = open(path, "wb")
+        else:
+            os.makedirs(path, exist_ok=True)
+            self.file = None
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.thread = threading.Thread(target=self._run, name="frame_writer", daemon=True)
+        self.thread.start()
+
+    def write(self, frame):
+        try:
+            self.queue.put(frame, block=self.block)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def _run(self):
+        while True:
+            frame = self.queue.get()
+            if frame is None:
+                return
+            try:
+                self._write(frame)
+                self.written += 1
+            except Exception as e:
+                # Keep draining, the error is raised by close()
+                self.error = e
+
+    def _write(self, frame):
+        self.shape = frame.shape
+        if self.format == "raw":
+            self.file.write(memoryview(np.ascontiguousarray(frame)).cast("B"))
+            return
+        name = os.path.join(self.path, f"frame_{self.written:06d}.{self.format}")
+        if self.format == "png":
+            Image.fromarray(frame).save(name, compress_level=1)
+        else:
+            height, width = frame.shape[:2]
+            with open(name, "wb") as f:
+                f.write(b"P6\n%d %d\n255\n" % (width, height))
+                f.write(memoryview(np.ascontiguousarray(frame[..., :3])).cast("B"))
+
+    def close(self):
+        """Write the queued frames and stop the thread."""
+        self.queue.put(None)
+        self.thread.join()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        if self.error is not None:
+            raise self.error
+
+
+@export_metrics
+class OverlayRecorderOp(Operator):
+    """Draw detections onto the video frames and record them.
+
+    **==Named Inputs==**
+
+        video : gxf.Entity or array
+            HWC uint8 frame (the tensor named "" of the video replayer).
+        detections : dict
+            {name: rectangles} as emitted by PostprocessorOp for Holoviz.
+
+    Parameters
+    ----------
+    path : str
+        Output file ("raw") or directory ("ppm", "png").
+    tensors : list
+        The "tensors" list of the Holoviz config; the rectangle entries
+        give the style of each detection name.
+    format, max_queue, block
+        See `FrameWriter`.
+    """
+
+    def __init__(self, fragment, *args, path, tensors=(), format="raw", max_queue=8, block=False, **kwargs):
+        self.styles = overlay_styles(tensors)
+        self.writer_args = dict(path=path, format=format, max_queue=max_queue, block=block)
+        self.writer = None
+
+        # Need to call the base class constructor last
+        super().__init__(fragment, *args, **kwargs)
+
+    def setup(self, spec: OperatorSpec):
+        spec.input("video")
+        spec.input("detections")
+
+    def start(self):
+        self.writer = FrameWriter(**self.writer_args)
+
+    def stop(self):
+        self.writer.close()
+        print(
+            f"{self.name}: wrote {self.writer.written} frames to {self.writer.path},"
+            f" dropped {self.writer.dropped}"
+        )
+        if self.writer.format == "raw" and self.writer.shape is not None:
+            height, width = self.writer.shape[:2]
+            print(f"{self.name}: raw rgb24 frames of {width}x{height}")
+
+    def compute(self, op_input, op_output, context):
+        message = op_input.receive("video")
+        detections = op_input.receive("detections")
+        tensor = message.get("") if hasattr(message, "get") else message
+        # The copy is handed over to the writer thread
+        frame = np.array(to_host(tensor)[..., :3])
+        for name, (color, line_width, opacity) in self.styles.items():
+            if name in detections:
+                draw_rectangles(frame, to_host(detections[name]), color, line_width, opacity)
+        self.writer.write(frame)
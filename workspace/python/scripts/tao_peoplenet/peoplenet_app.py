@@ -0,0 +1,583 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+
+# For more information and the code refer to the github page for tao_peoplenet example on holohub:
+# https://github.com/nvidia-holoscan/holohub/tree/main/applications/tao_peoplenet
+#
+# Operators and application of tao_peoplenet.py, which only imports them
+# once it runs.
+
+import os
+import sys
+
+import numpy as np
+from holoscan.core import Application, Operator, OperatorSpec
+
+from lazy_import import lazy_import, load
+from metrics import export_metrics
+
+# The profiler and memory accounting live next to the flow tracker example
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "flow_tracker"))
+from memory_accounting import account_memory  # noqa: E402
+from profiler import profile_compute  # noqa: E402
+
+# CuPy is only imported when the app is composed
+cp = lazy_import("cupy")
+
+
+@export_metrics
+@profile_compute
+@account_memory
+class PreprocessorOp(Operator):
+    """Operator to format input image for inference"""
+    def setup(self, spec: OperatorSpec):
+        spec.input("in")
+        spec.output("out")
+
+    def compute(self, op_input, op_output, context):
+        # Get input message
+        in_message = op_input.receive("in")
+
+        # Transpose
+        tensor = cp.asarray(in_message.get("preprocessed")).get()
+        # OBS: Numpy conversion and moveaxis is needed to avoid strange
+        # strides issue when doing inference
+        tensor = np.moveaxis(tensor, 2, 0)[None]
+        tensor = cp.asarray(tensor)
+
+        # Create output message
+        out_message = {"preprocessed": tensor}
+        op_output.emit(out_message, "out")
+
+
+@export_metrics
+@profile_compute
+@account_memory
+class PostprocessorOp(Operator):
+    """Operator to post-process inference output:
+    * Reparameterize bounding boxes
+    * Non-max suppression
+    * Make boxes compatible with Holoviz
+
+    With `emit_scores`, the scores of the boxes of each label are emitted
+    too, as f"{label}_scores" (see detection_log.py).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+    def setup(self, spec: OperatorSpec):
+        spec.input("in")
+        spec.output("out")
+        spec.param("iou_threshold", 0.15)
+        spec.param("score_threshold", 0.5)
+        spec.param("image_width", None)
+        spec.param("image_height", None)
+        spec.param("box_scale", None)
+        spec.param("box_offset", None)
+        spec.param("grid_height", None)
+        spec.param("grid_width", None)
+        spec.param("emit_scores", False)
+
+    def compute(self, op_input, op_output, context):
+        # Get input message
+        in_message = op_input.receive("in")
+
+        # Convert input to cupy array
+        boxes = cp.asarray(in_message.get("boxes"))[0, ...]
+        scores = cp.asarray(in_message.get("scores"))[0, ...]
+
+        # PeopleNet has three classes:
+        # 0. Person
+        # 1. Bag
+        # 2. Face
+        # Here we only keep the Person and Face classes
+        boxes = boxes[[0, 1, 2, 3, 8, 9, 10, 11], ...][None]
+        scores = scores[[0, 2], ...][None]
+
+        # Loop over label classes
+        out = {"person": None, "faces": None}
+        for i, label in enumerate(out):
+            # Reparameterize boxes
+            out[label], scores_nms = self.reparameterize_boxes(
+                boxes[:, 0 + i * 4 : 4 + i * 4, ...],
+                scores[:, i, ...][None],
+            )
+
+            # Non-max suppression
+            out[label], scores_nms = self.nms(out[label], scores_nms)
+            if self.emit_scores:
+                out[f"{label}_scores"] = self.scores_for_holoviz(scores_nms)
+
+            # Reshape for HoloViz
+            if len(out[label]) == 0:
+                out[label] = np.zeros([1, 2, 2]).astype(np.float32)
+            else:
+                out[label][:, [0, 2]] /= self.image_width
+                out[label][:, [1, 3]] /= self.image_height
+                out[label] = cp.reshape(out[label][None], (1, -1, 2))
+                # out[label] = cp.asnumpy(out[label])
+
+        # Create output message
+        op_output.emit(out, "out")
+
+    def scores_for_holoviz(self, scores):
+        """Scores as float32, with a 0 placeholder like the empty boxes."""
+        if len(scores) == 0:
+            return np.zeros([1], np.float32)
+        return cp.asarray(scores, np.float32)
+
+    def nms(self, boxes, scores):
+        """Non-max suppression (NMS)
+
+        Parameters
+        ----------
+        boxes : array (4, n)
+        scores : array (n,)
+
+        Returns
+        ----------
+        boxes : array (m, 4)
+        scores : array (m,)
+
+        """
+        if len(boxes) == 0:
+            return cp.asarray([]), cp.asarray([])
+
+        # Get coordinates
+        x0, y0, x1, y1 = boxes[0, :], boxes[1, :], boxes[2, :], boxes[3, :]
+
+        # Area of bounding boxes
+        area = (x1 - x0 + 1) * (y1 - y0 + 1)
+
+        # Get indices of sorted scores
+        indices = cp.argsort(scores)
+
+        # Output boxes and scores
+        boxes_out, scores_out = [], []
+
+        # Iterate over bounding boxes
+        while len(indices) > 0:
+            # Get index with highest score from remaining indices
+            index = indices[-1]
+
+            # Pick bounding box with highest score
+            boxes_out.append(boxes[:, index])
+            scores_out.append(scores[index])
+
+            # Get coordinates
+            x00 = cp.maximum(x0[index], x0[indices[:-1]])
+            x11 = cp.minimum(x1[index], x1[indices[:-1]])
+            y00 = cp.maximum(y0[index], y0[indices[:-1]])
+            y11 = cp.minimum(y1[index], y1[indices[:-1]])
+
+            # Compute IOU
+            width = cp.maximum(0, x11 - x00 + 1)
+            height = cp.maximum(0, y11 - y00 + 1)
+            overlap = width * height
+            union = area[index] + area[indices[:-1]] - overlap
+            iou = overlap / union
+
+            # Threshold and prune
+            left = cp.where(iou < self.iou_threshold)
+            indices = indices[left]
+
+        # To array
+        boxes = cp.asarray(boxes_out)
+        scores = cp.asarray(scores_out)
+
+        return boxes, scores
+
+    def reparameterize_boxes(self, boxes, scores):
+        """Reparameterize boxes from corner+width+height to corner+corner.
+
+        Parameters
+        ----------
+        boxes : array (1, 4, grid_height, grid_width)
+        scores : array (1, 1, grid_height, grid_width)
+
+        Returns
+        ----------
+        boxes : array (4, n)
+        scores : array (n,)
+
+        """
+        cell_height = self.image_height / self.grid_height
+        cell_width = self.image_width / self.grid_width
+
+        # Generate the grid coordinates
+        mx, my = cp.meshgrid(cp.arange(self.grid_width), cp.arange(self.grid_height))
+        mx = mx.astype(np.float32).reshape((1, 1, self.grid_height, self.grid_width))
+        my = my.astype(np.float32).reshape((1, 1, self.grid_height, self.grid_width))
+
+        # Compute the box corners
+        xmin = -(boxes[0, 0, ...] + self.box_offset) * self.box_scale + mx * cell_width
+        ymin = -(boxes[0, 1, ...] + self.box_offset) * self.box_scale + my * cell_height
+        xmax = (boxes[0, 2, ...] + self.box_offset) * self.box_scale + mx * cell_width
+        ymax = (boxes[0, 3, ...] + self.box_offset) * self.box_scale + my * cell_height
+        boxes = cp.concatenate([xmin, ymin, xmax, ymax], axis=1)
+
+        # Select the scores that are above the threshold
+        scores_mask = scores > self.score_threshold
+        scores = scores[scores_mask]
+        scores_mask = cp.repeat(scores_mask, 4, axis=1)
+        boxes = boxes[scores_mask]
+
+        # Reshape after masking
+        n = int(boxes.size / 4)
+        boxes = boxes.reshape(4, n)
+
+        return boxes, scores
+
+
+@export_metrics
+@profile_compute
+@account_memory
+class TiledPostprocessorOp(PostprocessorOp):
+    """Post-process the inference output of a batch of tiles (see tiling.py):
+    * Reparameterize the bounding boxes of each tile
+    * Shift them to frame coordinates
+    * Non-max suppression over all tiles, merging the boxes found twice
+      where tiles overlap
+    * Make boxes compatible with Holoviz
+
+    Boxes of tiles skipped by the tiler are reused from their last batch.
+    `image_width` and `image_height` are the tile size.
+    """
+
+    def __init__(self, *args, **kwargs):
+        # Last boxes and scores of each tile, per label
+        self.cache = None
+        super().__init__(*args, **kwargs)
+
+    def setup(self, spec: OperatorSpec):
+        super().setup(spec)
+        spec.input("tiles")
+
+    def compute(self, op_input, op_output, context):
+        # Get input messages
+        in_message = op_input.receive("in")
+        tiles = op_input.receive("tiles")
+
+        # Keep the Person and Face classes, as in PostprocessorOp
+        boxes = cp.asarray(in_message.get("boxes"))[:, [0, 1, 2, 3, 8, 9, 10, 11], ...]
+        scores = cp.asarray(in_message.get("scores"))[:, [0, 2], ...]
+
+        labels = ("person", "faces")
+        if self.cache is None or len(self.cache["person"]) != tiles.num_tiles:
+            self.cache = {label: [None] * tiles.num_tiles for label in labels}
+
+        height, width = tiles.frame
+        out = {}
+        for i, label in enumerate(labels):
+            # Reparameterize the boxes of each tile and shift them to the frame
+            for n, index in enumerate(tiles.indices):
+                tile_boxes, tile_scores = self.reparameterize_boxes(
+                    boxes[n : n + 1, 0 + i * 4 : 4 + i * 4, ...],
+                    scores[n : n + 1, i, ...][None],
+                )
+                y, x = tiles.origins[n]
+                tile_boxes[[0, 2]] += float(x)
+                tile_boxes[[1, 3]] += float(y)
+                self.cache[label][index] = (tile_boxes, tile_scores)
+
+            cached = [entry for entry in self.cache[label] if entry is not None]
+            all_boxes = cp.concatenate([b for b, _ in cached], axis=1)
+            all_scores = cp.concatenate([s for _, s in cached])
+
+            # Non-max suppression, across tile seams too
+            out[label], scores_nms = self.nms(all_boxes, all_scores)
+            if self.emit_scores:
+                out[f"{label}_scores"] = self.scores_for_holoviz(scores_nms)
+
+            # Reshape for HoloViz, normalized to the frame size
+            if len(out[label]) == 0:
+                out[label] = np.zeros([1, 2, 2]).astype(np.float32)
+            else:
+                out[label][:, [0, 2]] /= width
+                out[label][:, [1, 3]] /= height
+                out[label] = cp.reshape(out[label][None], (1, -1, 2))
+
+        # Create output message
+        op_output.emit(out, "out")
+
+
+class PeopleAndFaceDetectApp(Application):
+    def __init__(self, data_path, model_path, *args, **kwargs):
+        """Initialize the face and people detection application"""
+        super().__init__(*args, **kwargs)
+        self.name = "People and Face Detection App"
+        self.sample_data_path = data_path
+        self.model_path = model_path
+        self.engine_cache = None
+
+    def compose(self):
+        # The operator bindings are only loaded when the app is composed
+        from holoscan.operators import (
+            FormatConverterOp,
+            HolovizOp,
+            InferenceOp,
+            VideoStreamReplayerOp,
+        )
+        from holoscan.resources import UnboundedAllocator
+
+        import queue_policy
+        from replicate import replicate
+
+        # Execute CuPy here rather than in the first compute(), which may run
+        # on a worker thread of the MultiThreadScheduler (see lazy_import.py).
+        # The helper modules share the same module object.
+        load(cp)
+
+        pool = UnboundedAllocator(self, name="pool")
+
+        # Video source operator
+        source = VideoStreamReplayerOp(
+            self,
+            name="replayer_source",
+            directory=self.sample_data_path,
+            **self.kwargs("replayer_source"),
+        )
+
+        preprocessor_args = self.kwargs("preprocessor")
+        fused_args = self.kwargs("fused_preprocessor")
+        tiling_args = self.kwargs("tiling")
+        tiled = tiling_args.pop("enabled", False)
+        # The optional stages below are imported when they are enabled
+        if tiled:
+            from tiling import TilerOp, tile_grid
+
+            num_tiles = len(
+                tile_grid(
+                    tiling_args.pop("frame_height"),
+                    tiling_args.pop("frame_width"),
+                    preprocessor_args["resize_height"],
+                    preprocessor_args["resize_width"],
+                    tiling_args.get("overlap", 64),
+                )
+            )
+            max_batch = None
+            if self.kwargs("inference")["backend"] == "trt":
+                # Only an engine built by the engine cache has a dynamic
+                # batch size, up to max_batch
+                cache_args = self.kwargs("engine_cache")
+                if not cache_args.get("enabled", False):
+                    raise ValueError("tiling with the trt backend requires the engine cache")
+                max_batch = cache_args.get("max_batch", 1)
+                if max_batch < num_tiles:
+                    raise ValueError(
+                        f"tiling gives {num_tiles} tiles per frame, set the engine_cache "
+                        f"max_batch to at least {num_tiles} (now {max_batch})"
+                    )
+
+            # Full resolution tiles of the model input size instead of a
+            # downscaled frame
+            format_converter = TilerOp(
+                self,
+                name="tiler",
+                tile_width=preprocessor_args["resize_width"],
+                tile_height=preprocessor_args["resize_height"],
+                scale_min=preprocessor_args["scale_min"],
+                scale_max=preprocessor_args["scale_max"],
+                out_tensor_name=preprocessor_args["out_tensor_name"],
+                out_dtype=preprocessor_args["out_dtype"],
+                max_batch=max_batch,
+                **tiling_args,
+            )
+            preprocessor = None
+        elif fused_args.pop("enabled", False):
+            from fused_preprocessor import FusedPreprocessorOp
+
+            # Convert, resize, normalize and transpose in one CPU operator
+            format_converter = FusedPreprocessorOp(
+                self,
+                name="preprocessor",
+                **fused_args,
+                **preprocessor_args,
+            )
+            preprocessor = None
+        else:
+            uint8_transport = self.kwargs("uint8_transport").pop("enabled", False)
+            converter_args = dict(preprocessor_args)
+            if uint8_transport:
+                # Resize only, the frames stay uint8 until NormalizeOp
+                converter_args["out_dtype"] = "rgb888"
+
+            # Format converter operator
+            format_converter = FormatConverterOp(
+                self,
+                name="preprocessor",
+                pool=pool,
+                **converter_args,
+            )
+
+            if uint8_transport:
+                from uint8_transport import NormalizeOp
+
+                # Convert, normalize and transpose into the inference input,
+                # see uint8_transport.py
+                preprocessor = NormalizeOp(
+                    self,
+                    name="normalize",
+                    tensor_name=preprocessor_args["out_tensor_name"],
+                    scale_min=preprocessor_args["scale_min"],
+                    scale_max=preprocessor_args["scale_max"],
+                    out_dtype=preprocessor_args["out_dtype"],
+                )
+            else:
+                # Preprocessor operator
+                preprocessor = PreprocessorOp(
+                    self,
+                    name="transpose",
+                    pool=pool,
+                )
+
+        # Inference operator
+        inference_args = self.kwargs("inference")
+        inference_args["model_path_map"] = {
+            "face_detect": os.path.join(self.sample_data_path, "resnet34_peoplenet_int8.onnx")
+        }
+
+        # Reuse the TensorRT engine built by an earlier launch, see
+        # engine_cache.py
+        cache_args = self.kwargs("engine_cache")
+        if cache_args.pop("enabled", False) and inference_args["backend"] == "trt":
+            from engine_cache import EngineCache, TensorRTBuilder
+
+            # Kept by the app: the engines stay locked against eviction by
+            # other launches until it is closed
+            cache = self.engine_cache = EngineCache(
+                cache_args.pop("directory"),
+                max_bytes=int(cache_args.pop("max_size_gb") * (1 << 30)),
+            )
+            engine_config = dict(
+                backend=inference_args["backend"],
+                input_shape=[1, 3, preprocessor_args["resize_height"], preprocessor_args["resize_width"]],
+                **cache_args,
+            )
+            # Each engine is built on the GPU its model runs on, whose name
+            # is part of the cache key
+            device_map = inference_args.get("device_map", {})
+            inference_args["model_path_map"] = {
+                name: cache.get(path, engine_config, TensorRTBuilder(device_map.get(name, 0)))
+                for name, path in inference_args["model_path_map"].items()
+            }
+            inference_args["is_engine_path"] = True
+
+        inference = InferenceOp(
+            self,
+            name="inference",
+            allocator=pool,
+            **inference_args,
+        )
+
+        # Postprocessor operator
+        postprocessor_args = self.kwargs("postprocessor")
+        postprocessor_args["image_width"] = preprocessor_args["resize_width"]
+        postprocessor_args["image_height"] = preprocessor_args["resize_height"]
+        replicate_args = self.kwargs("replicate_postprocessor")
+        if tiled and replicate_args["replicas"] > 1:
+            raise ValueError("the tiled postprocessor keeps state and cannot be replicated")
+
+        def make_postprocessor(index, name):
+            return PostprocessorOp(self, name=name, allocator=pool, **postprocessor_args)
+
+        recorder_args = self.kwargs("recorder")
+        if recorder_args.pop("enabled", False):
+            from overlay import OverlayRecorderOp
+
+            # Draw the detections with NumPy and record them instead of
+            # rendering them with Holoviz
+            sink = OverlayRecorderOp(
+                self,
+                name="recorder",
+                tensors=self.kwargs("holoviz")["tensors"],
+                **recorder_args,
+            )
+            video_port, detections_port = "video", "detections"
+        else:
+            # Vizualization operator
+            sink = HolovizOp(self,
+                             allocator=pool,
+                             name="holoviz",
+                             headless=True, # this True to run the app on the cluster (see below)
+                             **self.kwargs("holoviz"))
+            video_port = detections_port = "receivers"
+
+        # Optionally log every detection to disk on the way to the sink, see
+        # detection_log.py
+        detections_sink = sink
+        frame_ids = None
+        log_args = self.kwargs("detection_log")
+        if log_args.pop("enabled", False):
+            from detection_log import DetectionLogOp, FrameIds
+
+            postprocessor_args["emit_scores"] = True
+            # Source frame ids, kept across the frames dropped on the way
+            frame_ids = FrameIds()
+            detections_sink = DetectionLogOp(
+                self, name="detection_log", frame_ids=frame_ids, **log_args
+            )
+            self.add_flow(detections_sink, sink, {("out", detections_port)})
+            detections_port = "in"
+
+        # The source can drop frames when the pipeline falls behind, before
+        # they are sent to both branches, see queue_policy.py and
+        # "queue_policies" in the YAML
+        self.gate = queue_policy.add_flows(
+            self,
+            source,
+            "output",
+            [(sink, video_port), (format_converter, "source_video")],
+            self.kwargs("queue_policies"),
+            frame_ids=frame_ids,
+        )
+        if preprocessor is None:
+            self.add_flow(format_converter, inference, {("out", "receivers")})
+        else:
+            self.add_flow(format_converter, preprocessor)
+            self.add_flow(preprocessor, inference, {("", "receivers")})
+        if tiled:
+            postprocessor = TiledPostprocessorOp(
+                self,
+                name="postprocessor",
+                allocator=pool,
+                **postprocessor_args,
+            )
+            self.add_flow(inference, postprocessor, {("transmitter", "in")})
+            self.add_flow(format_converter, postprocessor, {("tiles", "tiles")})
+            self.add_flow(postprocessor, detections_sink, {("out", detections_port)})
+            self.reorder_buffer = None
+        else:
+            # Parallel postprocessors with outputs kept in frame order, see
+            # replicate.py
+            self.reorder_buffer = replicate(
+                self,
+                make_postprocessor,
+                inference,
+                detections_sink,
+                upstream_port="transmitter",
+                downstream_port=detections_port,
+                on_drop=None if frame_ids is None else frame_ids.drop,
+                name="postprocessor",
+                **replicate_args,
+            )
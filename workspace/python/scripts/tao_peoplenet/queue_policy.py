@@ -0,0 +1,199 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+# Queue policies on the output of a source, for real-time pipelines.
+#
+# By default a Holoscan connection blocks: when a downstream operator is slow
+# the upstream operator waits, and a live source falls further and further
+# behind. `add_flows()` below connects an output port to all of its
+# downstream operators through a single `QueuePolicyOp` gate when the
+# upstream operator is configured with another policy:
+#
+#   block             keep the default connections, no gate is inserted
+#   drop-oldest       buffer at most `capacity` messages, drop the oldest
+#   keep-latest       always forward the freshest message (capacity 1)
+#   drop-on-deadline  drop messages that waited in the gate more than
+#                     `max_wait_ms`
+#
+# Policies are read from a YAML block keyed by the upstream operator name:
+#
+#   queue_policies:
+#     replayer_source:
+#       policy: keep-latest
+#
+# The gate sits before the fan-out, so every branch receives the same
+# messages: a display branch never shows a frame with the detections of
+# another frame dropped by a slower inference branch.
+#
+# The gate drains its input queue on every tick and counts what it drops
+# (also reported by metrics.py). Like any operator, it only ticks when a
+# message is waiting and the downstream input queues have room, and forwards
+# one message per tick; buffered messages are forwarded when the gate ticks
+# next, that is when a new message arrives. The policies therefore do not
+# decouple the upstream operator from a stalled downstream operator: while
+# the downstream operator does not consume, messages pile up in the gate's
+# input queue and the upstream operator blocks once it is full, as with the
+# default connection. They shed load when the downstream operator is merely
+# slower than the source. Holoscan offers no way to emit only when the
+# downstream queue has room without this gating.
+#
+# Messages are stamped when the gate drains them from its input queue, as
+# Holoscan does not expose when a message was emitted: `max_wait_ms` bounds
+# the time spent in the gate's buffer, not the age of the frame.
+
+import time
+from collections import deque
+
+from holoscan.core import IOSpec, Operator, OperatorSpec
+
+import metrics
+from metrics import export_metrics
+
+POLICIES = ("block", "drop-oldest", "keep-latest", "drop-on-deadline")
+
+# Capacity of the gate's own input queue, which is drained on every tick. The
+# upstream operator waits when it is full; a message pushed anyway replaces
+# the oldest one, without it being counted.
+INPUT_CAPACITY = 64
+
+
+@export_metrics
+class QueuePolicyOp(Operator):
+    """Forward messages from "in" to "out" according to a queue policy.
+
+    **==Named Inputs==**
+
+        in : any
+            Messages from the upstream operator.
+
+    **==Named Outputs==**
+
+        out : any
+            Messages kept by the policy, oldest first.
+
+    Parameters
+    ----------
+    policy : str
+        One of `POLICIES`.
+    capacity : int
+        Messages buffered with "drop-oldest" and "drop-on-deadline".
+    max_wait_ms : float
+        Maximum time a message may wait in the gate's buffer with
+        "drop-on-deadline", counted from the tick that received it.
+    frame_ids : FrameIds, optional
+        Told the index of each forwarded message in the input stream, see
+        detection_log.py.
+    """
+
+    def __init__(
+        self,
+        fragment,
+        *args,
+        policy="keep-latest",
+        capacity=1,
+        max_wait_ms=100.0,
+        frame_ids=None,
+        **kwargs,
+    ):
+        if policy not in POLICIES:
+            raise ValueError(f"unknown queue policy {policy!r}, expected one of {POLICIES}")
+        if capacity < 1:
+            raise ValueError("capacity must be >= 1")
+        self.policy = policy
+        self.capacity = 1 if policy == "keep-latest" else capacity
+        self.max_wait_ns = int(max_wait_ms * 1e6)
+        self.frame_ids = frame_ids
+        self.queue = deque()
+        self.received = 0
+        self.forwarded = 0
+        self.dropped = 0
+
+        # Need to call the base class constructor last
+        super().__init__(fragment, *args, **kwargs)
+
+    def setup(self, spec: OperatorSpec):
+        if self.policy == "block":
+            spec.input("in")
+        else:
+            # Pop (drop the oldest) rather than block the upstream operator
+            # if the input queue ever overflows
+            spec.input("in").connector(
+                IOSpec.ConnectorType.DOUBLE_BUFFER, capacity=INPUT_CAPACITY, policy=0
+            )
+        spec.output("out")
+
+    def compute(self, op_input, op_output, context):
+        if self.policy == "block":
+            op_output.emit(op_input.receive("in"), "out")
+            self._forwarded(self.received)
+            self.received += 1
+            return
+
+        now = time.perf_counter_ns()
+        dropped = 0
+        while True:
+            message = op_input.receive("in")
+            if message is None:
+                break
+            self.queue.append((now, self.received, message))
+            self.received += 1
+            if len(self.queue) > self.capacity:
+                self.queue.popleft()
+                dropped += 1
+
+        if self.policy == "drop-on-deadline":
+            while self.queue and now - self.queue[0][0] > self.max_wait_ns:
+                self.queue.popleft()
+                dropped += 1
+
+        if dropped:
+            self.dropped += dropped
+            metrics.record_dropped(self.name, dropped)
+        if self.queue:
+            _, index, message = self.queue.popleft()
+            op_output.emit(message, "out")
+            self._forwarded(index)
+
+    def _forwarded(self, index):
+        self.forwarded += 1
+        if self.frame_ids is not None:
+            self.frame_ids.put(index)
+
+
+def add_flows(app, upstream, out_port, downstreams, policies=None, frame_ids=None):
+    """Connect `out_port` of `upstream` to several downstream operators.
+
+    `downstreams` lists (operator, input port) pairs. `policies` maps the
+    upstream operator name to the QueuePolicyOp arguments, as in the
+    "queue_policies" YAML block; with a policy other than "block" one gate is
+    inserted before the fan-out. `frame_ids` is passed to the gate. Returns
+    the gate, or None when the connections block.
+    """
+    config = dict((policies or {}).get(upstream.name, {}))
+    if config.get("policy", "block") != "block":
+        gate = QueuePolicyOp(app, name=f"{upstream.name}_gate", frame_ids=frame_ids, **config)
+        app.add_flow(upstream, gate, {(out_port, "in")})
+        upstream, out_port = gate, "out"
+    else:
+        gate = None
+    for downstream, in_port in downstreams:
+        app.add_flow(upstream, downstream, {(out_port, in_port)})
+    return gate
@@ -0,0 +1,296 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+# Data-parallel replicas of a stateless stage, with outputs kept in order.
+#
+# `replicate()` wires `replicas` copies of an operator between an upstream
+# and a downstream operator:
+#
+#                       +-> replica0 -> tap0 -+
+#   upstream -> dispatch -+-> replica1 -> tap1 -+-> ReorderBuffer
+#                  |      +-> replica2 -> tap2 -+        |
+#                  +----------------- seq ----------> reorder -> downstream
+#
+# The dispatcher numbers every message and sends it to one replica, in turn
+# ("round-robin") or to the replica with the fewest messages in flight
+# ("least-loaded"). Replicas process their messages in order, one output per
+# input, so a tap knows the sequence number of each output it receives and
+# files it in a shared ReorderBuffer. The reorder operator ticks once per
+# sequence number (sent by the dispatcher) and emits the outputs in input
+# order.
+#
+# At most `window` messages are in flight, and at most `replica_capacity`
+# per replica (the capacity of a replica's input queue, 1 by default): the
+# dispatcher's outputs do not wait for room downstream, so that a busy
+# replica does not hold up the others, and the dispatcher checks for room
+# itself instead. Past these limits it waits, and drops the message if
+# there is still no room after `timeout_ms`. The
+# reorder operator waits at most `timeout_ms` for an output; it then skips
+# that message, and the output is discarded if it arrives later.
+#
+# Pass `on_drop` to be told which messages were dropped or skipped, by their
+# index in the dispatcher's input stream.
+#
+# The replicas are ordinary operators (Python or C++) running concurrently,
+# which needs the MultiThreadScheduler with at least `replicas + 3` worker
+# threads: the dispatcher and the reorder operator block while they wait.
+# Only stateless operators can be replicated, since each replica sees a
+# share of the messages.
+
+import threading
+from collections import deque
+
+from holoscan.core import ConditionType, Operator, OperatorSpec
+
+import metrics
+from metrics import export_metrics
+
+DISPATCH_POLICIES = ("round-robin", "least-loaded")
+
+
+class ReorderBuffer:
+    """State shared by the dispatcher, the taps and the reorder operator.
+
+    Counters:
+        dispatched  messages sent to a replica
+        emitted     outputs emitted in order
+        dropped     messages dropped because the window stayed full
+        timeouts    messages skipped because their output was too late
+        late        outputs discarded because their message was skipped
+    """
+
+    def __init__(
+        self,
+        replicas,
+        policy="round-robin",
+        window=8,
+        timeout_ms=1000.0,
+        on_drop=None,
+        replica_capacity=1,
+    ):
+        if policy not in DISPATCH_POLICIES:
+            raise ValueError(f"unknown dispatch policy {policy!r}, expected one of {DISPATCH_POLICIES}")
+        if replicas < 1 or window < 1 or replica_capacity < 1:
+            raise ValueError("replicas, window and replica_capacity must be >= 1")
+        self.replicas = replicas
+        self.policy = policy
+        self.window = window
+        self.replica_capacity = replica_capacity
+        self.timeout = timeout_ms / 1e3
+        self.on_drop = on_drop
+        self.cond = threading.Condition()
+        # Sequence numbers sent to each replica and not filed yet, oldest first
+        self.assigned = [deque() for _ in range(replicas)]
+        self.results = {}
+        # Index in the input stream of each sequence number not taken yet
+        self.indices = {}
+        self.received = 0
+        # Next sequence number to assign, and to emit
+        self.seq = 0
+        self.next = 0
+        self.dispatched = 0
+        self.emitted = 0
+        self.dropped = 0
+        self.timeouts = 0
+        self.late = 0
+
+    def assign(self):
+        """Return (sequence number, replica) for a new message, or None to drop it."""
+        with self.cond:
+            index = self.received
+            self.received += 1
+            if not self.cond.wait_for(lambda: self._replica() is not None, self.timeout):
+                self.dropped += 1
+                if self.on_drop is not None:
+                    self.on_drop(index)
+                return None
+            replica = self._replica()
+            seq = self.seq
+            self.seq += 1
+            self.indices[seq] = index
+            self.assigned[replica].append(seq)
+            self.dispatched += 1
+            return seq, replica
+
+    def _replica(self):
+        # Replica of the next message, None while the window or its queue is full
+        if self.seq - self.next >= self.window:
+            return None
+        if self.policy == "round-robin":
+            replica = self.seq % self.replicas
+        else:
+            replica = min(range(self.replicas), key=lambda r: len(self.assigned[r]))
+        # Messages not filed yet may still wait in the replica's input queue
+        if len(self.assigned[replica]) >= self.replica_capacity:
+            return None
+        return replica
+
+    def put(self, replica, value):
+        """File the next output of `replica`."""
+        with self.cond:
+            seq = self.assigned[replica].popleft()
+            if seq < self.next:
+                self.late += 1
+                return
+            self.results[seq] = value
+            self.cond.notify_all()
+
+    def take(self, seq):
+        """Return (True, output) of message `seq`, or (False, None) on timeout."""
+        with self.cond:
+            found = self.cond.wait_for(lambda: seq in self.results, self.timeout)
+            value = self.results.pop(seq, None)
+            index = self.indices.pop(seq)
+            if found:
+                self.emitted += 1
+            else:
+                self.timeouts += 1
+                if self.on_drop is not None:
+                    self.on_drop(index)
+            self.next = seq + 1
+            # Wake up the dispatcher waiting for room in the window
+            self.cond.notify_all()
+            return found, value
+
+
+class DispatchOp(Operator):
+    """Send each message to one replica and its sequence number to the reorder operator.
+
+    This operator has:
+        inputs: "in"
+        outputs: "out0" ... "out{replicas - 1}", "seq"
+    """
+
+    def __init__(self, fragment, *args, buffer, **kwargs):
+        self.buffer = buffer
+        # Need to call the base class constructor last
+        super().__init__(fragment, *args, **kwargs)
+
+    def setup(self, spec: OperatorSpec):
+        spec.input("in")
+        for replica in range(self.buffer.replicas):
+            # The reorder buffer only assigns a message to a replica with room
+            spec.output(f"out{replica}").condition(ConditionType.NONE)
+        spec.output("seq")
+
+    def compute(self, op_input, op_output, context):
+        message = op_input.receive("in")
+        assigned = self.buffer.assign()
+        if assigned is None:
+            metrics.record_dropped(self.name)
+            return
+        seq, replica = assigned
+        op_output.emit(message, f"out{replica}")
+        op_output.emit(seq, "seq")
+
+
+class TapOp(Operator):
+    """File the outputs of one replica in the reorder buffer.
+
+    This operator has:
+        inputs: "in"
+    """
+
+    def __init__(self, fragment, *args, buffer, replica, **kwargs):
+        self.buffer = buffer
+        self.replica = replica
+        # Need to call the base class constructor last
+        super().__init__(fragment, *args, **kwargs)
+
+    def setup(self, spec: OperatorSpec):
+        spec.input("in")
+
+    def compute(self, op_input, op_output, context):
+        self.buffer.put(self.replica, op_input.receive("in"))
+
+
+@export_metrics
+class ReorderOp(Operator):
+    """Emit the replica outputs in the order of the dispatched messages.
+
+    This operator has:
+        inputs: "seq"
+        outputs: "out"
+    """
+
+    def __init__(self, fragment, *args, buffer, **kwargs):
+        self.buffer = buffer
+        # Need to call the base class constructor last
+        super().__init__(fragment, *args, **kwargs)
+
+    def setup(self, spec: OperatorSpec):
+        spec.input("seq")
+        spec.output("out")
+
+    def compute(self, op_input, op_output, context):
+        found, value = self.buffer.take(op_input.receive("seq"))
+        if found:
+            op_output.emit(value, "out")
+        else:
+            metrics.record_dropped(self.name)
+
+
+def replicate(
+    app,
+    factory,
+    upstream,
+    downstream,
+    replicas=2,
+    ports=("in", "out"),
+    upstream_port="",
+    downstream_port="",
+    policy="round-robin",
+    window=8,
+    timeout_ms=1000.0,
+    on_drop=None,
+    replica_capacity=1,
+    name="replica",
+):
+    """Connect `replicas` operators made by `factory(index, name)` in parallel.
+
+    Messages from `upstream_port` of `upstream` go to the input port
+    `ports[0]` of a replica, and the outputs of port `ports[1]` reach
+    `downstream_port` of `downstream` in order. With `replicas=1` the
+    operator is connected directly. Returns the ReorderBuffer (None with a
+    single replica), whose counters describe the run. `on_drop(index)` is
+    called for each message dropped or skipped, with its index among the
+    messages received from `upstream`. `replica_capacity` must not exceed the
+    capacity of the replicas' input port.
+    """
+    in_port, out_port = ports
+    if replicas == 1:
+        op = factory(0, name)
+        app.add_flow(upstream, op, {(upstream_port, in_port)})
+        app.add_flow(op, downstream, {(out_port, downstream_port)})
+        return None
+
+    buffer = ReorderBuffer(replicas, policy, window, timeout_ms, on_drop, replica_capacity)
+    dispatch = DispatchOp(app, buffer=buffer, name=f"{name}_dispatch")
+    reorder = ReorderOp(app, buffer=buffer, name=f"{name}_reorder")
+    app.add_flow(upstream, dispatch, {(upstream_port, "in")})
+    for index in range(replicas):
+        op = factory(index, f"{name}{index}")
+        tap = TapOp(app, buffer=buffer, replica=index, name=f"{name}{index}_tap")
+        app.add_flow(dispatch, op, {(f"out{index}", in_port)})
+        app.add_flow(op, tap, {(out_port, "in")})
+    app.add_flow(dispatch, reorder, {("seq", "seq")})
+    app.add_flow(reorder, downstream, {("out", downstream_port)})
+    return buffer
@@ -0,0 +1,233 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+# Tiled inference for high-resolution sources.
+#
+# Instead of downscaling every frame to the model input size, `TilerOp`
+# splits it into overlapping tiles of exactly that size and sends them to the
+# inference operator as one batch. The tile origins go out on a second port,
+# so that the postprocessor can map the boxes of each tile back to frame
+# coordinates and merge duplicates along the seams with NMS.
+#
+# With `motion_threshold` > 0, tiles whose content barely changed since they
+# were last processed are skipped and the postprocessor reuses their previous
+# boxes. Every tile is still refreshed at least every `refresh_every` frames,
+# and at least one tile is processed per frame.
+#
+# The model must accept a dynamic batch size (the TAO PeopleNet ONNX export
+# does).
+
+import numpy as np
+from holoscan.core import Operator, OperatorSpec
+
+from lazy_import import lazy_import
+from metrics import export_metrics
+
+cp = lazy_import("cupy", optional=True)
+
+
+def tile_origins(size, tile, overlap):
+    """Origins of tiles covering [0, size) with at least `overlap` pixels shared.
+
+    Tiles are spread evenly and the last one is flush with the end, so no
+    tile needs padding unless the frame is smaller than a tile.
+    """
+    if size <= tile:
+        return [0]
+    count = -(-(size - overlap) // (tile - overlap))
+    return [int(round(origin)) for origin in np.linspace(0, size - tile, count)]
+
+
+def tile_grid(height, width, tile_height, tile_width, overlap):
+    """(y, x) origins of the tiles covering a frame, row by row."""
+    return [
+        (y, x)
+        for y in tile_origins(height, tile_height, overlap)
+        for x in tile_origins(width, tile_width, overlap)
+    ]
+
+
+class TileInfo:
+    """Where the tiles of a batch come from."""
+
+    __slots__ = ("origins", "indices", "frame", "num_tiles")
+
+    def __init__(self, origins, indices, frame, num_tiles):
+        # (n, 2) array of the (y, x) origins of the tiles in the batch
+        self.origins = origins
+        # Index of each tile of the batch in the tile grid
+        self.indices = indices
+        # Frame (height, width)
+        self.frame = frame
+        self.num_tiles = num_tiles
+
+
+@export_metrics
+class TilerOp(Operator):
+    """Split frames into overlapping model-sized tiles.
+
+    **==Named Inputs==**
+
+        source_video : gxf.Entity or array
+            HWC uint8 frame (the tensor named "" of the video replayer).
+
+    **==Named Outputs==**
+
+        out : dict
+            {out_tensor_name: NCHW float batch of the processed tiles}, on
+            the GPU if `device="cuda"`.
+        tiles : TileInfo
+            Origins of the tiles in the batch.
+
+    Parameters
+    ----------
+    tile_width, tile_height : int
+        Model input size.
+    overlap : int
+        Minimum overlap between neighbouring tiles, in pixels. It should be
+        larger than the objects that must not be cut.
+    scale_min, scale_max : float
+        Output range of the normalization, as in the "preprocessor" block.
+    motion_threshold : float
+        Mean absolute difference (in 8-bit levels) below which a tile is
+        considered static and skipped, 0 to process every tile.
+    refresh_every : int
+        Frames after which a static tile is processed anyway.
+    max_batch : int or None
+        Largest batch the inference engine accepts. A frame with more tiles
+        raises ValueError.
+    device : str
+        Where the batch goes, "cuda" (for `input_on_cuda`) or "cpu".
+    """
+
+    def __init__(
+        self,
+        fragment,
+        *args,
+        tile_width,
+        tile_height,
+        overlap=64,
+        scale_min=0.0,
+        scale_max=1.0,
+        out_tensor_name="preprocessed",
+        out_dtype="float32",
+        motion_threshold=0.0,
+        refresh_every=30,
+        max_batch=None,
+        device="cuda",
+        **kwargs,
+    ):
+        if device == "cuda" and cp is None:
+            raise ImportError("device 'cuda' requires CuPy, use device='cpu'")
+        if overlap >= min(tile_width, tile_height):
+            raise ValueError("overlap must be smaller than the tile size")
+        self.tile_size = (tile_height, tile_width)
+        self.overlap = overlap
+        self.scale = (scale_max - scale_min) / 255.0
+        self.offset = scale_min
+        self.out_tensor_name = out_tensor_name
+        self.out_dtype = np.dtype(out_dtype)
+        self.motion_threshold = motion_threshold
+        self.refresh_every = max(1, refresh_every)
+        self.max_batch = max_batch
+        self.device = device
+        self.grid = None
+        # Downsampled grayscale of each tile when it was last processed
+        self.references = None
+        self.age = None
+        self.processed = 0
+        self.skipped = 0
+
+        # Need to call the base class constructor last
+        super().__init__(fragment, *args, **kwargs)
+
+    def setup(self, spec: OperatorSpec):
+        spec.input("source_video")
+        spec.output("out")
+        spec.output("tiles")
+
+    def thumbnail(self, xp, tile):
+        # Every 8th pixel, mean of the color channels
+        return tile[::8, ::8, :3].astype(xp.float32).mean(axis=2)
+
+    def select(self, xp, frame):
+        """Indices of the tiles to process for this frame."""
+        th, tw = self.tile_size
+        if self.motion_threshold <= 0:
+            return list(range(len(self.grid)))
+
+        selected = []
+        for i, (y, x) in enumerate(self.grid):
+            self.age[i] += 1
+            if self.references[i] is None or self.age[i] >= self.refresh_every:
+                selected.append(i)
+                continue
+            thumbnail = self.thumbnail(xp, frame[y : y + th, x : x + tw])
+            if float(xp.abs(thumbnail - self.references[i]).mean()) >= self.motion_threshold:
+                selected.append(i)
+        if not selected:
+            # Always refresh the stalest tile
+            selected.append(int(np.argmax(self.age)))
+        for i in selected:
+            y, x = self.grid[i]
+            self.references[i] = self.thumbnail(xp, frame[y : y + th, x : x + tw])
+            self.age[i] = 0
+        return selected
+
+    def compute(self, op_input, op_output, context):
+        message = op_input.receive("source_video")
+        frame = message.get("") if hasattr(message, "get") else message
+        if hasattr(frame, "__cuda_array_interface__"):
+            xp = cp
+        else:
+            xp = np
+        frame = xp.asarray(frame)
+        height, width = frame.shape[:2]
+
+        th, tw = self.tile_size
+        if self.grid is None:
+            self.grid = tile_grid(height, width, th, tw, self.overlap)
+            if self.max_batch is not None and len(self.grid) > self.max_batch:
+                raise ValueError(
+                    f"{self.name}: a {width}x{height} frame has {len(self.grid)} tiles, "
+                    f"more than max_batch={self.max_batch}"
+                )
+            self.references = [None] * len(self.grid)
+            self.age = [0] * len(self.grid)
+
+        selected = self.select(xp, frame)
+        self.processed += len(selected)
+        self.skipped += len(self.grid) - len(selected)
+
+        # Tiles are zero-padded when the frame is smaller than a tile
+        batch = xp.zeros((len(selected), 3, th, tw), self.out_dtype)
+        for n, i in enumerate(selected):
+            y, x = self.grid[i]
+            tile = frame[y : y + th, x : x + tw, :3].transpose(2, 0, 1)
+            batch[n, :, : tile.shape[1], : tile.shape[2]] = tile * self.scale + self.offset
+        if self.device == "cuda":
+            batch = cp.asarray(batch)
+        elif xp is not np:
+            batch = batch.get()
+
+        op_output.emit({self.out_tensor_name: batch}, "out")
+        origins = np.array([self.grid[i] for i in selected], np.float32).reshape(-1, 2)
+        op_output.emit(TileInfo(origins, selected, (height, width), len(self.grid)), "tiles")
@@ -0,0 +1,276 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import sys
+import timeit
+from argparse import ArgumentParser
+
+import numpy as np
+from holoscan.conditions import CountCondition
+from holoscan.core import Application, Operator, OperatorSpec
+
+try:
+    import cupy as cp
+except ImportError:
+    cp = None
+
+
+def as_array(tensor):
+    """Wrap a tensor as a CuPy or NumPy array without copying.
+
+    Objects exposing `__cuda_array_interface__` (CuPy arrays, Holoscan
+    tensors on device) become CuPy arrays, everything else goes through
+    the NumPy array protocol.
+    """
+    if cp is not None and hasattr(tensor, "__cuda_array_interface__"):
+        return tensor if isinstance(tensor, cp.ndarray) else cp.asarray(tensor)
+    return tensor if isinstance(tensor, np.ndarray) else np.asarray(tensor)
+
+
+def device_of(array):
+    """Return "cuda:<id>" for device arrays and "cpu" for host arrays."""
+    if cp is not None and isinstance(array, cp.ndarray):
+        return f"cuda:{array.device.id}"
+    return "cpu"
+
+
+class TensorMap:
+    """Compact message holding named tensors.
+
+    Tensors are converted once, at construction, to CuPy (device) or NumPy
+    (host) arrays without copying, and the device and dtype of each entry
+    are recorded. Consumers can then use the entries directly instead of
+    calling `cp.asarray` on every tick. Tensor names are interned, so lookups
+    of literal names compare by identity.
+
+    It follows the `dict` interface used by the tutorial operators (`get`,
+    `[]`, `in`, `items`, ...). The map itself has no array protocols:
+    Holoscan's `emit()` sends any object with `__dlpack__` or an array
+    interface as a bare tensor, which would drop the names. Use `single()`
+    to hand the tensor of a one-entry map to CuPy, NumPy or PyTorch, and
+    `dict(tensor_map)` to emit to a C++ operator expecting a TensorMap.
+    """
+
+    __slots__ = ("_names", "_tensors", "_devices", "_dtypes")
+
+    def __init__(self, tensors=None, **kwargs):
+        if tensors is None:
+            tensors = kwargs
+        elif kwargs:
+            tensors = {**tensors, **kwargs}
+        names, arrays = [], []
+        for name, tensor in tensors.items():
+            names.append(sys.intern(name))
+            arrays.append(as_array(tensor))
+        self._names = tuple(names)
+        self._tensors = tuple(arrays)
+        self._devices = tuple(device_of(a) for a in arrays)
+        self._dtypes = tuple(a.dtype for a in arrays)
+
+    @classmethod
+    def _borrow(cls, names, tensors, devices, dtypes):
+        # Build a map from already validated entries, skipping conversions
+        tensor_map = cls.__new__(cls)
+        tensor_map._names = names
+        tensor_map._tensors = tensors
+        tensor_map._devices = devices
+        tensor_map._dtypes = dtypes
+        return tensor_map
+
+    def view(self, *names):
+        """Return a map borrowing a subset of the tensors (no copy)."""
+        indices = [self._index(name) for name in names]
+        return self._borrow(
+            tuple(self._names[i] for i in indices),
+            tuple(self._tensors[i] for i in indices),
+            tuple(self._devices[i] for i in indices),
+            tuple(self._dtypes[i] for i in indices),
+        )
+
+    def rename(self, **names):
+        """Return a map borrowing the same tensors under new names (no copy)."""
+        renamed = tuple(sys.intern(names.get(name, name)) for name in self._names)
+        return self._borrow(renamed, self._tensors, self._devices, self._dtypes)
+
+    def _index(self, name):
+        try:
+            return self._names.index(name)
+        except ValueError:
+            raise KeyError(name) from None
+
+    def get(self, name, default=None):
+        # Tuple lookup checks identity first, which is what interned names hit
+        if name in self._names:
+            return self._tensors[self._names.index(name)]
+        return default
+
+    def device(self, name):
+        return self._devices[self._index(name)]
+
+    def dtype(self, name):
+        return self._dtypes[self._index(name)]
+
+    def __getitem__(self, name):
+        return self._tensors[self._index(name)]
+
+    def __contains__(self, name):
+        return name in self._names
+
+    def __len__(self):
+        return len(self._names)
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def keys(self):
+        return self._names
+
+    def values(self):
+        return self._tensors
+
+    def items(self):
+        return zip(self._names, self._tensors)
+
+    def __repr__(self):
+        entries = ", ".join(
+            f"{name}: {tensor.shape} {dtype} {device}"
+            for name, tensor, dtype, device in zip(
+                self._names, self._tensors, self._dtypes, self._devices
+            )
+        )
+        return f"TensorMap({entries})"
+
+    def single(self):
+        """Return the tensor of a map holding exactly one."""
+        if len(self._tensors) != 1:
+            raise ValueError(f"TensorMap holds {len(self._tensors)} tensors, not one")
+        return self._tensors[0]
+
+
+# Operators used by the demo application below
+
+
+class SourceOp(Operator):
+    """Emit a TensorMap holding a single "preprocessed" tensor on each tick."""
+
+    def __init__(self, fragment, *args, shape=(3, 544, 960), **kwargs):
+        xp = cp if cp is not None else np
+        self.tensor = xp.zeros(shape, dtype=np.float32)
+        super().__init__(fragment, *args, **kwargs)
+
+    def setup(self, spec: OperatorSpec):
+        spec.output("out")
+
+    def compute(self, op_input, op_output, context):
+        op_output.emit(TensorMap(preprocessed=self.tensor), "out")
+
+
+class BatchOp(Operator):
+    """Add a batch axis to the "preprocessed" tensor.
+
+    The entry is already an array, so no `cp.asarray` is needed here.
+    """
+
+    def setup(self, spec: OperatorSpec):
+        spec.input("in")
+        spec.output("out")
+
+    def compute(self, op_input, op_output, context):
+        in_message = op_input.receive("in")
+        tensor = in_message["preprocessed"]
+        op_output.emit(TensorMap(preprocessed=tensor[None]), "out")
+
+
+class SinkOp(Operator):
+    def setup(self, spec: OperatorSpec):
+        spec.input("in")
+
+    def compute(self, op_input, op_output, context):
+        print(op_input.receive("in"))
+
+
+class TensorMapApp(Application):
+    def compose(self):
+        src = SourceOp(self, CountCondition(self, 3), name="src_op")
+        batch = BatchOp(self, name="batch_op")
+        sink = SinkOp(self, name="sink_op")
+
+        # Connect the operators into the workflow:  src -> batch -> sink
+        self.add_flow(src, batch)
+        self.add_flow(batch, sink)
+
+
+def benchmark(number):
+    """Compare the per-message overhead of a dict and a TensorMap.
+
+    Each message is built by a producer and read twice by consumers, which
+    is the pattern of the operators in tao_peoplenet/peoplenet_app.py.
+    """
+    xp = cp if cp is not None else np
+    person = xp.zeros((1, 8, 2), dtype=np.float32)
+    faces = xp.zeros((1, 8, 2), dtype=np.float32)
+
+    def with_dict():
+        message = {"person": person, "faces": faces}
+        for _ in range(2):
+            xp.asarray(message.get("person"))
+            xp.asarray(message.get("faces"))
+
+    def with_tensor_map():
+        message = TensorMap(person=person, faces=faces)
+        for _ in range(2):
+            message.get("person")
+            message.get("faces")
+
+    for label, fn in (("dict + asarray", with_dict), ("TensorMap", with_tensor_map)):
+        seconds = min(timeit.repeat(fn, number=number, repeat=5))
+        print(f"{label:>16}: {seconds / number * 1e6:.2f} us/message")
+
+    message = TensorMap(person=person, faces=faces)
+    size = sys.getsizeof(message) + sum(
+        sys.getsizeof(getattr(message, slot)) for slot in TensorMap.__slots__
+    )
+    print(f"{'dict size':>16}: {sys.getsizeof({'person': person, 'faces': faces})} bytes")
+    print(f"{'TensorMap size':>16}: {size} bytes (including its tuples)")
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="TensorMap message example")
+    parser.add_argument(
+        "--benchmark",
+        action="store_true",
+        help="Measure the per-message overhead of dict and TensorMap messages instead of running the app.",
+    )
+    parser.add_argument(
+        "-n",
+        "--number",
+        type=int,
+        default=100000,
+        help="Number of messages per benchmark repetition.",
+    )
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.number)
+    else:
+        app = TensorMapApp()
+        app.config("")
+        app.run()
@@ -0,0 +1,125 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+# Loopback throughput and loss of UdpIngest against a local sender.
+#
+# For each packet rate, a sender in a second process streams a tone to
+# 127.0.0.1 for a few seconds while this process ingests it and consumes the
+# blocks (with an FFT per block with --fft, like FFTOp). A rate of 0 sends
+# flat out, which measures the line rate the ingest keeps up with.
+#
+#   python benchmark_ingest.py
+#   python benchmark_ingest.py --rates 100000 200000 0 --fft
+#
+# "lost" is the fraction of the packets sent that did not make it into a
+# block. Loss at high rates mostly happens in the kernel socket buffer, which is
+# capped by net.core.rmem_max: raise it (sysctl -w net.core.rmem_max=...) to
+# absorb longer stalls of the I/O thread.
+
+import multiprocessing
+import time
+from argparse import ArgumentParser
+
+import numpy as np
+
+from udp_source import PACKET_HEADER, UdpIngest, send_stream
+
+
+def sender(port, samples_per_packet, count, rate, seconds, results):
+    start = time.perf_counter()
+    sent = send_stream(
+        port=port, samples_per_packet=samples_per_packet, count=count, rate=rate, duration=seconds
+    )
+    results.put((sent, time.perf_counter() - start))
+
+
+def run(rate, seconds, args):
+    ingest = UdpIngest(
+        "127.0.0.1",
+        0,
+        samples_per_packet=args.samples_per_packet,
+        block_size=args.block_size,
+        num_blocks=args.num_blocks,
+        rcvbuf=args.rcvbuf,
+    ).start()
+    # Whole blocks, so that the last one gets published. Flat out, the
+    # sender stops after `seconds`
+    packets_per_block = ingest.packets_per_block
+    count = int(rate * seconds) if rate else 1 << 62
+    count = max(1, count // packets_per_block) * packets_per_block
+    duration = None if rate else seconds
+    results = multiprocessing.Queue()
+    process = multiprocessing.Process(
+        target=sender,
+        args=(ingest.address[1], args.samples_per_packet, count, rate, duration, results),
+    )
+    process.start()
+    blocks = 0
+    while True:
+        block = ingest.get(timeout=0.5)
+        if block is None:
+            if not process.is_alive():
+                break
+            continue
+        if args.fft:
+            np.fft.fft(block)
+        del block
+        blocks += 1
+    sent, send_time = results.get()
+    process.join()
+    ingest.close()
+    return sent, send_time, blocks, ingest.stats
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Benchmark UDP ingest over loopback")
+    parser.add_argument(
+        "--rates",
+        type=float,
+        nargs="+",
+        default=[10000, 50000, 100000, 0],
+        help="Packet rates to send, 0 for flat out.",
+    )
+    parser.add_argument("-s", "--seconds", type=float, default=2.0, help="Duration per rate.")
+    parser.add_argument("--samples_per_packet", type=int, default=128)
+    parser.add_argument("--block_size", type=int, default=32768)
+    parser.add_argument("--num_blocks", type=int, default=16)
+    parser.add_argument("--rcvbuf", type=int, default=32 << 20, help="Socket receive buffer.")
+    parser.add_argument("--fft", action="store_true", help="FFT every block in the consumer.")
+    args = parser.parse_args()
+
+    packet_bytes = PACKET_HEADER.size + args.samples_per_packet * np.dtype("complex64").itemsize
+    print(
+        f"{packet_bytes} B packets, {args.block_size} samples per block, "
+        f"{args.num_blocks} blocks, consumer: {'FFT' if args.fft else 'none'}"
+    )
+    print(
+        f"{'rate':>8} {'sent/s':>9} {'Gbit/s':>7} {'received':>9} {'blocks':>7} "
+        f"{'lost':>8} {'late':>5} {'overruns':>8}"
+    )
+    for rate in args.rates:
+        sent, send_time, blocks, stats = run(rate, args.seconds, args)
+        pps = sent / send_time
+        print(
+            f"{f'{rate:.0f}' if rate else 'max':>8} {pps:>9.0f} {pps * packet_bytes * 8e-9:>7.3f} "
+            f"{stats.packets:>9} {blocks:>7} {1 - stats.packets / max(1, sent):>8.2%} "
+            f"{stats.late:>5} {stats.overruns:>8}"
+        )
@@ -0,0 +1,485 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+# Source operator ingesting a high-rate UDP sample stream.
+#
+# Every datagram carries a little-endian uint64 sequence number followed by
+# `samples_per_packet` samples. A dedicated I/O thread drains the socket
+# without blocking, in batches of up to `batch` datagrams, into a
+# preallocated scratch array, then scatters the payloads of the whole batch
+# into a ring of `num_blocks` blocks of `block_size` samples. Packet n always
+# lands at the same place of block n // packets_per_block, so datagrams
+# reordered by up to `reorder_blocks` blocks are put back in order.
+#
+# A block is published as soon as it is complete, or, with packets missing,
+# once a packet `reorder_blocks` blocks further arrives (or the stream stays
+# idle for `flush_after` seconds). Missing packets are zero-filled and
+# counted. A sequence number far ahead or behind of the stream is taken as a
+# sender restart: the blocks being assembled are dropped and the ingest
+# resumes there. The operator emits each block as a BlockArray view of the ring
+# (no copy), which `FFTOp` of answers/ex3.py can consume directly. The
+# block goes back to the ring only when the last view of it is garbage
+# collected. When the consumer holds on to every block, the packets of new
+# blocks are dropped and counted as overruns.
+#
+# Python has no recvmmsg(), so a batch is one recv_into() per datagram, but
+# the reassembly is a few NumPy operations per batch, not per packet.
+#
+#   python udp_source.py --role rx      # UDP source -> FFT -> sink
+#   python udp_source.py --role tx      # local sender of a test tone
+
+import os
+import selectors
+import socket
+import struct
+import sys
+import threading
+import time
+from argparse import ArgumentParser
+from collections import deque
+from functools import partial
+
+import numpy as np
+from holoscan.conditions import CountCondition
+from holoscan.core import Application, Operator, OperatorSpec
+
+try:
+    import cupy as cp
+except ImportError:
+    cp = None
+
+# The lease helper is shared with the shared memory transport
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "shm_transport"))
+from lease import LeasedArray, leased  # noqa: E402
+
+# Sequence number leading every datagram
+PACKET_HEADER = struct.Struct("<Q")
+
+
+# Blocks are emitted as views of the ring
+BlockArray = LeasedArray
+
+
+class IngestStats:
+    """Counters of a UdpIngest, updated by its I/O thread only."""
+
+    __slots__ = (
+        "packets",
+        "blocks",
+        "lost",
+        "late",
+        "malformed",
+        "overruns",
+        "dropped",
+        "restarts",
+    )
+
+    def __init__(self):
+        for name in self.__slots__:
+            setattr(self, name, 0)
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return " ".join(f"{name}={getattr(self, name)}" for name in self.__slots__)
+
+
+class UdpIngest:
+    """UDP socket drained by an I/O thread into a ring of sample blocks.
+
+    Counters (see IngestStats) are in `stats`:
+        packets    datagrams stored in a block
+        blocks     blocks published
+        lost       packets missing from published blocks (sequence gaps),
+                   including whole blocks skipped
+        late       packets arriving after their block was published
+        malformed  datagrams of the wrong size
+        overruns   blocks dropped because no ring block was free
+        dropped    packets of the dropped blocks
+        restarts   sequence numbers jumping far back or ahead (sender
+                   restarted)
+    """
+
+    def __init__(
+        self,
+        host="0.0.0.0",
+        port=5000,
+        samples_per_packet=128,
+        block_size=32768,
+        num_blocks=16,
+        dtype="complex64",
+        batch=64,
+        reorder_blocks=2,
+        flush_after=0.1,
+        rcvbuf=32 << 20,
+    ):
+        if block_size % samples_per_packet:
+            raise ValueError("block_size must be a multiple of samples_per_packet")
+        if num_blocks < reorder_blocks + 1:
+            raise ValueError("num_blocks must be larger than reorder_blocks")
+        self.dtype = np.dtype(dtype)
+        self.samples_per_packet = samples_per_packet
+        self.packets_per_block = block_size // samples_per_packet
+        self.block_size = block_size
+        self.packet_bytes = PACKET_HEADER.size + samples_per_packet * self.dtype.itemsize
+        self.batch = batch
+        self.reorder_blocks = reorder_blocks
+        self.flush_after = flush_after
+        self.stats = IngestStats()
+
+        self.ring = np.zeros((num_blocks, block_size), self.dtype)
+        self._free = deque(range(num_blocks))
+        self._ready = deque()
+        self._ready_cond = threading.Condition()
+        self._scratch = np.zeros((batch, self.packet_bytes), np.uint8)
+        self._views = [memoryview(row) for row in self._scratch]
+        self._seqs = self._scratch[:, : PACKET_HEADER.size].view("<u8")[:, 0]
+        self._payloads = self._scratch[:, PACKET_HEADER.size :].view(self.dtype)
+        # Block number -> (ring index or None when overrun, received mask)
+        self._open = {}
+        # Every block before this one has been published or given up
+        self._next = None
+
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        # Capped by net.core.rmem_max, raise it for high packet rates
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf)
+        self.sock.bind((host, port))
+        self.sock.setblocking(False)
+        self.address = self.sock.getsockname()
+
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="udp_ingest", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def close(self):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self.sock.close()
+
+    def get(self, timeout=None):
+        """Return the next block as a BlockArray, or None if `timeout` expires."""
+        with self._ready_cond:
+            if not self._ready and not self._ready_cond.wait_for(lambda: self._ready, timeout):
+                return None
+            _, index = self._ready.popleft()
+        return leased(self.ring[index], partial(self._free.append, index))
+
+    # I/O thread
+
+    def _run(self):
+        selector = selectors.DefaultSelector()
+        selector.register(self.sock, selectors.EVENT_READ)
+        last = time.monotonic()
+        try:
+            while not self._stop.is_set():
+                if not selector.select(timeout=self.flush_after):
+                    if self._open and time.monotonic() - last >= self.flush_after:
+                        # Idle stream, publish what has been received
+                        self._publish_until(max(self._open) + 1)
+                    continue
+                while True:
+                    n = self._drain()
+                    if n:
+                        self._scatter(n)
+                        last = time.monotonic()
+                    if n < self.batch:
+                        break
+        finally:
+            selector.close()
+
+    def _drain(self):
+        """Receive up to `batch` datagrams into the scratch array."""
+        n = 0
+        recv_into, views, size = self.sock.recv_into, self._views, self.packet_bytes
+        while n < self.batch:
+            try:
+                nbytes = recv_into(views[n])
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError:
+                # Socket closed
+                break
+            if nbytes == size:
+                n += 1
+            else:
+                self.stats.malformed += 1
+        return n
+
+    def _scatter(self, n):
+        seqs = self._seqs[:n].copy()
+        blocks = seqs // self.packets_per_block
+        rows = seqs % self.packets_per_block
+        if self._next is None:
+            self._next = int(blocks.min())
+        elif blocks.max() < self._next - 2 * self.reorder_blocks:
+            # Further behind than reordering explains: the sender started over
+            self._restart(int(blocks.min()))
+
+        for number in np.unique(blocks).tolist():
+            mask = blocks == number
+            if number >= self._next + 4 * len(self.ring):
+                # Far ahead of the stream: count the gap in one step rather
+                # than giving up each skipped block in turn
+                self.stats.lost += (number - self._next) * self.packets_per_block
+                self._restart(number)
+            if number < self._next:
+                self.stats.late += int(mask.sum())
+                continue
+            if number >= self._next + self.reorder_blocks:
+                # Too far ahead to wait for the older blocks any longer
+                self._publish_until(number - self.reorder_blocks + 1)
+            entry = self._open.get(number)
+            if entry is None:
+                index = self._free.popleft() if self._free else None
+                if index is None:
+                    self.stats.overruns += 1
+                entry = self._open[number] = (index, np.zeros(self.packets_per_block, bool))
+            index, received = entry
+            if index is None:
+                self.stats.dropped += int(mask.sum())
+                continue
+            block_rows = rows[mask]
+            block = self.ring[index].reshape(self.packets_per_block, -1)
+            block[block_rows] = self._payloads[:n][mask]
+            received[block_rows] = True
+            self.stats.packets += int(mask.sum())
+
+        # Publish complete blocks in order
+        while self._next in self._open:
+            index, received = self._open[self._next]
+            if index is None or not received.all():
+                break
+            self._publish_until(self._next + 1)
+
+    def _publish_until(self, end):
+        """Publish or give up every block before block number `end`."""
+        published = 0
+        for number in range(self._next, end):
+            entry = self._open.pop(number, None)
+            if entry is None:
+                # No packet of this block arrived at all
+                self.stats.lost += self.packets_per_block
+                continue
+            index, received = entry
+            if index is None:
+                continue
+            missing = ~received
+            if missing.any():
+                self.ring[index].reshape(self.packets_per_block, -1)[missing] = 0
+                self.stats.lost += int(missing.sum())
+            self._ready.append((number, index))
+            self.stats.blocks += 1
+            published += 1
+        self._next = max(self._next, end)
+        if published:
+            with self._ready_cond:
+                self._ready_cond.notify()
+
+    def _restart(self, number):
+        """Drop the blocks being assembled and resume at block `number`."""
+        self.stats.restarts += 1
+        self._discard_open()
+        self._next = number
+
+    def _discard_open(self):
+        for index, _ in self._open.values():
+            if index is not None:
+                self._free.append(index)
+        self._open.clear()
+
+
+def send_stream(
+    host="127.0.0.1",
+    port=5000,
+    samples_per_packet=128,
+    count=25600,
+    rate=0.0,
+    dtype="complex64",
+    frequency=0.01,
+    first_seq=0,
+    duration=None,
+):
+    """Send `count` packets of a complex tone, `rate` packets/s (0: flat out).
+
+    `frequency` is in cycles per sample. Sending stops early after `duration`
+    seconds, if given. Returns the number of packets sent.
+    """
+    dtype = np.dtype(dtype)
+    period = int(round(1 / frequency)) if frequency else 1
+    # One packet per possible phase, so the tone stays continuous
+    n = np.arange(period * samples_per_packet + samples_per_packet)
+    phase = 2 * np.pi * frequency * n
+    tone = (np.exp(1j * phase) if dtype.kind == "c" else np.sin(phase)).astype(dtype)
+    packet = bytearray(PACKET_HEADER.size + samples_per_packet * dtype.itemsize)
+    payload = np.frombuffer(packet, dtype, offset=PACKET_HEADER.size)
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4 << 20)
+    sock.connect((host, port))
+    start = time.perf_counter()
+    sent = 0
+    try:
+        for i in range(count):
+            seq = first_seq + i
+            PACKET_HEADER.pack_into(packet, 0, seq)
+            offset = seq * samples_per_packet % period
+            payload[:] = tone[offset : offset + samples_per_packet]
+            try:
+                sock.send(packet)
+                sent += 1
+            except (BlockingIOError, ConnectionRefusedError):
+                # Receiver gone or not started yet: the packet is lost
+                pass
+            if duration is not None and not i % 64 and time.perf_counter() - start > duration:
+                break
+            if rate:
+                delay = start + (i + 1) / rate - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+    finally:
+        sock.close()
+    return sent
+
+
+class UdpSourceOp(Operator):
+    """Emit the sample blocks of a UDP stream.
+
+    This operator has:
+        outputs: "out"
+    Blocks are emitted as 1-D BlockArray views of the ring, `block_size`
+    samples each, without copying. Keyword arguments other than `timeout`
+    are passed to UdpIngest; its counters are in `ingest.stats`.
+    """
+
+    def __init__(self, fragment, *args, timeout=10.0, ingest_args=None, **kwargs):
+        self.timeout = timeout
+        self.ingest_args = ingest_args or {}
+        self.ingest = None
+        # Need to call the base class constructor last
+        super().__init__(fragment, *args, **kwargs)
+
+    def setup(self, spec: OperatorSpec):
+        spec.output("out")
+
+    def start(self):
+        self.ingest = UdpIngest(**self.ingest_args).start()
+
+    def stop(self):
+        self.ingest.close()
+
+    def compute(self, op_input, op_output, context):
+        block = self.ingest.get(timeout=self.timeout)
+        if block is None:
+            raise TimeoutError(f"{self.name}: no block received in {self.timeout} s")
+        op_output.emit(block, "out")
+
+
+# Demo application: the pipeline of answers/ex3.py fed by the UDP source
+
+
+class FFTOp(Operator):
+    def __init__(self, fragment, *args, xp=np, **kwargs):
+        self.xp = xp
+        super().__init__(fragment, *args, **kwargs)
+
+    def setup(self, spec: OperatorSpec):
+        spec.input("in")
+        spec.output("out")
+
+    def compute(self, op_input, op_output, context):
+        sig = op_input.receive("in")
+        op_output.emit(self.xp.fft.fft(self.xp.asarray(sig)), "out")
+
+
+class PeakSinkOp(Operator):
+    def setup(self, spec: OperatorSpec):
+        spec.input("in")
+
+    def compute(self, op_input, op_output, context):
+        spectrum = op_input.receive("in")
+        peak = int(abs(spectrum).argmax())
+        print(f"peak at {peak / len(spectrum):.4f} cycles/sample")
+
+
+class UdpFFTApp(Application):
+    def __init__(self, *args, count=100, xp=np, **kwargs):
+        self.count = count
+        self.xp = xp
+        super().__init__(*args, **kwargs)
+
+    def compose(self):
+        src = UdpSourceOp(
+            self,
+            CountCondition(self, self.count),
+            ingest_args=self.kwargs("udp"),
+            name="udp_source",
+        )
+        fft = FFTOp(self, xp=self.xp, name="fft_op")
+        sink = PeakSinkOp(self, name="sink_op")
+        self.src = src
+
+        # Connect the operators into the workflow:  src -> fft -> sink
+        self.add_flow(src, fft)
+        self.add_flow(fft, sink)
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="UDP sensor ingest example")
+    parser.add_argument(
+        "--role",
+        type=str,
+        required=True,
+        help="Which half to run: rx (the application) or tx (a local sender).",
+    )
+    parser.add_argument("-c", "--count", type=int, default=100, help="Blocks to receive or send.")
+    parser.add_argument("--rate", type=float, default=10000, help="Packets per second sent.")
+    parser.add_argument("--cpu", action="store_true", help="Use NumPy instead of CuPy.")
+    args = parser.parse_args()
+    if args.role not in ["tx", "rx"]:
+        raise ValueError("role must be one of the following: tx or rx.")
+
+    config = os.path.join(os.path.dirname(__file__), "udp_ingest.yaml")
+    if args.role == "tx":
+        app = Application()
+        app.config(config)
+        udp = app.kwargs("udp")
+        block_size = udp.get("block_size", 32768)
+        samples_per_packet = udp.get("samples_per_packet", 128)
+        sent = send_stream(
+            "127.0.0.1",
+            udp.get("port", 5000),
+            samples_per_packet=samples_per_packet,
+            count=args.count * block_size // samples_per_packet,
+            rate=args.rate,
+            dtype=udp.get("dtype", "complex64"),
+        )
+        print(f"sent {sent} packets")
+    else:
+        app = UdpFFTApp(count=args.count, xp=np if args.cpu or cp is None else cp)
+        app.config(config)
+        app.run()
+        print(app.src.ingest.stats)